@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark engine time per decision with random self-play.
+
+Drives each game the way run_discrete_game does (legal actions, state, validation, step) and
+reports the time spent in the engine per decision. Also reports how fast positions can be
+cloned (clone() vs copy.deepcopy) and stepped back and forth with apply()/undo(), the
+operations search-based agents rely on. Finally reports decisions per minute for the
+vectorized engines (VectorGame) playing random legal actions in lockstep.
+
+Usage: PYTHONPATH=. python scripts/benchmark_engines.py --games 200
+"""
+
+import argparse
+import copy
+import random
+import time
+
+import numpy as np
+
+from src.games.go_fish.go_fish import GoFish
+from src.games.go_fish.vector import GoFishVector
+from src.games.crazy_eights.crazy_eights import CrazyEights
+from src.games.crazy_eights.vector import CrazyEightsVector
+from src.games.gin_rummy.gin_rummy import GinRummy
+from src.games.gin_rummy.vector import GinRummyVector
+
+GAMES = {"go_fish": GoFish, "crazy_eights": CrazyEights, "gin_rummy": GinRummy}
+VECTOR_GAMES = {
+    "go_fish": GoFishVector,
+    "crazy_eights": CrazyEightsVector,
+    "gin_rummy": GinRummyVector,
+}
+MAX_DECISIONS = 100  # Same cap as the controller's MAX_TURN_COUNT for two agents
+
+
+def benchmark_decisions(game_cls, n_games: int, seed: int) -> tuple[int, float]:
+    """Play n_games random games, return (decisions, engine seconds)."""
+    rng = random.Random(seed)
+    random.seed(seed)
+    decisions = 0
+    engine_time = 0.0
+    for _ in range(n_games):
+        game = game_cls([0, 1])
+        game.init_game()
+        for _ in range(MAX_DECISIONS):
+            if game.done:
+                break
+            start = time.perf_counter()
+            agent_id = game.current_agent
+            actions = game.get_agent_actions(agent_id)
+            game.get_agent_state(agent_id)
+            mid = time.perf_counter()
+            action = rng.choice(actions)
+            resume = time.perf_counter()
+            assert game.validate_action(agent_id, action)
+            game.step(action)
+            engine_time += (mid - start) + (time.perf_counter() - resume)
+            decisions += 1
+    return decisions, engine_time
+
+
+def _positions(game_cls, n_games: int, seed: int) -> list:
+    """Positions from random games, one every few decisions."""
+    rng = random.Random(seed)
+    positions = []
+    for game_idx in range(n_games):
+        game = game_cls([0, 1], seed=seed + game_idx)
+        game.init_game()
+        for decision in range(MAX_DECISIONS):
+            if game.done:
+                break
+            if decision % 5 == 0:
+                positions.append(game.clone())
+            game.step(rng.choice(game.get_agent_actions(game.current_agent)))
+    return positions
+
+
+def _rate(fn, items) -> float:
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return len(items) / (time.perf_counter() - start)
+
+
+def benchmark_clones(game_cls, n_games: int, seed: int) -> tuple[float, float, float, float]:
+    """
+    Return (clones/s with a given rng, clones/s copying the rng, deepcopies/s, apply+undo
+    pairs/s) over positions from random games.
+    """
+    rng = random.Random(seed)
+    positions = _positions(game_cls, n_games, seed)
+    moves = [(game, rng.choice(game.get_agent_actions(game.current_agent))) for game in positions]
+
+    def apply_undo(move):
+        game, action = move
+        game.apply(action)
+        game.undo()
+
+    return (
+        _rate(lambda game: game.clone(rng=rng), positions),
+        _rate(lambda game: game.clone(), positions),
+        _rate(copy.deepcopy, positions),
+        _rate(apply_undo, moves),
+    )
+
+
+def benchmark_vector(vector_cls, batch_size: int, steps: int, seed: int) -> tuple[float, int]:
+    """Step batch_size random games in lockstep, return (decisions/minute, games completed)."""
+    games = vector_cls(batch_size, seed=seed)
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    for _ in range(steps):
+        legal = games.legal_actions()
+        # Uniform choice among the legal actions of each game
+        games.step((rng.random(legal.shape) * legal).argmax(axis=1))
+    return batch_size * steps * 60 / (time.perf_counter() - start), games.games_completed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark engine time per decision")
+    parser.add_argument("--games", type=int, default=200, help="Games per engine (default: 200)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--only", choices=sorted(GAMES), help="Benchmark a single engine")
+    parser.add_argument(
+        "--batch-size", type=int, default=4096, help="Games per vectorized batch (default: 4096)"
+    )
+    parser.add_argument(
+        "--steps", type=int, default=200, help="Vectorized steps per engine (default: 200)"
+    )
+    args = parser.parse_args()
+
+    print(f"{'Game':<14} {'Decisions':>10} {'us/decision':>12} {'decisions/s':>12}")
+    print("-" * 51)
+    for name, game_cls in GAMES.items():
+        if args.only and name != args.only:
+            continue
+        decisions, engine_time = benchmark_decisions(game_cls, args.games, args.seed)
+        per_decision = engine_time / decisions
+        print(f"{name:<14} {decisions:>10} {per_decision * 1e6:>12.1f} {1 / per_decision:>12.0f}")
+
+    print()
+    print(
+        f"{'Game':<14} {'clones/s':>10} {'+rng copy/s':>12} {'deepcopies/s':>13} "
+        f"{'apply+undo/s':>13}"
+    )
+    print("-" * 66)
+    for name, game_cls in GAMES.items():
+        if args.only and name != args.only:
+            continue
+        clones, rng_clones, deepcopies, apply_undos = benchmark_clones(
+            game_cls, args.games, args.seed
+        )
+        print(
+            f"{name:<14} {clones:>10.0f} {rng_clones:>12.0f} {deepcopies:>13.0f} "
+            f"{apply_undos:>13.0f}"
+        )
+
+    print()
+    print(f"{'Game':<14} {'decisions/min':>14} {'games':>10}")
+    print("-" * 40)
+    for name, vector_cls in VECTOR_GAMES.items():
+        if args.only and name != args.only:
+            continue
+        per_minute, games = benchmark_vector(vector_cls, args.batch_size, args.steps, args.seed)
+        print(f"{name:<14} {per_minute:>14.0f} {games:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ import random
 import re
 from collections import defaultdict
 from dataclasses import dataclass
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 
 from elo_rating import EloRating
 
@@ -17,6 +17,10 @@ class GameResult:
     agent_1_score: float
     event_log: List[str]
     details: str
+    seed: Optional[int] = None
+    timeouts: Optional[List[int]] = None
+    elided_calls: Optional[List[int]] = None
+    agent_stats: Optional[List[dict]] = None
 
 
 @dataclass
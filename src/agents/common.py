@@ -1,6 +1,17 @@
+from collections.abc import Mapping, Sequence
 from dataclasses import dataclass
+import random
 from typing import Any
 
+from src.games.common import DiscreteGame, rng_state, set_rng_state
+
+
+class GameAbortError(Exception):
+    """
+    Raised by an agent that can't go on with the game (e.g. a replayed response is missing). The
+    controller lets it through instead of counting it as an agent error.
+    """
+
 
 @dataclass
 class ActionResponseFormat:
@@ -10,13 +21,57 @@ class ActionResponseFormat:
 
 class DiscreteAgent:
 
-    def __init__(self, agent_id: int, game_name: str, rules: str):
+    # Whether the agent's decisions are CPU-bound (e.g. local search) rather than waiting on I/O.
+    # Used by the hybrid tournament executor to route games to processes or threads.
+    cpu_bound: bool = False
+
+    @classmethod
+    def rate_limit_key(cls, agent_kwargs: dict) -> str | None:
+        """Shared request budget (e.g. model id) the agent draws from, or None if unlimited."""
+        return None
+
+    def __init__(self, agent_id: int, game_name: str, rules: str, rng: random.Random | None = None):
         self.agent_id = agent_id
         self.game_name = game_name
         self.rules = rules
+        # Fall back to the module-level generator when no stream is given
+        self.rng = rng if rng is not None else random
+        # time.monotonic() by which the current get_action must return, when moves are timed.
+        # Agents doing long work (requests, search) should stop by then.
+        self.move_deadline: float | None = None
 
-    def get_action(self, new_events: list[str], state: dict, actions: list[Any]) -> Any:
+    def get_action(self, new_events: Sequence[str], state: Mapping, actions: list[Any]) -> Any:
         pass
 
+    async def get_action_async(
+        self, new_events: Sequence[str], state: Mapping, actions: list[Any]
+    ) -> Any:
+        """
+        Async variant of get_action used by run_discrete_game_async. Agents that wait on I/O should
+        override it; the default runs get_action inline on the event loop.
+        """
+        return self.get_action(new_events, state, actions)
+
+    def set_game(self, game: DiscreteGame):
+        """
+        Called by the controller once the game is set up. Search agents keep it as a forward model
+        and must only look at what their own view allows, e.g. through DiscreteGame.determinize().
+        """
+        pass
+
+    def snapshot(self) -> dict:
+        """Agent state as JSON-compatible data, for checkpoints."""
+        if isinstance(self.rng, random.Random):
+            return {"rng": rng_state(self.rng)}
+        return {}
+
+    def restore(self, snapshot: dict):
+        if "rng" in snapshot:
+            set_rng_state(self.rng, snapshot["rng"])
+
+    def stats(self) -> dict:
+        """Per-game agent statistics (e.g. tokens or simulations), saved with the game result."""
+        return {}
+
     def get_name(self) -> str:
         return f"{self.__class__.__name__}"
@@ -0,0 +1,253 @@
+"""
+Information-set Monte Carlo tree search (single-observer ISMCTS).
+
+Every simulation samples the hidden cards afresh with DiscreteGame.determinize(), walks the shared
+tree with UCB restricted to the actions legal in that sample, then finishes the game with random
+moves. Root-parallel search runs independent trees in worker processes and sums their root visits.
+"""
+
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor, wait
+from dataclasses import dataclass
+import logging
+import math
+import random
+import time
+from typing import Any
+
+from src.agents.common import DiscreteAgent
+from src.games.common import DiscreteGame
+
+logger = logging.getLogger(__name__)
+
+# Random moves after which a rollout is scored as a draw
+MAX_ROLLOUT_STEPS = 200
+# Seconds kept back from the controller's move deadline
+DEADLINE_MARGIN = 0.05
+
+_POOL: ProcessPoolExecutor | None = None
+_POOL_WORKERS = 0
+
+
+@dataclass(frozen=True)
+class SearchStats:
+    simulations: int
+    seconds: float
+    visit_share: float  # Share of the root visits that went to the chosen action
+
+    @property
+    def simulations_per_second(self) -> float:
+        return self.simulations / self.seconds if self.seconds > 0 else 0.0
+
+
+class _Node:
+
+    __slots__ = ("player", "children", "visits", "reward", "available")
+
+    def __init__(self, player: int | None = None):
+        self.player = player  # Agent who chose the action leading here
+        self.children: dict[Any, _Node] = {}
+        self.visits = 0
+        self.reward = 0.0  # Sum of the player's scores over the visits
+        self.available = 0  # Simulations in which the action leading here was legal
+
+
+def _simulate(root: _Node, game: DiscreteGame, rng: random.Random, exploration: float):
+    """One selection, expansion, rollout and backpropagation pass on a determinized game."""
+    node = root
+    path = []
+    while not game.done:
+        player = game.current_agent
+        legal, untried = [], []
+        for action in game.get_agent_actions(player):
+            child = node.children.get(action)
+            if child is None:
+                untried.append(action)
+            else:
+                child.available += 1
+                legal.append((action, child))
+        if untried:
+            action = rng.choice(untried)
+            child = node.children[action] = _Node(player)
+            child.available += 1
+            node = child
+            game.step(action)
+            path.append(node)
+            break
+        action, node = max(
+            legal,
+            key=lambda item: item[1].reward / item[1].visits
+            + exploration * math.sqrt(math.log(item[1].available) / item[1].visits),
+        )
+        game.step(action)
+        path.append(node)
+
+    for _ in range(MAX_ROLLOUT_STEPS):
+        if game.done:
+            break
+        game.step(rng.choice(game.get_agent_actions(game.current_agent)))
+    if game.done:
+        scores = game.get_agent_scores()
+    else:
+        scores = {agent_id: 0.5 for agent_id in game.agent_ids}
+
+    root.visits += 1
+    for node in path:
+        node.visits += 1
+        node.reward += scores[node.player]
+
+
+def search(
+    game: DiscreteGame,
+    observer: int,
+    rng: random.Random,
+    deadline: float,
+    max_simulations: int | None = None,
+    exploration: float = 0.7,
+) -> tuple[dict[Any, int], int]:
+    """
+    Search from ``observer``'s view of ``game`` until ``deadline`` (time.monotonic()) or
+    ``max_simulations``.
+
+    :return: visits per root action, number of simulations
+    """
+    root = _Node()
+    simulations = 0
+    while max_simulations is None or simulations < max_simulations:
+        if time.monotonic() >= deadline:
+            break
+        _simulate(root, game.determinize(observer, rng), rng, exploration)
+        simulations += 1
+    return {action: child.visits for action, child in root.children.items()}, simulations
+
+
+def _search_worker(
+    game_cls: type[DiscreteGame],
+    agent_ids: list[int],
+    snapshot: dict,
+    observer: int,
+    seed: int,
+    seconds: float,
+    max_simulations: int | None,
+    exploration: float,
+) -> tuple[dict[Any, int], int]:
+    """search() in a worker process, on a game rebuilt from its snapshot."""
+    deadline = time.monotonic() + seconds
+    game = game_cls(agent_ids, seed=snapshot["seed"], **snapshot["options"])
+    game.restore(snapshot)
+    return search(game, observer, random.Random(seed), deadline, max_simulations, exploration)
+
+
+def _get_pool(n_workers: int) -> ProcessPoolExecutor:
+    """Process pool shared by the agents of this process, grown to the largest size asked for."""
+    global _POOL, _POOL_WORKERS
+    if _POOL is None or _POOL_WORKERS < n_workers:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False)
+        _POOL = ProcessPoolExecutor(max_workers=n_workers)
+        _POOL_WORKERS = n_workers
+    return _POOL
+
+
+class ISMCTSAgent(DiscreteAgent):
+    """
+    Search agent for any DiscreteGame. It never looks at hidden cards: every simulation plays out
+    a determinization consistent with its own observations.
+    """
+
+    cpu_bound = True
+
+    def __init__(
+        self,
+        agent_id: int,
+        game_name: str,
+        rules: str,
+        rng: random.Random | None = None,
+        time_per_move: float = 1.0,
+        max_simulations: int | None = None,
+        n_workers: int = 1,
+        exploration: float = 0.7,
+    ):
+        """
+        :param time_per_move: search time per decision, capped by the controller's move deadline
+        :param max_simulations: stop each decision after this many simulations (across workers)
+        :param n_workers: processes to search in; above 1, n_workers - 1 trees are searched in a
+            shared process pool alongside the one in this process
+        :param exploration: UCB exploration constant
+        """
+        super().__init__(agent_id, game_name, rules, rng=rng)
+        self.time_per_move = time_per_move
+        self.max_simulations = max_simulations
+        self.n_workers = n_workers
+        self.exploration = exploration
+        self.game: DiscreteGame | None = None
+        self.last_search: SearchStats | None = None
+        self.total_simulations = 0
+        self.total_search_time = 0.0
+
+    def set_game(self, game: DiscreteGame):
+        self.game = game
+
+    def stats(self) -> dict:
+        return {"simulations": self.total_simulations, "search_seconds": self.total_search_time}
+
+    def get_action(self, new_events: Sequence[str], state: Mapping, actions: list[Any]) -> Any:
+        if len(actions) == 1:
+            return actions[0]
+
+        start = time.monotonic()
+        # The search runs on a copy: if the move times out, the controller carries on with the
+        # live game while this call finishes
+        game = self.game.clone()
+        move_deadline = self.move_deadline
+        deadline = start + self.time_per_move
+        if move_deadline is not None:
+            deadline = min(deadline, move_deadline - DEADLINE_MARGIN)
+        max_simulations = self.max_simulations
+        if max_simulations is not None and self.n_workers > 1:
+            max_simulations = math.ceil(max_simulations / self.n_workers)
+
+        futures = []
+        if self.n_workers > 1:
+            snapshot = game.snapshot()
+            pool = _get_pool(self.n_workers - 1)
+            for _ in range(self.n_workers - 1):
+                futures.append(
+                    pool.submit(
+                        _search_worker,
+                        type(game),
+                        game.agent_ids,
+                        snapshot,
+                        self.agent_id,
+                        self.rng.randrange(2**63),
+                        deadline - time.monotonic(),
+                        max_simulations,
+                        self.exploration,
+                    )
+                )
+        visits, simulations = search(
+            game, self.agent_id, self.rng, deadline, max_simulations, self.exploration
+        )
+        # Workers that overran the deadline (e.g. still starting up) are left out
+        done, _ = wait(futures, timeout=max(deadline - time.monotonic(), 0) + DEADLINE_MARGIN)
+        for future in done:
+            worker_visits, worker_simulations = future.result()
+            simulations += worker_simulations
+            for action, n_visits in worker_visits.items():
+                visits[action] = visits.get(action, 0) + n_visits
+
+        best = max(actions, key=lambda action: visits.get(action, 0))
+        seconds = time.monotonic() - start
+        if move_deadline is not None and time.monotonic() > move_deadline:
+            raise TimeoutError(f"ISMCTS agent {self.agent_id} answered after its move deadline")
+        self.last_search = SearchStats(
+            simulations, seconds, visits.get(best, 0) / max(sum(visits.values()), 1)
+        )
+        self.total_simulations += simulations
+        self.total_search_time += seconds
+        logger.debug(
+            f"ISMCTS agent {self.agent_id}: {simulations} simulations in {seconds:.2f}s "
+            f"({self.last_search.simulations_per_second:.0f}/s), chose {best} with "
+            f"{self.last_search.visit_share:.0%} of the visits"
+        )
+        return best
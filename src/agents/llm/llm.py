@@ -1,14 +1,24 @@
+import asyncio
 import json
+from collections import deque
+from collections.abc import Iterable, Mapping, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
 from typing import Any
 import os
 import logging
+import random
+import time
 
 from dotenv import load_dotenv
 
-# Always available base client (declared dependency)
-from openai import OpenAI as BaseOpenAI
+# Always available base clients (declared dependency)
+from openai import AsyncOpenAI as BaseAsyncOpenAI, OpenAI as BaseOpenAI
+from openai import APIConnectionError, InternalServerError, RateLimitError
 
 from src.agents.common import ActionResponseFormat, DiscreteAgent
+from src.agents.llm import rate_limit, response_cache
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -22,22 +32,37 @@ def _env_flag_is_true(name: str) -> bool:
 # Decide which OpenAI client to use based on a simple env flag and availability
 if _env_flag_is_true("ENABLE_LANGFUSE"):
     try:
+        from langfuse.openai import AsyncOpenAI as AsyncOpenAIClient  # type: ignore
         from langfuse.openai import OpenAI as OpenAIClient  # type: ignore
 
         logger.info("Using Langfuse OpenAI client.")
     except ImportError:
         logger.info("Langfuse not installed; using standard OpenAI client.")
         OpenAIClient = BaseOpenAI
+        AsyncOpenAIClient = BaseAsyncOpenAI
 else:
     logger.info("Langfuse disabled; using standard OpenAI client.")
     OpenAIClient = BaseOpenAI
+    AsyncOpenAIClient = BaseAsyncOpenAI
 
 
+# Retries are handled by LLMAgent (backoff, rate limit budgets), not by the client
 CLIENT = OpenAIClient(
     base_url="https://openrouter.ai/api/v1",
     api_key=os.getenv("OPENROUTER_API_KEY"),
+    max_retries=0,
 )
 
+# Shared by every game running on the event loop; connections are pooled per client
+ASYNC_CLIENT = AsyncOpenAIClient(
+    base_url="https://openrouter.ai/api/v1",
+    api_key=os.getenv("OPENROUTER_API_KEY"),
+    max_retries=0,
+)
+
+# Runs the requests of hedged calls made from sync agents
+_HEDGE_POOL = ThreadPoolExecutor(max_workers=64, thread_name_prefix="llm-hedge")
+
 MISTRAL_SMALL_FREE = "mistralai/mistral-small-3.2-24b-instruct:free"
 MISTRAL_SMALL = "mistralai/mistral-small-3.2-24b-instruct"
 QWEN3_14B_FREE = "qwen/qwen3-14b:free"
@@ -45,35 +70,273 @@ OPENAI_GPT_4_1_MINI = "openai/gpt-4.1-mini"
 
 DEFAULT_MODEL = OPENAI_GPT_4_1_MINI
 
+# Providers that only cache prompts at explicit cache_control breakpoints; others (OpenAI, Grok,
+# DeepSeek, ...) cache long prefixes on their own
+CACHE_CONTROL_MODEL_PREFIXES = ("anthropic/", "google/gemini")
+
+# 429s are waited out on the model's budget rather than surfaced as agent errors, up to this many
+MAX_RATE_LIMIT_RETRIES = 10
+# Retries for other transient errors (connection errors, timeouts, 5xx)
+MAX_RETRIES = 4
+# Exponential backoff: the n-th retry waits a random time up to min(BACKOFF_MAX, BACKOFF_BASE * 2^n)
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+
+TRANSIENT_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+
+# Backoff jitter; kept apart from the agents' seeded streams
+_JITTER = random.Random()
+
+
+class _Retries:
+    """Retry bookkeeping for one LLM call. 429s and other transient errors have separate caps."""
+
+    def __init__(self, budget: rate_limit.ModelBudget, deadline: float | None = None):
+        self.budget = budget
+        self.deadline = deadline
+        self.rate_limited = 0
+        self.failed = 0
+
+    def delay(self, error: Exception) -> float:
+        """Seconds to wait before retrying after ``error``; re-raises it once retries run out."""
+        retry_after = rate_limit.retry_after_seconds(error)
+        if isinstance(error, RateLimitError):
+            self.rate_limited += 1
+            if self.rate_limited > MAX_RATE_LIMIT_RETRIES:
+                raise error
+            self.budget.throttle(retry_after)
+            attempt = self.rate_limited
+        else:
+            self.failed += 1
+            if self.failed > MAX_RETRIES:
+                raise error
+            attempt = self.failed
+        if retry_after is None:
+            retry_after = _JITTER.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)))
+        # No point retrying after the move's time is up
+        if self.deadline is not None and time.monotonic() + retry_after >= self.deadline:
+            raise error
+        logger.debug(f"Retrying LLM request in {retry_after:.1f}s after {type(error).__name__}")
+        return retry_after
+
+
+@dataclass(frozen=True)
+class ContextPolicy:
+    """
+    How much of the conversation LLMAgent resends with every request.
+
+    By default the window slides by one turn per move, so the digest and the oldest turn change
+    on every request. With ``slide_turns`` above 1, turns move to the digest in blocks: between
+    slides each request extends the previous one and the prompt cache can serve it.
+    """
+
+    max_turns: int | None = None  # Past turns resent in full, None for the whole game
+    keep_thoughts: bool = True  # Whether past responses are resent with their "thoughts"
+    summary_events: int = 0  # Events of turns dropped from the window kept as a digest
+    slide_turns: int = 1  # Turns moved to the digest at once when the window overflows
+
+    def __post_init__(self):
+        if self.max_turns is not None and self.max_turns < 0:
+            raise ValueError(f"max_turns can't be negative: {self.max_turns}")
+        if self.slide_turns < 1:
+            raise ValueError(f"slide_turns must be at least 1: {self.slide_turns}")
+        if self.summary_events < 0:
+            raise ValueError(f"summary_events can't be negative: {self.summary_events}")
+
+
+def _drop_thoughts(message: dict) -> dict:
+    """Assistant message with the "thoughts" left out of its JSON answer, when it parses."""
+    try:
+        answer = json.loads(LLMAgent._clean_json(message.get("content") or ""))
+    except ValueError:
+        return message
+    if not isinstance(answer, dict) or "thoughts" not in answer:
+        return message
+    answer.pop("thoughts")
+    return {**message, "content": json.dumps(answer)}
+
+
+def _cached_tokens(usage) -> int:
+    details = usage.prompt_tokens_details
+    return (details.cached_tokens or 0) if details is not None else 0
+
+
+def _json_default(value: Any) -> Any:
+    """Cards render as their short names, hands and other card collections as lists."""
+    if isinstance(value, Iterable) and not isinstance(value, str):
+        return list(value)
+    return str(value)
+
+
+def render_state(state: Mapping) -> str:
+    """Agent state as JSON, with fields in the game's order so equal states render identically."""
+    return json.dumps(dict(state.items()), default=_json_default, ensure_ascii=False)
+
+
+def _first_success(futures: list[Future]) -> Future:
+    """Wait for the first future that succeeds, or the last one to fail."""
+    pending = set(futures)
+    while True:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future
+        if not pending:
+            return done.pop()
+
 
 class LLMAgent(DiscreteAgent):
 
-    def __init__(self, agent_id: int, game_name: str, rules: str, model_id: str = DEFAULT_MODEL):
-        super().__init__(agent_id, game_name, rules)
+    def __init__(
+        self,
+        agent_id: int,
+        game_name: str,
+        rules: str,
+        model_id: str = DEFAULT_MODEL,
+        rng: random.Random | None = None,
+        hedge_percentile: float | None = None,
+        context: ContextPolicy | None = None,
+        cache_control: bool | None = None,
+    ):
+        """
+        :param hedge_percentile: if set (e.g. 0.95), send a second identical request when the
+            first is slower than this percentile of the model's recent latencies, and use
+            whichever answers first
+        :param context: how much of the conversation to resend (default: all of it)
+        :param cache_control: mark the system prompt as a prompt cache breakpoint (default: for
+            models in CACHE_CONTROL_MODEL_PREFIXES)
+        """
+        super().__init__(agent_id, game_name, rules, rng)
+        if hedge_percentile is not None and not 0 < hedge_percentile < 1:
+            raise ValueError(f"hedge_percentile must be between 0 and 1: {hedge_percentile}")
+        # The system prompt only depends on the game, so every agent of a model shares it as a
+        # cached prefix; everything specific to the agent or the turn comes after it
         with open(f"src/agents/llm/system_prompt_template.txt", "r") as f:
             system_prompt_template = f.read()
-            self.system_prompt = system_prompt_template.format(
-                game_name=game_name, rules=rules, agent_id=agent_id
-            )
+            self.system_prompt = system_prompt_template.format(game_name=game_name, rules=rules)
+        with open(f"src/agents/llm/agent_prompt_template.txt", "r") as f:
+            self.agent_prompt = f.read().format(agent_id=agent_id)
         with open(f"src/agents/llm/user_prompt_template.txt", "r") as f:
             self.user_prompt_template = f.read()
         self.model_id = model_id
+        self.hedge_percentile = hedge_percentile
+        self.context = context if context is not None else ContextPolicy()
+        if cache_control is None:
+            cache_control = model_id.startswith(CACHE_CONTROL_MODEL_PREFIXES)
+        self.cache_control = cache_control
+        self.prompt_tokens: list[int] = []  # Per call, as reported by the provider
+        self.cached_tokens = 0  # Prompt tokens read from the provider's prompt cache
+        self.completion_tokens = 0
         self.init_messages()
 
+    @classmethod
+    def rate_limit_key(cls, agent_kwargs: dict) -> str | None:
+        return agent_kwargs.get("model_id", DEFAULT_MODEL)
+
     def get_name(self) -> str:
         return f"LLMAgent_{self.model_id}"
 
     def init_messages(self):
         self.messages = [{"role": "system", "content": self.system_prompt}]
+        # Events of each turn still in the window, and the digest of older ones
+        self.turn_events: list[list[str]] = []
+        self.summary: deque[str] = deque(maxlen=self.context.summary_events)
+
+    def snapshot(self) -> dict:
+        return {
+            **super().snapshot(),
+            "messages": list(self.messages),
+            "turn_events": list(self.turn_events),
+            "summary": list(self.summary),
+            "prompt_tokens": list(self.prompt_tokens),
+            "cached_tokens": self.cached_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+    def restore(self, snapshot: dict):
+        super().restore(snapshot)
+        self.messages = list(snapshot["messages"])
+        self.turn_events = list(snapshot.get("turn_events", []))
+        self.summary.clear()
+        self.summary.extend(snapshot.get("summary", []))
+        self.prompt_tokens = list(snapshot.get("prompt_tokens", []))
+        self.cached_tokens = snapshot.get("cached_tokens", 0)
+        self.completion_tokens = snapshot.get("completion_tokens", 0)
 
-    def build_user_prompt(self, new_events: list[str], state: dict, actions: list[Any]) -> str:
+    def stats(self) -> dict:
+        return {
+            "calls": len(self.prompt_tokens),
+            "prompt_tokens": sum(self.prompt_tokens),
+            "max_prompt_tokens": max(self.prompt_tokens, default=0),
+            "cached_tokens": self.cached_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+    def _next_context(
+        self, new_events: Sequence[str], user_prompt: str
+    ) -> tuple[list[dict], list[list[str]], deque[str]]:
+        """
+        Messages, turn events and digest once a turn is added, with the window slid (see
+        ContextPolicy) if it overflows. The agent keeps its own until the answer is committed.
+        """
+        messages = [*self.messages, {"role": "user", "content": user_prompt}]
+        turn_events = [*self.turn_events, list(new_events)]
+        summary = self.summary
+        if self.context.max_turns is None:
+            return messages, turn_events, summary
+        starts = [i for i, message in enumerate(messages) if message["role"] == "user"]
+        # The last user message is the current turn
+        n_past = len(starts) - 1
+        if n_past <= self.context.max_turns:
+            return messages, turn_events, summary
+        n_dropped = min(n_past - self.context.max_turns - 1 + self.context.slide_turns, n_past)
+        summary = deque(summary, maxlen=summary.maxlen)
+        for events in turn_events[:n_dropped]:
+            summary.extend(events)
+        return messages[:1] + messages[starts[n_dropped] :], turn_events[n_dropped:], summary
+
+    def _commit(self, context: tuple, response, deadline: float | None) -> str:
+        """
+        Take on the turn's conversation and answer, unless the move's deadline has passed: the
+        controller has then moved on without this answer, and the agent must not keep it.
+        """
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError(f"{self.get_name()} answered after its move deadline")
+        self.messages, self.turn_events, self.summary = context
+        return self._add_response(response)
+
+    def _add_response(self, response) -> str:
+        """Record the assistant's answer and the call's token usage, return the answer."""
+        response_message = response.choices[0].message
+        # Kept as a plain dict so the conversation can be checkpointed
+        message = response_message.model_dump(exclude_none=True)
+        if not self.context.keep_thoughts:
+            message = _drop_thoughts(message)
+        self.messages.append(message)
+
+        usage = response.usage
+        if usage is not None:
+            cached_tokens = _cached_tokens(usage)
+            self.prompt_tokens.append(usage.prompt_tokens)
+            self.cached_tokens += cached_tokens
+            self.completion_tokens += usage.completion_tokens
+            logger.debug(
+                f"{self.get_name()} (agent {self.agent_id}): {usage.prompt_tokens} prompt tokens "
+                f"({cached_tokens} cached), {len(self.messages)} messages"
+            )
+        return response_message.content
+
+    def build_user_prompt(
+        self, new_events: Sequence[str], state: Mapping, actions: list[Any]
+    ) -> str:
         actions_formatted = "\n".join([f"{i}: {action}" for i, action in enumerate(actions)])
         events_formatted = "\n".join([f"{i}: {event}" for i, event in enumerate(new_events)])
         return self.user_prompt_template.format(
-            events=events_formatted, state=state, actions=actions_formatted
+            events=events_formatted, state=render_state(state), actions=actions_formatted
         )
 
-    def _clean_json(self, content: str) -> str:
+    @staticmethod
+    def _clean_json(content: str) -> str:
         """Strip optional markdown code fences (``` or ```json) from the model response."""
         content = content.strip()
         if content.startswith("```"):
@@ -84,17 +347,190 @@ class LLMAgent(DiscreteAgent):
                 content = "\n".join(content.split("\n")[:-1])
         return content.strip()
 
-    def invoke_llm(self, user_prompt: str) -> str:
-        self.messages.append({"role": "user", "content": user_prompt})
-        response = CLIENT.chat.completions.create(
-            model=self.model_id,
-            messages=self.messages,
-            response_format={"type": "json_object"},
-        )
-        response_message = response.choices[0].message
-        self.messages.append(response_message)
-        raw_content = response_message.content
-        return raw_content
+    def _request(
+        self, messages: list[dict] | None = None, summary: Sequence[str] | None = None
+    ) -> dict:
+        """
+        Messages from the most to the least stable: the system prompt shared by every agent of
+        the game, this agent's seat, the digest of turns out of the window, then the turns. With
+        the whole game in context each request extends the previous one; with a window, only
+        until the window next slides.
+        """
+        if messages is None:
+            messages, summary = self.messages, self.summary
+        system = messages[0]
+        if self.cache_control:
+            text = {
+                "type": "text",
+                "text": system["content"],
+                "cache_control": {"type": "ephemeral"},
+            }
+            system = {"role": "system", "content": [text]}
+        layout = [system, {"role": "system", "content": self.agent_prompt}]
+        if summary:
+            digest = "\n".join(summary)
+            layout.append({"role": "user", "content": f"**Events of earlier turns**\n{digest}"})
+        layout.extend(messages[1:])
+        return {
+            "model": self.model_id,
+            "messages": layout,
+            "response_format": {"type": "json_object"},
+            # Asks OpenRouter for detailed usage, including cached prompt tokens
+            "extra_body": {"usage": {"include": True}},
+        }
+
+    @staticmethod
+    def _request_options(deadline: float | None) -> dict:
+        """Client options for one request; caps it at the move deadline when moves are timed."""
+        if deadline is None:
+            return {}
+        return {"timeout": max(deadline - time.monotonic(), 0.001)}
+
+    def _hedge_after(self, budget: rate_limit.ModelBudget) -> float | None:
+        if self.hedge_percentile is None:
+            return None
+        return budget.latency_percentile(self.hedge_percentile)
+
+    def _send(self, budget: rate_limit.ModelBudget, request: dict, deadline: float | None):
+        """Issue one request on a budget slot that is already acquired."""
+        try:
+            start = time.monotonic()
+            response = CLIENT.chat.completions.create(**request, **self._request_options(deadline))
+            budget.record_latency(time.monotonic() - start)
+            return response
+        finally:
+            budget.release()
+
+    def _create(self, budget: rate_limit.ModelBudget, request: dict, deadline: float | None):
+        budget.acquire(deadline)
+        hedge_after = self._hedge_after(budget)
+        if hedge_after is None:
+            return self._send(budget, request, deadline)
+
+        primary = _HEDGE_POOL.submit(self._send, budget, request, deadline)
+        try:
+            return primary.result(timeout=hedge_after)
+        except FutureTimeoutError:
+            pass
+        # Hedges only use spare budget, never wait for it, and aren't sent past the deadline
+        if (deadline is not None and time.monotonic() >= deadline) or not budget.try_acquire():
+            return primary.result()
+        hedge = _HEDGE_POOL.submit(self._send, budget, request, deadline)
+        # The slower request can't be cancelled from here; its result is dropped
+        future = _first_success([primary, hedge])
+        budget.record_hedge(won=future is hedge)
+        return future.result()
+
+    def _complete(self, request: dict, deadline: float | None = None):
+        """
+        Response to ``request``, from the response cache if one is configured and has it.
+
+        :param deadline: the move's deadline (time.monotonic()), past which no request is retried
+        """
+        cache = response_cache.get_cache()
+        if cache is not None:
+            response = cache.lookup(request)
+            if response is not None:
+                return response
+        budget = rate_limit.get_budget(self.model_id)
+        retries = _Retries(budget, deadline)
+        while True:
+            try:
+                response = self._create(budget, request, deadline)
+                break
+            except TRANSIENT_ERRORS as e:
+                time.sleep(retries.delay(e))
+        if response.usage is not None:
+            budget.record_tokens(
+                response.usage.prompt_tokens,
+                response.usage.completion_tokens,
+                _cached_tokens(response.usage),
+            )
+        if cache is not None:
+            cache.store(request, response)
+        return response
+
+    def invoke_llm(self, user_prompt: str, new_events: Sequence[str] = ()) -> str:
+        # Read once and passed down to every retry and request: a call still running after its
+        # move timed out must not pick up the next move's deadline
+        deadline = self.move_deadline
+        context = messages, _, summary = self._next_context(new_events, user_prompt)
+        response = self._complete(self._request(messages, summary), deadline)
+        return self._commit(context, response, deadline)
+
+    async def _send_async(
+        self, budget: rate_limit.ModelBudget, request: dict, deadline: float | None
+    ):
+        try:
+            start = time.monotonic()
+            response = await ASYNC_CLIENT.chat.completions.create(
+                **request, **self._request_options(deadline)
+            )
+            budget.record_latency(time.monotonic() - start)
+            return response
+        finally:
+            budget.release()
+
+    async def _create_async(
+        self, budget: rate_limit.ModelBudget, request: dict, deadline: float | None
+    ):
+        await budget.acquire_async(deadline)
+        hedge_after = self._hedge_after(budget)
+        if hedge_after is None:
+            return await self._send_async(budget, request, deadline)
+
+        primary = asyncio.ensure_future(self._send_async(budget, request, deadline))
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done or (deadline is not None and time.monotonic() >= deadline):
+            return await primary
+        if not budget.try_acquire():
+            return await primary
+        hedge = asyncio.ensure_future(self._send_async(budget, request, deadline))
+        pending = {primary, hedge}
+        try:
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        budget.record_hedge(won=task is hedge)
+                        return task.result()
+                if not pending:
+                    budget.record_hedge(won=False)
+                    return done.pop().result()
+        finally:
+            # Cancel the slower request
+            for task in pending:
+                task.cancel()
+
+    async def _complete_async(self, request: dict, deadline: float | None = None):
+        cache = response_cache.get_cache()
+        if cache is not None:
+            response = cache.lookup(request)
+            if response is not None:
+                return response
+        budget = rate_limit.get_budget(self.model_id)
+        retries = _Retries(budget, deadline)
+        while True:
+            try:
+                response = await self._create_async(budget, request, deadline)
+                break
+            except TRANSIENT_ERRORS as e:
+                await asyncio.sleep(retries.delay(e))
+        if response.usage is not None:
+            budget.record_tokens(
+                response.usage.prompt_tokens,
+                response.usage.completion_tokens,
+                _cached_tokens(response.usage),
+            )
+        if cache is not None:
+            cache.store(request, response)
+        return response
+
+    async def invoke_llm_async(self, user_prompt: str, new_events: Sequence[str] = ()) -> str:
+        deadline = self.move_deadline
+        context = messages, _, summary = self._next_context(new_events, user_prompt)
+        response = await self._complete_async(self._request(messages, summary), deadline)
+        return self._commit(context, response, deadline)
 
     def parse_action_response(self, raw_content: str) -> ActionResponseFormat:
         try:
@@ -104,9 +540,19 @@ class LLMAgent(DiscreteAgent):
             logger.debug(f"Error parsing LLM response: {raw_content}")
             raise ValueError(f"Error parsing LLM response: {raw_content}")
 
-    def get_action(self, new_events: list[str], state: dict, actions: list[Any]) -> Any:
+    def get_action(self, new_events: Sequence[str], state: Mapping, actions: list[Any]) -> Any:
+        user_prompt = self.build_user_prompt(new_events, state, actions)
+        raw_content = self.invoke_llm(user_prompt, new_events)
+        return self.select_action(raw_content, actions)
+
+    async def get_action_async(
+        self, new_events: Sequence[str], state: Mapping, actions: list[Any]
+    ) -> Any:
         user_prompt = self.build_user_prompt(new_events, state, actions)
-        raw_content = self.invoke_llm(user_prompt)
+        raw_content = await self.invoke_llm_async(user_prompt, new_events)
+        return self.select_action(raw_content, actions)
+
+    def select_action(self, raw_content: str, actions: list[Any]) -> Any:
         response = self.parse_action_response(raw_content)
         if (
             not isinstance(response.action_index, int)
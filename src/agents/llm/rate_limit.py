@@ -0,0 +1,238 @@
+"""
+Per-model request budgets shared by every LLMAgent in the process.
+
+Each model_id can be given a token bucket (a sustained request rate with a burst allowance) and a
+cap on requests in flight. Limits are set once per tournament with configure_rate_limits; models
+without limits are never throttled. Budgets also keep a window of recent request latencies, used
+to decide when to hedge a slow request.
+"""
+
+from collections import deque
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# How often a request waiting for an in-flight slot checks again (seconds)
+IN_FLIGHT_POLL_INTERVAL = 0.05
+# Pause applied to a model after a 429 without a Retry-After header (seconds)
+DEFAULT_THROTTLE = 1.0
+# Recent latencies kept per model, and how many are needed before percentiles are reported
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+
+@dataclass(frozen=True)
+class ModelLimits:
+    requests_per_minute: float | None = None  # Sustained request rate, None for unlimited
+    burst: int = 1  # Requests that can be issued back to back when the bucket is full
+    # Concurrent requests to the model, and concurrent games using it (see ModelBudget)
+    max_in_flight: int | None = None
+
+    def __post_init__(self):
+        if self.requests_per_minute is not None and self.requests_per_minute <= 0:
+            raise ValueError(f"requests_per_minute must be positive: {self.requests_per_minute}")
+        if self.burst < 1:
+            raise ValueError(f"burst must be at least 1: {self.burst}")
+        if self.max_in_flight is not None and self.max_in_flight < 1:
+            raise ValueError(f"max_in_flight must be at least 1: {self.max_in_flight}")
+
+
+class ModelBudget:
+    """
+    Token bucket and in-flight counters for one model.
+
+    Call acquire() (or acquire_async()) before each request, which waits until the budget allows
+    it, and release() once it has finished.
+
+    ``max_in_flight`` caps both requests and games. A game sends one request at a time, so a game
+    holding a game slot always finds a free request slot and never waits on other games. Hedged
+    requests only use request slots left spare by the games.
+    """
+
+    def __init__(self, limits: ModelLimits):
+        self.limits = limits
+        self._lock = threading.Lock()
+        self._tokens = float(limits.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self.in_flight = 0
+        self.games_in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.wait_time = 0.0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def _reserve(self) -> float:
+        """Take a request slot if the budget allows it, else return the seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            if (
+                self.limits.max_in_flight is not None
+                and self.in_flight >= self.limits.max_in_flight
+            ):
+                return IN_FLIGHT_POLL_INTERVAL
+            if self.limits.requests_per_minute is not None:
+                rate = self.limits.requests_per_minute / 60
+                self._tokens = min(self.limits.burst, self._tokens + (now - self._updated) * rate)
+                self._updated = now
+                if self._tokens < 1:
+                    return (1 - self._tokens) / rate
+                self._tokens -= 1
+            self.in_flight += 1
+            self.requests += 1
+            return 0.0
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def try_acquire(self) -> bool:
+        """Take a request slot only if one is available right now."""
+        return self._reserve() == 0
+
+    def _wait_time(self, deadline: float | None) -> float:
+        """Seconds to wait before trying again, 0 once a slot is taken."""
+        wait = self._reserve()
+        if wait > 0 and deadline is not None:
+            now = time.monotonic()
+            if now >= deadline:
+                raise TimeoutError("Move deadline passed while waiting on the model's budget")
+            wait = min(wait, deadline - now)
+        return wait
+
+    def acquire(self, deadline: float | None = None):
+        """
+        Wait for a request slot.
+
+        :param deadline: time.monotonic() after which to stop waiting
+        :raises TimeoutError: if the deadline passes first
+        """
+        start = time.monotonic()
+        try:
+            while (wait := self._wait_time(deadline)) > 0:
+                time.sleep(wait)
+        finally:
+            self._record_wait(time.monotonic() - start)
+
+    async def acquire_async(self, deadline: float | None = None):
+        start = time.monotonic()
+        try:
+            while (wait := self._wait_time(deadline)) > 0:
+                await asyncio.sleep(wait)
+        finally:
+            self._record_wait(time.monotonic() - start)
+
+    def _record_wait(self, seconds: float):
+        with self._lock:
+            self.wait_time += seconds
+
+    def throttle(self, retry_after: float | None = None):
+        """Hold back every request to this model after the provider answered with a 429."""
+        with self._lock:
+            self.throttled += 1
+            delay = retry_after if retry_after is not None else DEFAULT_THROTTLE
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+
+    def record_latency(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def latency_percentile(self, q: float) -> float | None:
+        """Latency under which a fraction ``q`` of recent requests finished (None if too few)."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if len(latencies) < MIN_LATENCY_SAMPLES:
+            return None
+        return latencies[int(q * (len(latencies) - 1))]
+
+    def record_tokens(self, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0):
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.cached_tokens += cached_tokens
+            self.completion_tokens += completion_tokens
+
+    def record_hedge(self, won: bool):
+        with self._lock:
+            self.hedged += 1
+            self.hedge_wins += won
+
+    def has_game_slot(self) -> bool:
+        return self.limits.max_in_flight is None or self.games_in_flight < self.limits.max_in_flight
+
+
+_BUDGETS: dict[str, ModelBudget] = {}
+_BUDGETS_LOCK = threading.Lock()
+
+
+def configure_rate_limits(limits: Mapping[str, ModelLimits]):
+    """Replace the per-model limits. Models not listed are unlimited."""
+    with _BUDGETS_LOCK:
+        _BUDGETS.clear()
+        for model_id, model_limits in limits.items():
+            _BUDGETS[model_id] = ModelBudget(model_limits)
+
+
+def get_budget(model_id: str) -> ModelBudget:
+    with _BUDGETS_LOCK:
+        budget = _BUDGETS.get(model_id)
+        if budget is None:
+            budget = _BUDGETS[model_id] = ModelBudget(ModelLimits())
+        return budget
+
+
+def try_start_game(model_ids: Iterable[str]) -> bool:
+    """
+    Claim a game slot on every model the game uses, only if all of them have one free.
+
+    A game issues one request at a time, so holding a game slot guarantees a request slot.
+    """
+    budgets = [get_budget(model_id) for model_id in set(model_ids)]
+    with _BUDGETS_LOCK:
+        if not all(budget.has_game_slot() for budget in budgets):
+            return False
+        for budget in budgets:
+            budget.games_in_flight += 1
+        return True
+
+
+def finish_game(model_ids: Iterable[str]):
+    budgets = [get_budget(model_id) for model_id in set(model_ids)]
+    with _BUDGETS_LOCK:
+        for budget in budgets:
+            budget.games_in_flight -= 1
+
+
+def retry_after_seconds(error: Exception) -> float | None:
+    """Delay requested by the provider's Retry-After header, if the error carries one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def log_rate_limit_stats():
+    with _BUDGETS_LOCK:
+        budgets = dict(_BUDGETS)
+    for model_id, budget in budgets.items():
+        if budget.requests:
+            logger.info(
+                f"{model_id}: {budget.requests} requests, {budget.throttled} throttled, "
+                f"{budget.wait_time:.1f}s waiting for budget, "
+                f"{budget.hedged} hedged ({budget.hedge_wins} won by the hedge), "
+                f"{budget.prompt_tokens} prompt ({budget.cached_tokens} cached) and "
+                f"{budget.completion_tokens} completion tokens"
+            )
@@ -0,0 +1,143 @@
+"""
+On-disk cache of LLM responses shared by every LLMAgent in the process, keyed by a hash of the
+request (model id, messages and request parameters).
+
+Modes:
+- "record": always query the provider, storing (or replacing) the response
+- "replay": answer from the cache only; a request that isn't cached raises CacheMissError
+- "read_through": answer from the cache when possible, query and store otherwise
+
+Identical requests get the identical response, so a tournament recorded with per-game seeds can be
+replayed end to end without network access. Responses live in one SQLite file, which the threads
+and worker processes of a tournament can share.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from openai.types.chat import ChatCompletion
+
+from src.agents.common import GameAbortError
+
+logger = logging.getLogger(__name__)
+
+MODES = ("record", "replay", "read_through")
+
+# Seconds a writer waits for another process holding the database lock
+SQLITE_TIMEOUT = 30.0
+
+
+class CacheMissError(GameAbortError):
+    """A request was not found in a cache in replay mode."""
+
+
+def request_key(request: dict) -> str:
+    """Hash of a chat completion request, independent of dict ordering."""
+    encoded = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite table of responses by request key.
+
+    :param path: database file, created if missing
+    :param mode: one of MODES
+    """
+
+    def __init__(self, path: str, mode: str = "read_through"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}, expected one of {MODES}")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+        self._pid: int | None = None
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection can't be used across a fork, so each process opens its own
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, model TEXT, response TEXT, created REAL)"
+            )
+            connection.commit()
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def lookup(self, request: dict) -> ChatCompletion | None:
+        """
+        Cached response to ``request``, or None if the provider should be queried.
+
+        :raises CacheMissError: in replay mode, when the request isn't cached
+        """
+        if self.mode == "record":
+            return None
+        key = request_key(request)
+        with self._lock:
+            row = (
+                self._connect()
+                .execute("SELECT response FROM responses WHERE key = ?", (key,))
+                .fetchone()
+            )
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if row is not None:
+            return ChatCompletion.model_validate_json(row[0])
+        if self.mode == "replay":
+            raise CacheMissError(f"No cached response for {request['model']} request {key[:12]}")
+        return None
+
+    def store(self, request: dict, response: ChatCompletion):
+        key = request_key(request)
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, request["model"], response.model_dump_json(), time.time()),
+            )
+            connection.commit()
+            self.stored += 1
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+
+_CACHE: ResponseCache | None = None
+
+
+def configure_response_cache(path: str | None, mode: str = "read_through"):
+    """Use the cache at ``path`` for every LLM request in this process, or no cache if None."""
+    global _CACHE
+    if _CACHE is not None:
+        _CACHE.close()
+    _CACHE = ResponseCache(path, mode) if path is not None else None
+
+
+def get_cache() -> ResponseCache | None:
+    return _CACHE
+
+
+def log_cache_stats():
+    if _CACHE is not None:
+        logger.info(
+            f"Response cache {_CACHE.path} ({_CACHE.mode}): {_CACHE.hits} hits, "
+            f"{_CACHE.misses} misses, {_CACHE.stored} responses stored"
+        )
@@ -1,4 +1,4 @@
-import random
+from collections.abc import Mapping, Sequence
 from typing import Any
 
 from src.agents.common import DiscreteAgent
@@ -6,5 +6,7 @@ from src.agents.common import DiscreteAgent
 
 class RandomAgent(DiscreteAgent):
 
-    def get_action(self, new_events: list[str], state: dict, actions: list[Any]) -> Any:
-        return random.choice(actions)
+    cpu_bound = True
+
+    def get_action(self, new_events: Sequence[str], state: Mapping, actions: list[Any]) -> Any:
+        return self.rng.choice(actions)
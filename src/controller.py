@@ -2,44 +2,177 @@ import logging
 import datetime as dt
 import json
 import os
+import asyncio
+import random
+import time
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Generator
 
-from src.games.common import DiscreteGame, GameResult
-from src.agents.common import DiscreteAgent
+from src.games.common import MAX_TURN_COUNT, DiscreteGame, GameResult, derive_seed
+from src.agents.common import DiscreteAgent, GameAbortError
 
 logger = logging.getLogger(__name__)
 
 MAX_ERROR_COUNT = 3
-MAX_TURN_COUNT = 50
 
 
-def run_discrete_game(
+# A move rule returns the action to play for an agent without asking it, or None to ask the agent
+MoveRule = Callable[[DiscreteGame, int, list[Any]], Any | None]
+
+
+class MoveTimeoutError(TimeoutError):
+    """An agent did not return its action within the time budget."""
+
+
+def forced_move(game: DiscreteGame, agent_id: int, actions: list[Any]) -> Any | None:
+    """Move rule playing the only legal action, when there is just one."""
+    return actions[0] if len(actions) == 1 else None
+
+
+def _auto_move(
+    move_rules: Sequence[MoveRule], game: DiscreteGame, agent_id: int, actions: list[Any]
+) -> Any | None:
+    for rule in move_rules:
+        action = rule(game, agent_id, actions)
+        if action is not None:
+            return action
+    return None
+
+
+def _move_timeouts(move_timeout: float | Sequence[float | None] | None) -> list[float | None]:
+    if move_timeout is None or isinstance(move_timeout, (int, float)):
+        return [move_timeout, move_timeout]
+    return list(move_timeout)
+
+
+class Checkpoint:
+    """
+    Checkpoint file of one game in progress: the game and agent snapshots plus the controller's
+    own bookkeeping. Written every ``every`` turns and removed once the game is over.
+    """
+
+    def __init__(self, path: str, every: int = 1):
+        if every < 1:
+            raise ValueError(f"Checkpoint interval must be at least 1 turn: {every}")
+        self.path = path
+        self.every = every
+
+    def load(self) -> dict | None:
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def save(self, game: DiscreteGame, agents: list[DiscreteAgent], progress: dict):
+        data = {
+            "game": game.snapshot(),
+            "agents": [agent.snapshot() for agent in agents],
+            "progress": progress,
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.path}.tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _init_game(
     game_cls: type[DiscreteGame],
     agents_0_cls: type[DiscreteAgent],
     agents_1_cls: type[DiscreteAgent],
-    agent_0_kwargs: dict = {},
-    agent_1_kwargs: dict = {},
-    log_events: bool = False,
-) -> GameResult:
-    """
-    Run a discrete game between exactly two agents.
-    """
-    # Initialisation
+    agent_0_kwargs: dict,
+    agent_1_kwargs: dict,
+    log_events: bool,
+    seed: int | None,
+    checkpoint: Checkpoint | None = None,
+) -> tuple[DiscreteGame, list[DiscreteAgent], dict | None]:
+    """Set up a new game, or the game saved in ``checkpoint`` if there is one."""
     agent_ids = [0, 1]
-    game = game_cls(agent_ids, log_events)
+    game = game_cls(agent_ids, log_events, seed=seed)
     game.init_game()
-    agent_0 = agents_0_cls(0, game.game_name, game.rules, **agent_0_kwargs)
-    agent_1 = agents_1_cls(1, game.game_name, game.rules, **agent_1_kwargs)
+    agent_0 = agents_0_cls(
+        0,
+        game.game_name,
+        game.rules,
+        rng=random.Random(derive_seed(game.seed, "agent", 0)),
+        **agent_0_kwargs,
+    )
+    agent_1 = agents_1_cls(
+        1,
+        game.game_name,
+        game.rules,
+        rng=random.Random(derive_seed(game.seed, "agent", 1)),
+        **agent_1_kwargs,
+    )
     agents = [agent_0, agent_1]
+    for agent in agents:
+        agent.set_game(game)
+
+    saved = checkpoint.load() if checkpoint is not None else None
+    if saved is None:
+        return game, agents, None
+    game.restore(saved["game"])
+    for agent, snapshot in zip(agents, saved["agents"]):
+        agent.restore(snapshot)
+    logger.info(f"Resuming {game.game_name} from checkpoint {checkpoint.path}")
+    return game, agents, saved["progress"]
+
+
+def _play(
+    game: DiscreteGame,
+    agents: list[DiscreteAgent],
+    move_timeout: float | Sequence[float | None] | None = None,
+    game_timeout: float | None = None,
+    checkpoint: Checkpoint | None = None,
+    progress: dict | None = None,
+    move_rules: Sequence[MoveRule] = (),
+) -> Generator[tuple[DiscreteAgent, tuple, float | None], Any, GameResult]:
+    """
+    Game loop shared by the sync and async controllers.
+
+    Yields ``(agent, get_action args, timeout)`` for every decision. The driver sends back the
+    chosen action, or throws in the exception raised by the agent (MoveTimeoutError if it ran out
+    of time). ``progress`` is the loop state saved with a checkpoint, when resuming. Moves picked
+    by ``move_rules`` are played without yielding.
+    """
+    agent_0, agent_1 = agents
+    move_timeouts = _move_timeouts(move_timeout)
+    game_deadline = time.monotonic() + game_timeout if game_timeout is not None else None
+    agent_timeouts = [0] * game.num_agents
 
     # Keep track of which events have been pushed to the agent
-    agent_event_idxs = {agent_id: 0 for agent_id in agent_ids}
-    agent_error_counts = {agent_id: 0 for agent_id in agent_ids}
+    agent_event_cursors = {agent_id: game.event_log.cursor() for agent_id in game.agent_ids}
+    agent_error_counts = {agent_id: 0 for agent_id in game.agent_ids}
+    elided_calls = [0] * game.num_agents
+    turn_count = 0
+    if progress is not None:
+        for agent_id in game.agent_ids:
+            agent_event_cursors[agent_id].position = progress["cursors"][agent_id]
+            agent_error_counts[agent_id] = progress["errors"][agent_id]
+        agent_timeouts = progress["timeouts"]
+        elided_calls = progress.get("elided_calls", elided_calls)
+        turn_count = progress["turn_count"]
+
+    def save_checkpoint():
+        if checkpoint is not None and turn_count % checkpoint.every == 0 and not game.done:
+            progress = {
+                "turn_count": turn_count,
+                "cursors": [agent_event_cursors[agent_id].position for agent_id in game.agent_ids],
+                "errors": [agent_error_counts[agent_id] for agent_id in game.agent_ids],
+                "timeouts": agent_timeouts,
+                "elided_calls": elided_calls,
+            }
+            checkpoint.save(game, agents, progress)
 
     # Play!
     logger.info(
         f"Playing {game.game_name} between {agent_0.get_name()} and {agent_1.get_name()}..."
     )
-    turn_count = 0
     while not game.done:
         turn_count += 1
         if turn_count >= MAX_TURN_COUNT * game.num_agents:
@@ -51,21 +184,59 @@ def run_discrete_game(
                 agent_1_score=0.5,
                 event_log=game.event_log.events,
                 details=f"Game ended in draw after reaching max turn count ({MAX_TURN_COUNT})",
+                seed=game.seed,
+                timeouts=agent_timeouts,
+                elided_calls=elided_calls,
+                agent_stats=[agent.stats() for agent in agents],
             )
 
         # Gather info
         current_agent = game.current_agent
-        new_events = game.event_log.get_events_from(agent_event_idxs[current_agent])
-        agent_event_idxs[current_agent] = len(game.event_log)
         agent_actions = game.get_agent_actions(current_agent)
+        action = _auto_move(move_rules, game, current_agent, agent_actions)
+        if action is not None:
+            # The agent's event cursor stays put, so it sees this move with its next decision
+            elided_calls[current_agent] += 1
+            game.step(action)
+            save_checkpoint()
+            continue
+
+        new_events = agent_event_cursors[current_agent].advance()
         agent_state = game.get_agent_state(current_agent)
 
+        # Time budget for this move
+        timeout = move_timeouts[current_agent]
+        if game_deadline is not None:
+            game_remaining = game_deadline - time.monotonic()
+            timeout = game_remaining if timeout is None else min(timeout, game_remaining)
+        agent = agents[current_agent]
+        agent.move_deadline = time.monotonic() + timeout if timeout is not None else None
+
         # Get action
         try:
-            action = agents[current_agent].get_action(new_events, agent_state, agent_actions)
+            action = yield agent, (new_events, agent_state, agent_actions), timeout
             if not game.validate_action(current_agent, action):
                 raise ValueError(f"Invalid action: {action}")
         except Exception as e:
+            if isinstance(e, GameAbortError):
+                raise
+            if isinstance(e, MoveTimeoutError):
+                # Running out the game clock isn't the agent's fault
+                if game_deadline is not None and time.monotonic() >= game_deadline:
+                    logger.info(f"Game ended in draw after exceeding time budget ({game_timeout}s)")
+                    return GameResult(
+                        agent_0_name=agent_0.get_name(),
+                        agent_1_name=agent_1.get_name(),
+                        agent_0_score=0.5,
+                        agent_1_score=0.5,
+                        event_log=game.event_log.events,
+                        details=f"Game ended in draw after exceeding time budget ({game_timeout}s)",
+                        seed=game.seed,
+                        timeouts=agent_timeouts,
+                        elided_calls=elided_calls,
+                        agent_stats=[agent.stats() for agent in agents],
+                    )
+                agent_timeouts[current_agent] += 1
             agent_error_counts[current_agent] += 1
 
             # This agent loses
@@ -82,6 +253,10 @@ def run_discrete_game(
                     agent_1_score=agent_1_score,
                     event_log=game.event_log.events,
                     details=f"Agent {current_agent} reached max error count ({MAX_ERROR_COUNT})",
+                    seed=game.seed,
+                    timeouts=agent_timeouts,
+                    elided_calls=elided_calls,
+                    agent_stats=[agent.stats() for agent in agents],
                 )
 
             # Return first action
@@ -90,6 +265,7 @@ def run_discrete_game(
 
         # Step
         game.step(action)
+        save_checkpoint()
 
     # Game over
     agent_scores = game.get_agent_scores()
@@ -100,7 +276,181 @@ def run_discrete_game(
         agent_1_score=agent_scores[1],
         event_log=game.event_log.events,
         details=f"Game ended after {turn_count} turns",
+        seed=game.seed,
+        timeouts=agent_timeouts,
+        elided_calls=elided_calls,
+        agent_stats=[agent.stats() for agent in agents],
+    )
+
+
+class _MoveRunner:
+    """
+    Runs timed get_action calls on a helper thread so the game can move on when one overruns.
+    A thread that overran can't be stopped; it is abandoned and finishes on its own.
+    """
+
+    def __init__(self):
+        self._pool: ThreadPoolExecutor | None = None
+
+    def run(self, agent: DiscreteAgent, args: tuple, timeout: float | None) -> Any:
+        if timeout is None:
+            return agent.get_action(*args)
+        if timeout <= 0:
+            raise MoveTimeoutError(f"Agent {agent.agent_id} has no time left")
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="move")
+        future = self._pool.submit(agent.get_action, *args)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self.close()
+            raise MoveTimeoutError(f"Agent {agent.agent_id} exceeded {timeout:.1f}s")
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+
+async def _get_action_async(agent: DiscreteAgent, args: tuple, timeout: float | None) -> Any:
+    if timeout is None:
+        return await agent.get_action_async(*args)
+    try:
+        # Cancels the agent's pending requests on expiry
+        return await asyncio.wait_for(agent.get_action_async(*args), max(timeout, 0))
+    except asyncio.TimeoutError:
+        raise MoveTimeoutError(f"Agent {agent.agent_id} exceeded {timeout:.1f}s")
+
+
+def run_discrete_game(
+    game_cls: type[DiscreteGame],
+    agents_0_cls: type[DiscreteAgent],
+    agents_1_cls: type[DiscreteAgent],
+    agent_0_kwargs: dict = {},
+    agent_1_kwargs: dict = {},
+    log_events: bool = False,
+    seed: int | None = None,
+    move_timeout: float | Sequence[float | None] | None = None,
+    game_timeout: float | None = None,
+    checkpoint: Checkpoint | None = None,
+    move_rules: Sequence[MoveRule] = (),
+) -> GameResult:
+    """
+    Run a discrete game between exactly two agents.
+
+    The game and both agents draw from their own random streams derived from ``seed``, so a game
+    replays identically given the same seed and agents.
+
+    :param move_timeout: seconds each agent has per move, or a pair of per-agent budgets. A move
+        that runs out of time counts as an agent error.
+    :param game_timeout: wall-clock seconds for the whole game, after which it ends in a draw
+    :param checkpoint: where to save the game every few turns; a game found there is resumed
+    :param move_rules: rules playing moves without calling the agent (e.g. forced_move), tried in
+        order; the agent still receives the events of those moves with its next decision
+    """
+    game, agents, progress = _init_game(
+        game_cls,
+        agents_0_cls,
+        agents_1_cls,
+        agent_0_kwargs,
+        agent_1_kwargs,
+        log_events,
+        seed,
+        checkpoint,
     )
+    play = _play(game, agents, move_timeout, game_timeout, checkpoint, progress, move_rules)
+    runner = _MoveRunner()
+    try:
+        agent, args, timeout = next(play)
+        while True:
+            try:
+                action = runner.run(agent, args, timeout)
+            except Exception as e:
+                agent, args, timeout = play.throw(e)
+            else:
+                agent, args, timeout = play.send(action)
+    except StopIteration as stop:
+        if checkpoint is not None:
+            checkpoint.remove()
+        return stop.value
+    finally:
+        runner.close()
+
+
+async def run_discrete_game_async(
+    game_cls: type[DiscreteGame],
+    agents_0_cls: type[DiscreteAgent],
+    agents_1_cls: type[DiscreteAgent],
+    agent_0_kwargs: dict = {},
+    agent_1_kwargs: dict = {},
+    log_events: bool = False,
+    seed: int | None = None,
+    move_timeout: float | Sequence[float | None] | None = None,
+    game_timeout: float | None = None,
+    checkpoint: Checkpoint | None = None,
+    move_rules: Sequence[MoveRule] = (),
+) -> GameResult:
+    """
+    Run a discrete game between exactly two agents, awaiting ``get_action_async`` for decisions.
+    Many games can be played concurrently on one event loop. Moves that run out of time are
+    cancelled.
+    """
+    game, agents, progress = _init_game(
+        game_cls,
+        agents_0_cls,
+        agents_1_cls,
+        agent_0_kwargs,
+        agent_1_kwargs,
+        log_events,
+        seed,
+        checkpoint,
+    )
+    play = _play(game, agents, move_timeout, game_timeout, checkpoint, progress, move_rules)
+    try:
+        agent, args, timeout = next(play)
+        while True:
+            try:
+                action = await _get_action_async(agent, args, timeout)
+            except Exception as e:
+                agent, args, timeout = play.throw(e)
+            else:
+                agent, args, timeout = play.send(action)
+    except StopIteration as stop:
+        if checkpoint is not None:
+            checkpoint.remove()
+        return stop.value
+
+
+def save_game_result(
+    game_result: GameResult,
+    game_cls: type[DiscreteGame],
+    agents_0_cls: type[DiscreteAgent],
+    agents_1_cls: type[DiscreteAgent],
+    results_dir: str = "./results",
+    game_id: str | None = None,
+):
+    """
+    Save a game result as ``{results_dir}/{game_id}.json`` (by default a timestamped id). The
+    file is written under a temporary name and moved into place, so it only exists once complete.
+    """
+    if game_id is None:
+        timestamp = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
+        game_id = f"{game_cls.__name__}_{agents_0_cls.__name__}_{agents_1_cls.__name__}_{timestamp}"
+    os.makedirs(results_dir, exist_ok=True)
+    path = f"{results_dir}/{game_id}.json"
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(game_result.__dict__, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def _result_checkpoint(
+    results_dir: str, game_id: str | None, checkpoint_every: int | None
+) -> Checkpoint | None:
+    if checkpoint_every is None:
+        return None
+    if game_id is None:
+        raise ValueError("Checkpointing needs a game_id to find the game again")
+    return Checkpoint(f"{results_dir}/{game_id}.ckpt", checkpoint_every)
 
 
 def run_and_save_discrete_game(
@@ -111,19 +461,70 @@ def run_and_save_discrete_game(
     agent_1_kwargs: dict = {},
     log_events: bool = False,
     results_dir: str = "./results",
+    seed: int | None = None,
+    move_timeout: float | Sequence[float | None] | None = None,
+    game_timeout: float | None = None,
+    game_id: str | None = None,
+    checkpoint_every: int | None = None,
+    move_rules: Sequence[MoveRule] = (),
 ) -> GameResult:
     """
     Run a discrete game and save the results.
+
+    :param checkpoint_every: save the game in progress every this many turns, next to the result
+        (``{game_id}.ckpt``), and resume it from there if the game is run again
+    :param move_rules: see run_discrete_game
     """
     # Run the game...
     game_result = run_discrete_game(
-        game_cls, agents_0_cls, agents_1_cls, agent_0_kwargs, agent_1_kwargs, log_events
+        game_cls,
+        agents_0_cls,
+        agents_1_cls,
+        agent_0_kwargs,
+        agent_1_kwargs,
+        log_events,
+        seed,
+        move_timeout,
+        game_timeout,
+        _result_checkpoint(results_dir, game_id, checkpoint_every),
+        move_rules,
     )
 
     # Save the game...
-    timestamp = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
-    game_id = f"{game_cls.__name__}_{agents_0_cls.__name__}_{agents_1_cls.__name__}_{timestamp}"
-    os.makedirs(results_dir, exist_ok=True)
-    with open(f"{results_dir}/{game_id}.json", "w") as f:
-        json.dump(game_result.__dict__, f)
+    save_game_result(game_result, game_cls, agents_0_cls, agents_1_cls, results_dir, game_id)
+    return game_result
+
+
+async def run_and_save_discrete_game_async(
+    game_cls: type[DiscreteGame],
+    agents_0_cls: type[DiscreteAgent],
+    agents_1_cls: type[DiscreteAgent],
+    agent_0_kwargs: dict = {},
+    agent_1_kwargs: dict = {},
+    log_events: bool = False,
+    results_dir: str = "./results",
+    seed: int | None = None,
+    move_timeout: float | Sequence[float | None] | None = None,
+    game_timeout: float | None = None,
+    game_id: str | None = None,
+    checkpoint_every: int | None = None,
+    move_rules: Sequence[MoveRule] = (),
+) -> GameResult:
+    """
+    Run a discrete game on the event loop and save the results.
+    """
+    game_result = await run_discrete_game_async(
+        game_cls,
+        agents_0_cls,
+        agents_1_cls,
+        agent_0_kwargs,
+        agent_1_kwargs,
+        log_events,
+        seed,
+        move_timeout,
+        game_timeout,
+        _result_checkpoint(results_dir, game_id, checkpoint_every),
+        move_rules,
+    )
+    save_game_result(game_result, game_cls, agents_0_cls, agents_1_cls, results_dir, game_id)
     return game_result
@@ -1,20 +1,61 @@
+import functools
+import hashlib
 import random
 from dataclasses import dataclass
-from typing import Any
+from collections.abc import Mapping, Sequence
+from typing import Any, Callable, Iterable, Iterator
 import logging
 from enum import Enum
 
 RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "T", "J", "Q", "K", "A"]
 SUITS = ["C", "D", "H", "S"]
 
+# Turns per agent after which the controller ends an unfinished game in a draw
+MAX_TURN_COUNT = 50
+
 logger = logging.getLogger(__name__)
 
 
-@dataclass
 class Card:
+    """
+    An immutable playing card. There is exactly one instance per card: ``Card(rank, suit)``
+    returns the interned instance from ``CARDS``, so cards compare and hash by identity.
+
+    Card ids are rank-major (``id = 4 * rank_index + suit_index``), so each rank occupies four
+    contiguous bits of a hand mask.
+    """
+
+    __slots__ = ("rank", "suit", "id", "bit")
+
+    _catalogue: dict[tuple[str, str], "Card"] = {}
+
+    def __new__(cls, rank: str, suit: str):
+        try:
+            return cls._catalogue[(rank, suit)]
+        except KeyError:
+            pass
+        if rank not in RANKS or suit not in SUITS:
+            raise ValueError(f"Invalid card: {rank}{suit}")
+        card = super().__new__(cls)
+        card_id = RANKS.index(rank) * len(SUITS) + SUITS.index(suit)
+        object.__setattr__(card, "rank", rank)
+        object.__setattr__(card, "suit", suit)
+        object.__setattr__(card, "id", card_id)
+        object.__setattr__(card, "bit", 1 << card_id)
+        cls._catalogue[(rank, suit)] = card
+        return card
 
-    rank: str
-    suit: str
+    def __setattr__(self, name, value):
+        raise AttributeError("Card is immutable")
+
+    def __reduce__(self):
+        return (Card, (self.rank, self.suit))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     def __str__(self):
         return f"{self.rank}{self.suit}"
@@ -22,31 +63,243 @@ class Card:
     def __repr__(self):
         return f"'{self}'"
 
+
+# The 52-card catalogue, indexed by card id
+CARDS: tuple[Card, ...] = tuple(Card(rank, suit) for rank in RANKS for suit in SUITS)
+FULL_DECK_MASK = (1 << len(CARDS)) - 1
+RANK_MASKS: dict[str, int] = {rank: 0b1111 << (i * len(SUITS)) for i, rank in enumerate(RANKS)}
+SUIT_MASKS: dict[str, int] = {
+    suit: sum(1 << (r * len(SUITS) + i) for r in range(len(RANKS))) for i, suit in enumerate(SUITS)
+}
+
+
+def iter_mask(mask: int) -> Iterator[Card]:
+    """Yield the cards whose bits are set in ``mask``, in card id order."""
+    while mask:
+        low = mask & -mask
+        yield CARDS[low.bit_length() - 1]
+        mask ^= low
+
+
+def cards_mask(cards: Iterable[Card]) -> int:
+    """Mask of a hand or any iterable of cards."""
+    if isinstance(cards, Hand):
+        return cards.mask
+    mask = 0
+    for card in cards:
+        mask |= card.bit
+    return mask
+
+
+class Hand:
+    """
+    A hand of cards backed by a 64-bit mask.
+
+    Supports the list operations agents and engines rely on (iteration, indexing, ``in``,
+    ``append``, ``remove``, ``pop``, ...). Cards are always ordered by card id, and a hand holds
+    each card at most once.
+    """
+
+    __slots__ = ("mask", "_cards")
+
+    def __init__(self, cards: Iterable[Card] = ()):
+        mask = 0
+        for card in cards:
+            mask |= card.bit
+        self.mask = mask
+        self._cards: tuple[Card, ...] | None = None
+
+    @classmethod
+    def from_mask(cls, mask: int) -> "Hand":
+        hand = cls.__new__(cls)
+        hand.mask = mask
+        hand._cards = None
+        return hand
+
+    @property
+    def cards(self) -> tuple[Card, ...]:
+        if self._cards is None:
+            self._cards = tuple(iter_mask(self.mask))
+        return self._cards
+
+    def _set_mask(self, mask: int):
+        self.mask = mask
+        self._cards = None
+
+    # List-like API
+    def __iter__(self) -> Iterator[Card]:
+        return iter(self.cards)
+
+    def __len__(self) -> int:
+        return self.mask.bit_count()
+
+    def __bool__(self) -> bool:
+        return self.mask != 0
+
+    def __contains__(self, card: object) -> bool:
+        return isinstance(card, Card) and bool(self.mask & card.bit)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return list(self.cards[idx])
+        return self.cards[idx]
+
     def __eq__(self, other):
-        if not isinstance(other, Card):
-            return NotImplemented
-        return self.rank == other.rank and self.suit == other.suit
+        if isinstance(other, Hand):
+            return self.mask == other.mask
+        if isinstance(other, (list, tuple)):
+            return list(self.cards) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self.cards))
+
+    def append(self, card: Card):
+        if self.mask & card.bit:
+            raise ValueError(f"{card} is already in hand")
+        self._set_mask(self.mask | card.bit)
+
+    def extend(self, cards: Iterable[Card]):
+        for card in cards:
+            self.append(card)
+
+    def remove(self, card: Card):
+        if card not in self:
+            raise ValueError(f"{card} is not in hand")
+        self._set_mask(self.mask ^ card.bit)
+
+    def pop(self, idx: int = -1) -> Card:
+        card = self.cards[idx]
+        self._set_mask(self.mask ^ card.bit)
+        return card
+
+    def index(self, card: Card) -> int:
+        if card not in self:
+            raise ValueError(f"{card} is not in hand")
+        return (self.mask & (card.bit - 1)).bit_count()
+
+    def copy(self) -> "Hand":
+        return Hand.from_mask(self.mask)
+
+    # Bitwise helpers
+    def extract(self, mask: int) -> "Hand":
+        """Remove the cards selected by ``mask`` and return them as a new hand."""
+        taken = self.mask & mask
+        self._set_mask(self.mask ^ taken)
+        return Hand.from_mask(taken)
+
+    def count_rank(self, rank: str) -> int:
+        return (self.mask & RANK_MASKS[rank]).bit_count()
+
+    def ranks(self) -> list[str]:
+        """Ranks present in the hand, in rank order."""
+        return [rank for rank in RANKS if self.mask & RANK_MASKS[rank]]
+
+    def cards_of_rank(self, rank: str) -> list[Card]:
+        return list(iter_mask(self.mask & RANK_MASKS[rank]))
+
+    def cards_of_suit(self, suit: str) -> list[Card]:
+        return list(iter_mask(self.mask & SUIT_MASKS[suit]))
+
+
+class LazyValue:
+    """Marks a state field that is only computed when an agent reads it."""
+
+    __slots__ = ("compute",)
+
+    def __init__(self, compute: Callable[[], Any]):
+        self.compute = compute
+
+
+class LazyState(Mapping):
+    """
+    Read-only agent state. ``LazyValue`` fields are computed on first access and memoized, so
+    agents that never look at a field (e.g. RandomAgent) never pay for it. Renders like the
+    equivalent dict.
+    """
+
+    __slots__ = ("_fields",)
+
+    def __init__(self, fields: dict[str, Any]):
+        self._fields = fields
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._fields[key]
+        if isinstance(value, LazyValue):
+            value = self._fields[key] = value.compute()
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+def derive_seed(*parts: int | str) -> int:
+    """Derive a 63-bit seed from a parent seed and identifiers, stable across processes."""
+    digest = hashlib.sha256(":".join(map(str, parts)).encode()).digest()
+    return int.from_bytes(digest[:8], "big") >> 1
+
 
-    def __hash__(self):
-        return hash((self.rank, self.suit))
+def rng_state(rng: random.Random) -> list:
+    """State of a random stream as JSON-compatible data."""
+    version, internal, gauss = rng.getstate()
+    return [version, list(internal), gauss]
+
+
+def set_rng_state(rng: random.Random, state: list):
+    version, internal, gauss = state
+    rng.setstate((version, tuple(internal), gauss))
+
+
+def pile_top(pile: list[Card]) -> tuple[int, Card | None]:
+    """(length, top card) of a pile, the undo record of a pile that changes one card a step."""
+    return len(pile), pile[-1] if pile else None
+
+
+def restore_pile(pile: list[Card], record: tuple[int, Card | None]):
+    """Undo a one-card push or pop, or a pop then a push, on a pile recorded with pile_top()."""
+    length, top = record
+    if len(pile) > length:
+        pile.pop()
+    elif len(pile) < length:
+        pile.append(top)
+    elif pile and pile[-1] is not top:
+        pile[-1] = top
+
+
+def card_ids(cards: Iterable[Card]) -> list[int]:
+    return [card.id for card in cards]
+
+
+def cards_from_ids(ids: Iterable[int]) -> list[Card]:
+    return [CARDS[card_id] for card_id in ids]
 
 
 class Deck:
 
-    def __init__(self, shuffle=True):
+    def __init__(self, shuffle=True, rng: random.Random | None = None):
 
-        self.cards = [Card(rank, suit) for rank in RANKS for suit in SUITS]
+        # Fall back to the module-level generator when no stream is given
+        self.rng = rng if rng is not None else random
+        self.cards = list(CARDS)
         if shuffle:
             self.shuffle()
 
     def shuffle(self):
-        random.shuffle(self.cards)
+        self.rng.shuffle(self.cards)
 
     def deal(self, num_cards: int):
         return [self.cards.pop() for _ in range(num_cards)]
 
     def deal_with_replacement(self, num_cards: int):
-        return random.choices(self.cards, k=num_cards)
+        return self.rng.choices(self.cards, k=num_cards)
 
     def __len__(self):
 
@@ -69,24 +322,103 @@ class GameResult:
     agent_1_score: float
     event_log: list[str]
     details: str | None = None
+    seed: int | None = None
+    timeouts: list[int] | None = None  # Moves per agent that ran out of time
+    elided_calls: list[int] | None = None  # Moves per agent played by a move rule, without a call
+    agent_stats: list[dict] | None = None  # DiscreteAgent.stats() of each agent
 
 
 class EventLog:
+    """
+    Game events stored as compact records: an event code followed by integer arguments (agent
+    ids, card ids, counts, ...). Records are only rendered to strings, using the game's event
+    formats, when an agent, a GameResult or the logger needs them.
+    """
 
-    def __init__(self, log_events: bool):
-        self.events: list[str] = []
+    def __init__(self, log_events: bool, formats: dict[int, Callable[..., str]]):
+        self.records: list[tuple[int, ...]] = []
+        self.formats = formats
         self.log_events = log_events
 
-    def push(self, event: str):
-        self.events.append(event)
+    def push(self, code: int, *args: int):
+        self.records.append((code, *args))
         if self.log_events:
-            logger.info(event)
+            logger.info(self.render(len(self.records) - 1))
+
+    def render(self, idx: int) -> str:
+        code, *args = self.records[idx]
+        return self.formats[code](*args)
+
+    @property
+    def events(self) -> list[str]:
+        """All events, rendered."""
+        return [self.render(idx) for idx in range(len(self.records))]
+
+    def copy(self) -> "EventLog":
+        log = EventLog(self.log_events, self.formats)
+        log.records = list(self.records)
+        return log
+
+    def get_events_from(self, idx: int) -> "EventView":
+        return EventView(self, idx, len(self.records))
 
-    def get_events_from(self, idx: int) -> list[str]:
-        return self.events[idx:]
+    def cursor(self) -> "EventCursor":
+        return EventCursor(self)
 
     def __len__(self):
-        return len(self.events)
+        return len(self.records)
+
+
+class EventView(Sequence):
+    """Read-only window onto an EventLog, rendering events on access without copying records."""
+
+    __slots__ = ("log", "start", "stop")
+
+    def __init__(self, log: EventLog, start: int, stop: int):
+        self.log = log
+        self.start = start
+        self.stop = stop
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("event index out of range")
+        return self.log.render(self.start + idx)
+
+    def __iter__(self) -> Iterator[str]:
+        for idx in range(self.start, self.stop):
+            yield self.log.render(idx)
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class EventCursor:
+    """Per-agent position in an EventLog."""
+
+    __slots__ = ("log", "position")
+
+    def __init__(self, log: EventLog):
+        self.log = log
+        self.position = 0
+
+    def advance(self) -> EventView:
+        """Return the events pushed since the last call and move past them."""
+        view = EventView(self.log, self.position, len(self.log))
+        self.position = view.stop
+        return view
+
+
+@functools.cache
+def _read_rules(game_name: str) -> str:
+    with open(f"src/games/{game_name}/rules.md", "r") as f:
+        return f.read()
 
 
 class DiscreteGame:
@@ -94,22 +426,51 @@ class DiscreteGame:
     Game with a discrete action space.
     """
 
-    def __init__(self, agent_ids: list[int], game_name: str, log_events: bool = False):
+    def __init__(
+        self,
+        agent_ids: list[int],
+        game_name: str,
+        log_events: bool = False,
+        event_formats: dict[int, Callable[..., str]] | None = None,
+        seed: int | None = None,
+    ):
         self.agent_ids = agent_ids
         self.num_agents = len(agent_ids)
         self.current_agent: int = None
-        self.event_log: EventLog = EventLog(log_events)
+        self.event_log: EventLog = EventLog(log_events, event_formats or {})
         self.done = False
         self.game_name = game_name
         self.rules = self.load_rules()
-        # TODO - random state initialization
+        self._hands: dict[int, Hand] = {}
+        self.version = 0  # Incremented by every change of state, keys the per-turn caches
+        self._action_cache: dict[int, list] = {}
+        self._action_cache_version = -1
+        self._state_cache: dict[int, LazyState] = {}
+        self._state_cache_version = -1
+        # Every game owns its random stream. Without an explicit seed, one is drawn from the
+        # module-level generator so that random.seed() still makes runs reproducible.
+        self.seed = seed if seed is not None else random.randrange(2**63)
+        self.rng = random.Random(self.seed)
+        self._undo_stack: list[tuple] = []
+
+    @property
+    def hands(self) -> dict[int, Hand]:
+        return self._hands
+
+    @hands.setter
+    def hands(self, hands: dict[int, Iterable[Card]]):
+        # Accept plain card lists (e.g. when a test sets up a position) and store them as Hands
+        self._hands = {
+            agent_id: hand if isinstance(hand, Hand) else Hand(hand)
+            for agent_id, hand in hands.items()
+        }
+        self.version += 1
 
     def load_rules(self) -> str:
         """
-        Load the rules of the game from a file.
+        Load the rules of the game from a file (read once per process).
         """
-        with open(f"src/games/{self.game_name}/rules.md", "r") as f:
-            return f.read()
+        return _read_rules(self.game_name)
 
     def init_game(self):
         pass
@@ -121,16 +482,217 @@ class DiscreteGame:
         pass
 
     def get_agent_actions(self, agent_id: int) -> list[Any]:
-        """..."""
+        """
+        Legal actions for the given agent, cached until the next step().
+
+        The list is shared by every caller during the turn (controller, agent, validate_action)
+        and must not be modified.
+        """
+        return self._cached_actions(agent_id)[0]
+
+    def _get_agent_actions(self, agent_id: int) -> list[Any]:
+        """Compute the legal actions for the given agent. Implemented by each game."""
+        pass
 
-    def get_agent_state(self, agent_id: int) -> dict:
-        """..."""
+    def _cached_actions(self, agent_id: int) -> list:
+        """[actions, action index] for the current version of the game state."""
+        if self._action_cache_version != self.version:
+            self._action_cache = {}
+            self._action_cache_version = self.version
+        entry = self._action_cache.get(agent_id)
+        if entry is None:
+            entry = self._action_cache[agent_id] = [self._get_agent_actions(agent_id), None]
+        return entry
+
+    def get_agent_state(self, agent_id: int) -> LazyState:
+        """Observable state for the given agent, memoized until the next step()."""
+        if self._state_cache_version != self.version:
+            self._state_cache = {}
+            self._state_cache_version = self.version
+        state = self._state_cache.get(agent_id)
+        if state is None:
+            state = self._state_cache[agent_id] = LazyState(self._get_agent_state(agent_id))
+        return state
+
+    def _get_agent_state(self, agent_id: int) -> dict:
+        """State fields for the given agent; costly ones may be wrapped in LazyValue."""
         pass
 
     def get_agent_scores(self) -> dict[int, float]:
         """At the end of the game, get the scores for each agent."""
         pass
 
-    def validate_action(self, action: Any) -> bool:
-        """..."""
+    def validate_action(self, agent_id: int, action: Any) -> bool:
+        """Check if action is legal for the given agent, via a hashed index of the legal actions."""
+        entry = self._cached_actions(agent_id)
+        if entry[1] is None:
+            entry[1] = {legal_action: i for i, legal_action in enumerate(entry[0])}
+        return action in entry[1]
+
+    def clone(self, rng: random.Random | None = None) -> "DiscreteGame":
+        """
+        Independent copy of the game for search. Immutable data (rules, ids, event formats, cards)
+        is shared; hands, piles and the event records are copied shallowly.
+
+        :param rng: random stream for the clone (default: a copy of this game's stream). Search
+            agents should pass their own: copying the stream's state is most of a clone's cost.
+        """
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone._hands = {agent_id: hand.copy() for agent_id, hand in self._hands.items()}
+        clone.event_log = self.event_log.copy()
+        if rng is None:
+            rng = random.Random()
+            rng.setstate(self.rng.getstate())
+        clone.rng = rng
+        clone._action_cache = {}
+        clone._action_cache_version = -1
+        clone._state_cache = {}
+        clone._state_cache_version = -1
+        clone._undo_stack = []
+        self._clone_state(clone)
+        return clone
+
+    def _clone_state(self, clone: "DiscreteGame"):
+        """Give the clone its own copies of the engine's mutable fields. Implemented by games."""
+        pass
+
+    def apply(self, action: Any):
+        """step() that can be reverted with undo(), for tree search."""
+        self._undo_stack.append(
+            (
+                self.current_agent,
+                self.done,
+                {agent_id: hand.mask for agent_id, hand in self._hands.items()},
+                len(self.event_log.records),
+                self._save_undo(),
+            )
+        )
+        self.step(action)
+
+    def undo(self):
+        """Revert the most recent apply()."""
+        current_agent, done, masks, n_events, engine_record = self._undo_stack.pop()
+        self.current_agent = current_agent
+        self.done = done
+        for agent_id, mask in masks.items():
+            self._hands[agent_id]._set_mask(mask)
+        del self.event_log.records[n_events:]
+        self._restore_undo(engine_record)
+        self.version += 1
+
+    def _save_undo(self) -> Any:
+        """
+        Engine fields needed to revert one step(). Each step moves at most one card on or off a
+        pile, so recording pile lengths and top cards is enough. Implemented by each game.
+        """
+        return None
+
+    def _restore_undo(self, record: Any):
+        pass
+
+    def determinize(self, observer: int, rng: random.Random) -> "DiscreteGame":
+        """
+        Clone of the game in which every card hidden from ``observer`` (the other hands and the
+        hidden piles) is dealt again at random, consistently with what ``observer`` has seen.
+        Search agents play out these samples instead of the real hidden cards.
+        """
+        clone = self.clone(rng=rng)
+        piles = clone._hidden_piles()
+        others = [agent_id for agent_id in self.agent_ids if agent_id != observer]
+        unseen_mask = 0
+        for agent_id in others:
+            unseen_mask |= self._hands[agent_id].mask
+        for pile in piles:
+            unseen_mask |= cards_mask(pile)
+
+        # Cards the observer knows the others hold stay where they are
+        known = {}
+        for agent_id in others:
+            known[agent_id] = self._known_cards(observer, agent_id, unseen_mask, rng)
+            unseen_mask &= ~known[agent_id]
+
+        unseen = list(iter_mask(unseen_mask))
+        rng.shuffle(unseen)
+        for agent_id in others:
+            n_cards = len(self._hands[agent_id]) - known[agent_id].bit_count()
+            clone._hands[agent_id]._set_mask(known[agent_id] | cards_mask(unseen[:n_cards]))
+            del unseen[:n_cards]
+        for pile in piles:
+            pile[:] = unseen[: len(pile)]
+            del unseen[: len(pile)]
+        return clone
+
+    def _hidden_piles(self) -> list[list[Card]]:
+        """Piles no player can see into (e.g. the stock), redealt by determinize()."""
+        return []
+
+    def _known_cards(self, observer: int, agent_id: int, unseen: int, rng: random.Random) -> int:
+        """
+        Mask of the cards ``observer`` knows (or, for constraints such as "holds a seven", has
+        sampled from the ``unseen`` mask) to be in ``agent_id``'s hand. Overridden by games that
+        reveal cards in hand.
+        """
+        return 0
+
+    def options(self) -> dict:
+        """
+        Constructor arguments besides the agent ids, log_events and seed that change how the game
+        plays (e.g. Gin Rummy's compound turns). Implemented by games that take any.
+        """
+        return {}
+
+    def snapshot(self) -> dict:
+        """
+        Full game state as compact JSON-compatible data (cards as ids, hands as masks), including
+        the random stream and the event log. Restoring it into a fresh game of the same class,
+        built with the snapshot's "options", continues the game exactly.
+        """
+        return {
+            "seed": self.seed,
+            "options": self.options(),
+            "rng": rng_state(self.rng),
+            "current_agent": self.current_agent,
+            "done": self.done,
+            "hands": {str(agent_id): hand.mask for agent_id, hand in self.hands.items()},
+            "events": [list(record) for record in self.event_log.records],
+            "state": self._snapshot_state(),
+        }
+
+    def restore(self, snapshot: dict):
+        """Replace the game state with a snapshot taken by snapshot()."""
+        # Snapshots saved before options were recorded are taken as they are
+        options = snapshot.get("options", self.options())
+        if options != self.options():
+            raise ValueError(f"Snapshot of a game with options {options}, not {self.options()}")
+        self.seed = snapshot["seed"]
+        set_rng_state(self.rng, snapshot["rng"])
+        self.current_agent = snapshot["current_agent"]
+        self.done = snapshot["done"]
+        self.hands = {
+            int(agent_id): Hand.from_mask(mask) for agent_id, mask in snapshot["hands"].items()
+        }
+        self.event_log.records = [tuple(record) for record in snapshot["events"]]
+        self._restore_state(snapshot["state"])
+        self.version += 1
+
+    def _snapshot_state(self) -> dict:
+        """Engine-specific state for snapshot(). Implemented by each game."""
+        return {}
+
+    def _restore_state(self, state: dict):
+        pass
+
+    @classmethod
+    def stats_counters(cls) -> dict[str, int]:
+        """Process-wide engine counters (e.g. cache hits) that add up across processes."""
+        return {}
+
+    @classmethod
+    def log_stats(cls, counters: dict[str, int] | None = None):
+        """
+        Log process-wide engine statistics (e.g. cache hit rates), if the game keeps any.
+
+        :param counters: stats_counters() summed over worker processes (default: this process's)
+        """
         pass
@@ -1,11 +1,25 @@
 from dataclasses import dataclass
-import random
+from enum import IntEnum, auto
 import logging
 
-from src.games.common import Card, Deck, DiscreteGame, SUITS
-
-
-@dataclass
+from src.games.common import (
+    CARDS,
+    Card,
+    Deck,
+    DiscreteGame,
+    Hand,
+    SUITS,
+    RANK_MASKS,
+    SUIT_MASKS,
+    card_ids,
+    cards_from_ids,
+    iter_mask,
+    pile_top,
+    restore_pile,
+)
+
+
+@dataclass(frozen=True)
 class Action:
     """Represents a Crazy Eights action for a single turn.
 
@@ -32,41 +46,46 @@ class Action:
             return "Pass"
         return "No-op"
 
-    def __eq__(self, other):  # type: ignore[override]
-        """Custom equality that ignores Card instance identity.
+    def encode(self) -> tuple[int, int, int, int]:
+        """Integer form (card id or -1, suit index or -1, draw_card, is_pass) for event records."""
+        return (
+            self.play_card.id if self.play_card is not None else -1,
+            SUITS.index(self.declare_suit) if self.declare_suit is not None else -1,
+            int(self.draw_card),
+            int(self.is_pass),
+        )
+
+    @classmethod
+    def decode(cls, card_id: int, suit_idx: int, draw_card: int, is_pass: int) -> "Action":
+        return cls(
+            play_card=CARDS[card_id] if card_id >= 0 else None,
+            declare_suit=SUITS[suit_idx] if suit_idx >= 0 else None,
+            draw_card=bool(draw_card),
+            is_pass=bool(is_pass),
+        )
 
-        Two Action objects are considered equal when they represent the same
-        logical move (same card rank/suit if playing, or identical flags for
-        draw/pass) and the same declared suit for wild eights.
-        """
-        if not isinstance(other, Action):
-            return NotImplemented
-
-        # Compare simple flags first – they must all match
-        if (
-            self.draw_card != other.draw_card
-            or self.is_pass != other.is_pass
-            or self.declare_suit != other.declare_suit
-        ):
-            return False
 
-        if self.play_card is None and other.play_card is None:
-            return True  # Non-play actions already matched via flags above
+class Event(IntEnum):
+    ACTION = auto()  # agent_id, *action.encode()
+    STALEMATE = auto()
 
-        if self.play_card is not None and other.play_card is not None:
-            return (
-                self.play_card.rank == other.play_card.rank
-                and self.play_card.suit == other.play_card.suit
-            )
 
-        # One has a card, the other doesn't → not equal
-        return False
+EVENT_FORMATS = {
+    Event.ACTION: lambda agent_id, *action: f"[Agent {agent_id}] {Action.decode(*action)}",
+    Event.STALEMATE: lambda: "Stalemate reached - counting cards for result",
+}
 
 
 class CrazyEights(DiscreteGame):
 
-    def __init__(self, agent_ids: list[int], log_events: bool = False):
-        super().__init__(agent_ids=agent_ids, game_name="crazy_eights", log_events=log_events)
+    def __init__(self, agent_ids: list[int], log_events: bool = False, seed: int | None = None):
+        super().__init__(
+            agent_ids=agent_ids,
+            game_name="crazy_eights",
+            log_events=log_events,
+            event_formats=EVENT_FORMATS,
+            seed=seed,
+        )
 
         # No player limit enforced here – most variants support 2–5 players.
 
@@ -76,11 +95,9 @@ class CrazyEights(DiscreteGame):
 
     def init_game(self):
         """Deal cards and setup stock / discard piles."""
-        deck = Deck()
+        deck = Deck(rng=self.rng)
         cards_per_agent = 5  # Standard Crazy Eights deal size for ≤5 players
-        self.hands: dict[int, list[Card]] = {
-            aid: deck.deal(cards_per_agent) for aid in self.agent_ids
-        }
+        self.hands = {aid: Hand(deck.deal(cards_per_agent)) for aid in self.agent_ids}
 
         # Remaining cards become the stock (draw pile)
         self.stock: list[Card] = deck.deal(len(deck))
@@ -89,7 +106,7 @@ class CrazyEights(DiscreteGame):
         starter = self.stock.pop()
         while starter.rank == "8":
             # Bury the eight roughly in the middle of the remaining stock
-            insert_idx = random.randint(0, len(self.stock))
+            insert_idx = self.rng.randint(0, len(self.stock))
             self.stock.insert(insert_idx, starter)
             starter = self.stock.pop()
 
@@ -98,7 +115,7 @@ class CrazyEights(DiscreteGame):
         self.current_rank: str = starter.rank
 
         # Choose random starting agent
-        self.current_agent = random.choice(self.agent_ids)
+        self.current_agent = self.rng.choice(self.agent_ids)
 
         logging.debug(
             f"CrazyEights initialised - starter {starter}, current suit {self.current_suit},"
@@ -124,8 +141,9 @@ class CrazyEights(DiscreteGame):
         """
         assert not self.done, "Cannot take step - game already finished"
         assert action is not None, "Action required"
+        self.version += 1
 
-        self.event_log.push(f"[Agent {self.current_agent}] {action}")
+        self.event_log.push(Event.ACTION, self.current_agent, *action.encode())
 
         # Handle DRAW
         if action.draw_card:
@@ -141,7 +159,7 @@ class CrazyEights(DiscreteGame):
         if action.is_pass:
             self.update_current_agent()
             if self._stalemate():
-                self.event_log.push("Stalemate reached - counting cards for result")
+                self.event_log.push(Event.STALEMATE)
                 self.done = True
                 return None
             return self.current_agent
@@ -150,8 +168,8 @@ class CrazyEights(DiscreteGame):
         card_to_play = action.play_card
 
         # Verify the player actually has the card
-        hand_cards = self.hands[self.current_agent]
-        played_card = hand_cards.pop(hand_cards.index(card_to_play))
+        played_card = card_to_play
+        self.hands[self.current_agent].remove(played_card)
 
         # Place card on discard pile
         self.discard.append(played_card)
@@ -179,13 +197,12 @@ class CrazyEights(DiscreteGame):
 
     def _playable_cards(self, agent_id: int) -> list[Card]:
         """Return the subset of the agent's hand that can legally be played."""
-        playable = []
-        for card in self.hands[agent_id]:
-            if card.rank == "8" or card.suit == self.current_suit or card.rank == self.current_rank:
-                playable.append(card)
-        return playable
+        playable_mask = (
+            RANK_MASKS["8"] | SUIT_MASKS[self.current_suit] | RANK_MASKS[self.current_rank]
+        )
+        return list(iter_mask(self.hands[agent_id].mask & playable_mask))
 
-    def get_agent_actions(self, agent_id: int) -> list[Action]:
+    def _get_agent_actions(self, agent_id: int) -> list[Action]:
         actions: list[Action] = []
 
         # Add play-card actions
@@ -209,7 +226,7 @@ class CrazyEights(DiscreteGame):
     # Introspection helpers
     # ---------------------------------------------------------------------
 
-    def get_agent_state(self, agent_id: int) -> dict:
+    def _get_agent_state(self, agent_id: int) -> dict:
         return {
             "hand": self.hands[agent_id],
             "top_discard": self.discard[-1],
@@ -217,6 +234,39 @@ class CrazyEights(DiscreteGame):
             "stock_size": len(self.stock),
         }
 
+    # ---------------------------------------------------------------------
+    # Copying and restoring state
+    # ---------------------------------------------------------------------
+
+    def _clone_state(self, clone: "CrazyEights"):
+        clone.stock = list(self.stock)
+        clone.discard = list(self.discard)
+
+    def _save_undo(self) -> tuple:
+        return pile_top(self.stock), pile_top(self.discard), self.current_suit, self.current_rank
+
+    def _restore_undo(self, record: tuple):
+        stock, discard, self.current_suit, self.current_rank = record
+        restore_pile(self.stock, stock)
+        restore_pile(self.discard, discard)
+
+    def _snapshot_state(self) -> dict:
+        return {
+            "stock": card_ids(self.stock),
+            "discard": card_ids(self.discard),
+            "current_suit": self.current_suit,
+            "current_rank": self.current_rank,
+        }
+
+    def _restore_state(self, state: dict):
+        self.stock = cards_from_ids(state["stock"])
+        self.discard = cards_from_ids(state["discard"])
+        self.current_suit = state["current_suit"]
+        self.current_rank = state["current_rank"]
+
+    def _hidden_piles(self) -> list[list[Card]]:
+        return [self.stock]
+
     # ---------------------------------------------------------------------
     # Finishing the game
     # ---------------------------------------------------------------------
@@ -241,14 +291,6 @@ class CrazyEights(DiscreteGame):
         # Equal card counts – draw
         return {0: 0.5, 1: 0.5}
 
-    # ---------------------------------------------------------------------
-    # Validation utility
-    # ---------------------------------------------------------------------
-
-    def validate_action(self, agent_id: int, action: Action) -> bool:
-        """Return True iff the provided action is currently legal for agent."""
-        return action in self.get_agent_actions(agent_id)
-
     def _stalemate(self) -> bool:
         """Return True if stock empty and no agent can play a card."""
         if len(self.stock) > 0:
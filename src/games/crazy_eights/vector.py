@@ -0,0 +1,156 @@
+import numpy as np
+
+from src.games.common import CARDS, RANK_MASKS, RANKS, SUITS, DiscreteGame
+from src.games.crazy_eights.crazy_eights import Action, CrazyEights
+from src.games.vector import (
+    CARD_BITS,
+    CARD_RANKS,
+    CARD_SUITS,
+    MAX_TURNS,
+    N_CARDS,
+    RANK_MASK_ARRAY,
+    SUIT_MASK_ARRAY,
+    VectorGame,
+    mask_to_array,
+    pile_pop,
+    set_pile,
+)
+
+CARDS_PER_AGENT = 5
+EIGHT = RANKS.index("8")
+FIRST_EIGHT = EIGHT * len(SUITS)  # Card id of the first eight
+# Actions: play card c (0-51, not an eight), play eight k declaring suit s (52 + 4k + s), draw, pass
+EIGHT_ACTIONS = N_CARDS
+DRAW = EIGHT_ACTIONS + len(SUITS) * len(SUITS)
+PASS = DRAW + 1
+
+
+class CrazyEightsVector(VectorGame):
+    """Two-player Crazy Eights on NumPy arrays. Only the top of the discard pile is kept."""
+
+    game_cls = CrazyEights
+    num_actions = PASS + 1
+
+    def __init__(self, batch_size: int, seed: int | None = None, max_turns: int | None = MAX_TURNS):
+        self.stock = np.zeros((batch_size, N_CARDS), dtype=np.int8)
+        self.stock_size = np.zeros(batch_size, dtype=np.int64)
+        self.top_discard = np.zeros(batch_size, dtype=np.int64)
+        self.current_suit = np.zeros(batch_size, dtype=np.int64)
+        self.current_rank = np.zeros(batch_size, dtype=np.int64)
+        super().__init__(batch_size, seed, max_turns)
+
+    def _deal(self, idx: np.ndarray, decks: np.ndarray):
+        bits = CARD_BITS[decks]
+        for agent_id in range(self.num_agents):
+            dealt = bits[:, agent_id * CARDS_PER_AGENT : (agent_id + 1) * CARDS_PER_AGENT]
+            self.hands[idx, agent_id] = np.bitwise_or.reduce(dealt, axis=1)
+        n_dealt = self.num_agents * CARDS_PER_AGENT
+        self.stock[idx] = 0
+        self.stock[idx, : N_CARDS - n_dealt] = decks[:, n_dealt:]
+        self.stock_size[idx] = N_CARDS - n_dealt
+
+        # The starter can't be an eight: bury it at a random depth and turn the next card
+        starters = pile_pop(self.stock, self.stock_size, idx)
+        for i in np.flatnonzero(CARD_RANKS[starters] == EIGHT):
+            game_idx = idx[i]
+            stock = self.stock[game_idx, : self.stock_size[game_idx]].tolist()
+            starter = int(starters[i])
+            while CARD_RANKS[starter] == EIGHT:
+                stock.insert(int(self.rng.integers(0, len(stock) + 1)), starter)
+                starter = stock.pop()
+            self.stock[game_idx, : len(stock)] = stock
+            starters[i] = starter
+        self.top_discard[idx] = starters
+        self.current_suit[idx] = CARD_SUITS[starters]
+        self.current_rank[idx] = CARD_RANKS[starters]
+        self.current_agent[idx] = self.rng.integers(0, self.num_agents, len(idx))
+
+    def _playable(self, hands: np.ndarray, idx: np.ndarray | slice = slice(None)) -> np.ndarray:
+        """Masks of the cards in ``hands`` that can be played on games ``idx``."""
+        playable = (
+            np.uint64(RANK_MASKS["8"])
+            | SUIT_MASK_ARRAY[self.current_suit[idx]]
+            | RANK_MASK_ARRAY[self.current_rank[idx]]
+        )
+        return hands & playable
+
+    def _legal_actions(self, legal: np.ndarray):
+        playable = self._playable(self.hands[np.arange(self.batch_size), self.current_agent])
+        cards = mask_to_array(playable)
+        legal[:, :N_CARDS] = cards
+        legal[:, FIRST_EIGHT : FIRST_EIGHT + len(SUITS)] = False
+        eights = cards[:, FIRST_EIGHT : FIRST_EIGHT + len(SUITS)]
+        legal[:, EIGHT_ACTIONS:DRAW] = np.repeat(eights, len(SUITS), axis=1)
+        legal[:, DRAW] = self.stock_size > 0
+        legal[:, PASS] = (self.stock_size == 0) & (playable == 0)
+
+    def observations(self) -> dict[str, np.ndarray]:
+        return {
+            "hand": mask_to_array(self.hands[np.arange(self.batch_size), self.current_agent]),
+            "top_discard": self.top_discard.copy(),
+            "current_suit": self.current_suit.copy(),
+            "stock_size": self.stock_size.copy(),
+        }
+
+    def _step(self, actions: np.ndarray) -> np.ndarray:
+        done = np.zeros(self.batch_size, dtype=bool)
+
+        draws = np.flatnonzero(actions == DRAW)
+        cards = pile_pop(self.stock, self.stock_size, draws)
+        self.hands[draws, self.current_agent[draws]] |= CARD_BITS[cards]
+
+        # A pass ends the game when neither player can play and the stock is empty
+        passes = np.flatnonzero(actions == PASS)
+        stuck = np.ones(len(passes), dtype=bool)
+        for agent_id in range(self.num_agents):
+            stuck &= self._playable(self.hands[passes, agent_id], passes) == 0
+        done[passes[stuck & (self.stock_size[passes] == 0)]] = True
+
+        plays = np.flatnonzero(actions < DRAW)
+        played = actions[plays]
+        is_eight = played >= EIGHT_ACTIONS
+        cards = np.where(is_eight, FIRST_EIGHT + (played - EIGHT_ACTIONS) // len(SUITS), played)
+        agents = self.current_agent[plays]
+        self.hands[plays, agents] &= ~CARD_BITS[cards]
+        self.top_discard[plays] = cards
+        self.current_suit[plays] = np.where(
+            is_eight, (played - EIGHT_ACTIONS) % len(SUITS), CARD_SUITS[cards]
+        )
+        self.current_rank[plays] = CARD_RANKS[cards]
+        done[plays] = self.hands[plays, agents] == 0
+
+        self._switch_agent(np.flatnonzero(~done))
+        return done
+
+    def _scores(self, idx: np.ndarray) -> np.ndarray:
+        counts = np.bitwise_count(self.hands[idx])
+        scores = np.full((len(idx), 2), 0.5)
+        scores[counts[:, 0] < counts[:, 1]] = (1.0, 0.0)
+        scores[counts[:, 0] > counts[:, 1]] = (0.0, 1.0)
+        return scores
+
+    def decode_action(self, action: int, agent_id: int) -> Action:
+        if action == DRAW:
+            return Action(draw_card=True)
+        if action == PASS:
+            return Action(is_pass=True)
+        if action >= EIGHT_ACTIONS:
+            eight, suit = divmod(action - EIGHT_ACTIONS, len(SUITS))
+            return Action(play_card=CARDS[FIRST_EIGHT + eight], declare_suit=SUITS[suit])
+        return Action(play_card=CARDS[action])
+
+    def encode_action(self, action: Action) -> int:
+        if action.draw_card:
+            return DRAW
+        if action.is_pass:
+            return PASS
+        if action.play_card.rank == "8":
+            eight = action.play_card.id - FIRST_EIGHT
+            return EIGHT_ACTIONS + eight * len(SUITS) + SUITS.index(action.declare_suit)
+        return action.play_card.id
+
+    def _load(self, idx: int, game: DiscreteGame):
+        set_pile(self.stock, self.stock_size, idx, game.stock)
+        self.top_discard[idx] = game.discard[-1].id
+        self.current_suit[idx] = SUITS.index(game.current_suit)
+        self.current_rank[idx] = RANKS.index(game.current_rank)
@@ -0,0 +1,278 @@
+"""
+Table-driven deadwood solver for Gin Rummy.
+
+Every legal meld in the 52-card deck (sets of 3 or 4 of a kind, and runs of 3+ cards of the same
+suit with Ace low) is precomputed as a bitmask over card ids. The solver only considers melds
+that fit inside the hand mask. Results for whole hands are kept in a process-wide LRU cache
+shared by every game in the process.
+"""
+
+from collections import OrderedDict
+from itertools import combinations
+import logging
+import os
+import threading
+
+from src.games.common import CARDS, Card, Hand, RANKS, SUITS, iter_mask
+
+logger = logging.getLogger(__name__)
+
+# Rank order for runs (Ace low, no wrap-around)
+RUN_RANKS = ["A", "2", "3", "4", "5", "6", "7", "8", "9", "T", "J", "Q", "K"]
+
+
+def _card_value(card: Card) -> int:
+    if card.rank in ["T", "J", "Q", "K"]:
+        return 10
+    if card.rank == "A":
+        return 1
+    return int(card.rank)
+
+
+def _build_melds() -> dict[int, tuple[Card, ...]]:
+    melds: dict[int, tuple[Card, ...]] = {}
+
+    # Sets: 4 of a kind and every 3-card subset of it
+    for rank in RANKS:
+        cards = [Card(rank, suit) for suit in SUITS]
+        for size in (4, 3):
+            for combo in combinations(cards, size):
+                melds[Hand(combo).mask] = combo
+
+    # Runs: 3+ consecutive ranks of one suit
+    for suit in SUITS:
+        cards = [Card(rank, suit) for rank in RUN_RANKS]
+        for start in range(len(cards) - 2):
+            for end in range(start + 3, len(cards) + 1):
+                run = tuple(cards[start:end])
+                melds[Hand(run).mask] = run
+
+    return melds
+
+
+# Point value of each card, indexed by card id
+CARD_VALUES: tuple[int, ...] = tuple(_card_value(card) for card in CARDS)
+
+# Every legal meld, keyed by mask, with its cards in natural order
+MELD_CARDS: dict[int, tuple[Card, ...]] = _build_melds()
+
+# For each card id, the masks of all melds containing that card
+MELDS_BY_CARD: tuple[tuple[int, ...], ...] = tuple(
+    tuple(meld for meld in MELD_CARDS if meld & card.bit) for card in CARDS
+)
+
+
+def mask_points(mask: int) -> int:
+    """Total point value of the cards in ``mask``."""
+    return sum(CARD_VALUES[card.id] for card in iter_mask(mask))
+
+
+def _solve(mask: int, memo: dict[int, tuple[int, tuple[int, ...]]]) -> tuple[int, tuple[int, ...]]:
+    if not mask:
+        return 0, ()
+    cached = memo.get(mask)
+    if cached is not None:
+        return cached
+
+    # The lowest card is either deadwood or part of a meld that fits inside the hand
+    low = mask & -mask
+    card_id = low.bit_length() - 1
+    points, melds = _solve(mask ^ low, memo)
+    best = (points + CARD_VALUES[card_id], melds)
+    for meld in MELDS_BY_CARD[card_id]:
+        if meld & mask == meld:
+            points, melds = _solve(mask ^ meld, memo)
+            if points < best[0]:
+                best = (points, (meld,) + melds)
+                if points == 0:
+                    break
+
+    memo[mask] = best
+    return best
+
+
+class HandCache:
+    """Bounded, thread-safe LRU cache of hand evaluations keyed by hand mask."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[int, tuple[int, tuple[int, ...]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, mask: int) -> tuple[int, tuple[int, ...]] | None:
+        with self._lock:
+            entry = self._entries.get(mask)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(mask)
+            self.hits += 1
+            return entry
+
+    def put(self, mask: int, entry: tuple[int, tuple[int, ...]]):
+        with self._lock:
+            if self.maxsize <= 0:
+                return
+            self._entries[mask] = entry
+            self._entries.move_to_end(mask)
+            self._evict()
+
+    def resize(self, maxsize: int):
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def _evict(self):
+        while len(self._entries) > max(self.maxsize, 0):
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+HAND_CACHE = HandCache(int(os.getenv("GIN_RUMMY_CACHE_SIZE", "100000")))
+
+
+def configure_cache(maxsize: int):
+    """Set the size limit of the process-wide hand cache (0 disables caching)."""
+    HAND_CACHE.resize(maxsize)
+
+
+def cache_counters() -> dict[str, int]:
+    """Hit, miss and eviction counts of this process's hand cache, which add up across processes."""
+    stats = HAND_CACHE.stats()
+    return {key: stats[key] for key in ("hits", "misses", "evictions")}
+
+
+def log_cache_stats(counters: dict[str, int] | None = None):
+    """
+    Log the hand cache's hit rate.
+
+    :param counters: cache_counters() summed over worker processes (default: this process's cache)
+    """
+    if counters is not None:
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        hit_rate = hits / (hits + misses) if hits + misses else 0.0
+        logger.info(
+            f"Gin Rummy hand cache, worker processes: {hits} hits, {misses} misses "
+            f"({hit_rate:.1%} hit rate), {counters.get('evictions', 0)} evictions"
+        )
+        return
+    stats = HAND_CACHE.stats()
+    logger.info(
+        f"Gin Rummy hand cache: {stats['hits']} hits, {stats['misses']} misses "
+        f"({stats['hit_rate']:.1%} hit rate), {stats['evictions']} evictions, "
+        f"{stats['size']}/{stats['maxsize']} entries"
+    )
+
+
+def _solve_cached(mask: int, memo: dict) -> tuple[int, tuple[int, ...]]:
+    entry = HAND_CACHE.get(mask)
+    if entry is None:
+        entry = _solve(mask, memo)
+        HAND_CACHE.put(mask, entry)
+    return entry
+
+
+def solve(mask: int) -> tuple[int, tuple[int, ...]]:
+    """
+    Find the minimum deadwood of a hand.
+
+    :param mask: hand mask
+    :return: (deadwood points, masks of the melds in the optimal split)
+    """
+    return _solve_cached(mask, {})
+
+
+def deadwood(mask: int) -> int:
+    """Minimum deadwood points of a hand."""
+    return solve(mask)[0]
+
+
+def leave_one_out(mask: int) -> dict[Card, int]:
+    """Minimum deadwood after discarding each card of the hand, for all cards in one call."""
+    memo = {}
+    return {card: _solve_cached(mask ^ card.bit, memo)[0] for card in iter_mask(mask)}
+
+
+class HandEvaluation:
+    """
+    Deadwood state of one player's hand, kept up to date as single cards are added or removed.
+
+    Adding a card scores every possible discard from the new hand (discarding the card just added
+    gives back the previous deadwood), so the discard that follows is a lookup.
+    """
+
+    def __init__(self, mask: int):
+        self.mask = mask
+        self.points = deadwood(mask)
+        self._discard_points: dict[Card, int] | None = None
+
+    def copy(self) -> "HandEvaluation":
+        # The discard points dict is replaced, never mutated, so it can be shared
+        evaluation = HandEvaluation.__new__(HandEvaluation)
+        evaluation.mask = self.mask
+        evaluation.points = self.points
+        evaluation._discard_points = self._discard_points
+        return evaluation
+
+    def add(self, card: Card):
+        previous_points = self.points
+        self.mask |= card.bit
+        self.points = deadwood(self.mask)
+        memo = {}
+        self._discard_points = {
+            c: previous_points if c is card else _solve_cached(self.mask ^ c.bit, memo)[0]
+            for c in iter_mask(self.mask)
+        }
+
+    def remove(self, card: Card):
+        points = self._discard_points.get(card) if self._discard_points is not None else None
+        self.mask ^= card.bit
+        self.points = deadwood(self.mask) if points is None else points
+        self._discard_points = None
+
+    @property
+    def discard_points(self) -> dict[Card, int]:
+        """Deadwood after discarding each card of the hand."""
+        if self._discard_points is None:
+            self._discard_points = leave_one_out(self.mask)
+        return self._discard_points
+
+    @property
+    def melds(self) -> tuple[int, ...]:
+        return solve(self.mask)[1]
+
+    @property
+    def gin_discards(self) -> list[Card]:
+        return [card for card, points in self.discard_points.items() if points == 0]
+
+    @property
+    def knock_discards(self) -> list[Card]:
+        return [card for card, points in self.discard_points.items() if 0 < points <= 10]
+
+
+def meld_cards(meld: int) -> list[Card]:
+    """Cards of a meld mask, in natural order."""
+    return list(MELD_CARDS[meld])
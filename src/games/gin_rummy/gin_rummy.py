@@ -1,11 +1,11 @@
 from dataclasses import dataclass
-from collections import defaultdict
-import random
 import logging
-from itertools import combinations
-from enum import Enum, auto
+import random
+from enum import Enum, IntEnum, auto
 
-from src.games.common import Card, Deck, DiscreteGame
+from src.games.common import CARDS, Card, Deck, DiscreteGame, Hand, LazyValue, cards_mask
+from src.games.common import card_ids, cards_from_ids, pile_top, restore_pile
+from src.games.gin_rummy import deadwood
 
 
 class ActionType(Enum):
@@ -18,7 +18,7 @@ class ActionType(Enum):
     GIN = auto()
 
 
-@dataclass
+@dataclass(frozen=True)
 class Action:
     """Represents a single move in Gin Rummy."""
 
@@ -30,26 +30,102 @@ class Action:
             return f"{self.action_type.name}({self.card})"
         return self.action_type.name
 
-    def __eq__(self, other):
-        if not isinstance(other, Action):
-            return NotImplemented
+    def encode(self) -> tuple[int, int]:
+        """Integer form (action type, card id or -1) stored in event records."""
+        return self.action_type.value, self.card.id if self.card else -1
+
+    @classmethod
+    def decode(cls, action_type: int, card_id: int) -> "Action":
+        return cls(ActionType(action_type), CARDS[card_id] if card_id >= 0 else None)
+
+
+@dataclass(frozen=True)
+class TurnAction:
+    """
+    A draw and the move that follows it, chosen in one decision (compound turns).
+
+    ``follow_up`` is a DISCARD, KNOCK or GIN. After a stock draw it can be a DISCARD of a card
+    already in hand, a DISCARD without a card (discard the drawn card), or None to choose once the
+    drawn card is known.
+    """
+
+    draw: Action
+    follow_up: Action | None = None
+
+    def __str__(self):
+        if self.follow_up is None:
+            return f"{self.draw} then choose what to discard"
+        if self.follow_up.card is None:
+            return f"{self.draw} then DISCARD(the drawn card)"
+        return f"{self.draw} then {self.follow_up}"
+
+
+class Event(IntEnum):
+    ACTION = auto()  # agent_id, *action.encode()
+    GIN = auto()  # agent_id
+    KNOCK = auto()  # knocker, knocker_points, opponent, opponent_points
+    STOCK_EMPTY = auto()  # agent_id, points, agent_id, points
+    DRAW = auto()
+
+
+EVENT_FORMATS = {
+    Event.ACTION: lambda agent_id, *action: f"[Agent {agent_id}] {Action.decode(*action)}",
+    Event.GIN: lambda agent_id: f"Agent {agent_id} goes Gin!",
+    Event.KNOCK: lambda knocker, knocker_points, opponent, opponent_points: (
+        f"Agent {knocker} knocks with {knocker_points} points, "
+        f"Agent {opponent} has {opponent_points} points"
+    ),
+    Event.STOCK_EMPTY: lambda agent_0, points_0, agent_1, points_1: (
+        f"Stock empty. Agent {agent_0} has {points_0} points, "
+        f"Agent {agent_1} has {points_1} points."
+    ),
+    Event.DRAW: lambda: "Game is a draw.",
+}
+
+COMPOUND_TURNS_RULES = """
+
+## Compound Turns
 
-        return self.action_type == other.action_type and self.card == other.card
+Each turn is chosen as one action: where to draw from together with the card to discard (or to
+knock or go Gin with). When drawing from the stock you may name the discard in advance, discard
+the card you draw, or choose the discard once you have seen the drawn card.
+"""
 
 
 class GinRummy(DiscreteGame):
 
-    def __init__(self, agent_ids: list[int], log_events: bool = False):
-        super().__init__(agent_ids=agent_ids, game_name="gin_rummy", log_events=log_events)
+    def __init__(
+        self,
+        agent_ids: list[int],
+        log_events: bool = False,
+        seed: int | None = None,
+        compound_turns: bool = False,
+    ):
+        """
+        :param compound_turns: offer each draw together with the discard, knock or gin that
+            follows it as one TurnAction, halving the decisions per turn
+        """
+        self.compound_turns = compound_turns
+        super().__init__(
+            agent_ids=agent_ids,
+            game_name="gin_rummy",
+            log_events=log_events,
+            event_formats=EVENT_FORMATS,
+            seed=seed,
+        )
         if self.num_agents != 2:
             raise NotImplementedError("Only 2-player Gin Rummy is supported")
+        self.evaluations: dict[int, deadwood.HandEvaluation] = {}
+
+    def options(self) -> dict:
+        return {"compound_turns": self.compound_turns}
 
     def init_game(self):
         """Deal 10 cards to each player, create stock and discard piles."""
-        deck = Deck()
+        deck = Deck(rng=self.rng)
 
         # Deal 10 cards to each player
-        self.hands = {agent_id: deck.deal(10) for agent_id in self.agent_ids}
+        self.hands = {agent_id: Hand(deck.deal(10)) for agent_id in self.agent_ids}
 
         # Remaining cards become stock
         self.stock = deck.deal(len(deck))
@@ -59,26 +135,36 @@ class GinRummy(DiscreteGame):
 
         # Game starts with upcard phase
         self.phase = "upcard_draw"  # Phases: upcard_draw, upcard_discard, draw, discard
-        self.current_agent = random.choice(self.agent_ids)
+        self.current_agent = self.rng.choice(self.agent_ids)
         self.upcard_passed_by = set()  # Track who passed on upcard
+        # Cards each player took from the discard pile, which the opponent has seen
+        self.public_cards = {agent_id: 0 for agent_id in self.agent_ids}
 
         logging.debug(
             f"GinRummy initialized - upcard {self.discard[-1]}, starting agent {self.current_agent}"
         )
 
-    def step(self, action: Action | None) -> int | None:
+    def load_rules(self) -> str:
+        rules = super().load_rules()
+        return rules + COMPOUND_TURNS_RULES if self.compound_turns else rules
+
+    def step(self, action: Action | TurnAction | None) -> int | None:
         """Process one turn action."""
         assert not self.done, "Cannot take step - game already finished"
         assert action is not None, "Action required"
+        if isinstance(action, TurnAction):
+            return self._step_turn(action)
+        self.version += 1
 
-        self.event_log.push(f"[Agent {self.current_agent}] {action}")
+        self.event_log.push(Event.ACTION, self.current_agent, *action.encode())
 
         # Handle upcard phase
         if self.phase == "upcard_draw":
             if action.action_type == ActionType.TAKE_UPCARD:
                 # Player takes upcard, now must discard
                 upcard = self.discard.pop()
-                self.hands[self.current_agent].append(upcard)
+                self._add_card(upcard)
+                self.public_cards[self.current_agent] |= upcard.bit
                 self.phase = "upcard_discard"
 
             elif action.action_type == ActionType.PASS_UPCARD:
@@ -118,12 +204,13 @@ class GinRummy(DiscreteGame):
             # Player must draw a card
             if action.action_type == ActionType.DRAW_FROM_STOCK:
                 card = self.stock.pop()
-                self.hands[self.current_agent].append(card)
+                self._add_card(card)
                 self.phase = "discard"
 
             elif action.action_type == ActionType.DRAW_FROM_DISCARD:
                 card = self.discard.pop()
-                self.hands[self.current_agent].append(card)
+                self._add_card(card)
+                self.public_cards[self.current_agent] |= card.bit
                 self.phase = "discard"
 
             return self.current_agent
@@ -155,10 +242,39 @@ class GinRummy(DiscreteGame):
 
         return self.current_agent
 
+    def _step_turn(self, action: TurnAction) -> int | None:
+        """A compound turn is played as its draw step followed by its follow-up step."""
+        pile = self.stock if action.draw.action_type == ActionType.DRAW_FROM_STOCK else self.discard
+        drawn = pile[-1]
+        self.step(action.draw)
+        follow_up = action.follow_up
+        if follow_up is None:
+            return self.current_agent
+        if follow_up.card is None:
+            follow_up = Action(follow_up.action_type, drawn)
+        return self.step(follow_up)
+
+    def _evaluation(self, agent_id: int) -> deadwood.HandEvaluation:
+        """
+        Deadwood state of an agent's hand, rebuilt if the hand was replaced or edited directly.
+        """
+        hand_mask = self.hands[agent_id].mask
+        evaluation = self.evaluations.get(agent_id)
+        if evaluation is None or evaluation.mask != hand_mask:
+            evaluation = self.evaluations[agent_id] = deadwood.HandEvaluation(hand_mask)
+        return evaluation
+
+    def _add_card(self, card: Card):
+        """Add card to current player's hand."""
+        evaluation = self._evaluation(self.current_agent)
+        self.hands[self.current_agent].append(card)
+        evaluation.add(card)
+
     def _discard_card(self, card: Card):
         """Remove card from current player's hand and add to discard pile."""
-        hand = self.hands[self.current_agent]
-        hand.remove(card)
+        evaluation = self._evaluation(self.current_agent)
+        self.hands[self.current_agent].remove(card)
+        evaluation.remove(card)
         self.discard.append(card)
 
     def _can_gin(self) -> bool:
@@ -168,12 +284,7 @@ class GinRummy(DiscreteGame):
             return False
 
         # Check if any 10-card subset is a gin hand
-        for card_to_discard in hand:
-            temp_hand = hand[:]
-            temp_hand.remove(card_to_discard)
-            if self._get_unmatched_points(temp_hand) == 0:
-                return True
-        return False
+        return bool(self._evaluation(self.current_agent).gin_discards)
 
     def _can_knock(self) -> bool:
         """Check if current player can knock (unmatched points <= 10)."""
@@ -182,19 +293,13 @@ class GinRummy(DiscreteGame):
             return False
 
         # Check if any 10-card subset is a knock-able hand
-        for card_to_discard in hand:
-            temp_hand = hand[:]
-            temp_hand.remove(card_to_discard)
-            unmatched_points = self._get_unmatched_points(temp_hand)
-            if 0 < unmatched_points <= 10:
-                return True
-        return False
+        return bool(self._evaluation(self.current_agent).knock_discards)
 
     def _end_game_gin(self):
         """End game with gin."""
         self.done = True
         self.winner = self.current_agent
-        self.event_log.push(f"Agent {self.current_agent} goes Gin!")
+        self.event_log.push(Event.GIN, self.current_agent)
 
     def _end_game_knock(self):
         """End game with knock."""
@@ -202,18 +307,15 @@ class GinRummy(DiscreteGame):
         knocker = self.current_agent
         opponent = 1 - knocker
 
-        knocker_points = self._get_unmatched_points(self.hands[knocker])
-        opponent_points = self._get_unmatched_points(self.hands[opponent])
+        knocker_points = self._evaluation(knocker).points
+        opponent_points = self._evaluation(opponent).points
 
         if knocker_points < opponent_points:
             self.winner = knocker
         else:
             self.winner = opponent  # Undercut
 
-        self.event_log.push(
-            f"Agent {knocker} knocks with {knocker_points} points, "
-            f"Agent {opponent} has {opponent_points} points"
-        )
+        self.event_log.push(Event.KNOCK, knocker, knocker_points, opponent, opponent_points)
 
     def _end_game_stock_empty(self):
         """End game when stock is empty. Player with fewest points wins."""
@@ -222,12 +324,11 @@ class GinRummy(DiscreteGame):
         player_0_id = self.agent_ids[0]
         player_1_id = self.agent_ids[1]
 
-        player_0_points = self._get_unmatched_points(self.hands[player_0_id])
-        player_1_points = self._get_unmatched_points(self.hands[player_1_id])
+        player_0_points = self._evaluation(player_0_id).points
+        player_1_points = self._evaluation(player_1_id).points
 
         self.event_log.push(
-            f"Stock empty. Agent {player_0_id} has {player_0_points} points, "
-            f"Agent {player_1_id} has {player_1_points} points."
+            Event.STOCK_EMPTY, player_0_id, player_0_points, player_1_id, player_1_points
         )
 
         if player_0_points < player_1_points:
@@ -236,144 +337,16 @@ class GinRummy(DiscreteGame):
             self.winner = player_1_id
         else:
             # It's a draw, winner remains None
-            self.event_log.push("Game is a draw.")
-
-    def _get_rank_sort_value(self, card: Card) -> int:
-        """Get the numerical sort value for a card's rank (Ace low)."""
-        if card.rank.isdigit():
-            return int(card.rank)
-        return {"T": 10, "J": 11, "Q": 12, "K": 13, "A": 1}[card.rank]
-
-    def _get_card_value(self, card: Card) -> int:
-        """Return the point value of a single card."""
-        if card.rank in ["T", "K", "Q", "J"]:
-            return 10
-        if card.rank == "A":
-            return 1
-        return int(card.rank)
-
-    def _get_all_melds(self, hand: list[Card]) -> list[list[Card]]:
-        """Find all possible sets and runs in a hand."""
-        melds = []
-
-        # Find sets (3 or 4 of a kind)
-        by_rank = defaultdict(list)
-        for card in hand:
-            by_rank[card.rank].append(card)
-
-        for rank in by_rank:
-            cards_of_rank = by_rank[rank]
-            if len(cards_of_rank) == 3:
-                melds.append(cards_of_rank)
-            elif len(cards_of_rank) == 4:
-                # Add the 4-card set
-                melds.append(cards_of_rank)
-                # Add all possible 3-card subsets
-                for combo in combinations(cards_of_rank, 3):
-                    melds.append(list(combo))
-
-        # Find runs (3+ sequential cards of same suit)
-        by_suit = defaultdict(list)
-        for card in hand:
-            by_suit[card.suit].append(card)
-
-        for suit in by_suit:
-            cards = sorted(by_suit[suit], key=self._get_rank_sort_value)
-            if len(cards) < 3:
-                continue
-
-            for i in range(len(cards) - 2):
-                for j in range(i + 2, len(cards)):
-                    run = cards[i : j + 1]
-                    # Ace-high runs are invalid
-                    if run[-1].rank == "A" and run[-2].rank == "K":
-                        continue
-
-                    is_run = True
-                    for k in range(len(run) - 1):
-                        if (
-                            self._get_rank_sort_value(run[k + 1])
-                            != self._get_rank_sort_value(run[k]) + 1
-                        ):
-                            is_run = False
-                            break
-                    if is_run:
-                        melds.append(run)
-
-        return melds
-
-    def _get_unmatched_points(self, hand: list[Card]) -> int:
-        """Recursively find the minimum deadwood points in a hand."""
-        memo = {}
-
-        def get_min_points(current_hand_tuple: tuple[Card, ...]) -> int:
-            if not current_hand_tuple:
-                return 0
-
-            if current_hand_tuple in memo:
-                return memo[current_hand_tuple]
-
-            current_hand_list = list(current_hand_tuple)
-
-            # Base case: score of hand with no melds
-            min_points = sum(self._get_card_value(c) for c in current_hand_list)
-
-            # Find all possible melds in the current hand
-            possible_melds = self._get_all_melds(current_hand_list)
-
-            for meld in possible_melds:
-                # Create the remaining hand after using this meld
-                remaining_hand = current_hand_list[:]
-                for card in meld:
-                    remaining_hand.remove(card)
-
-                # Recursively find the score of the rest of the hand
-                # Sort by suit then rank to create a canonical tuple for memoization
-                key = tuple(
-                    sorted(remaining_hand, key=lambda c: (c.suit, self._get_rank_sort_value(c)))
-                )
-                meld_score = get_min_points(key)
-                min_points = min(min_points, meld_score)
-
-            memo[current_hand_tuple] = min_points
-            return min_points
-
-        # Initial call with the sorted tuple of the hand
-        initial_key = tuple(sorted(hand, key=lambda c: (c.suit, self._get_rank_sort_value(c))))
-        return get_min_points(initial_key)
-
-    def _get_optimal_meld_combination(self, hand: list[Card]) -> list[list[Card]]:
-        """Find the combination of melds that results in the minimum deadwood points."""
-
-        # Find all melds
-        melds = self._get_all_melds(hand)
-
-        # Find all combinations of non-overlapping melds
-        meld_combos = []
-        for i in range(1, len(melds) + 1):
-            for combo in combinations(melds, i):
-                # Check for overlapping cards
-                flat_list = [card for meld in combo for card in meld]
-                if len(flat_list) == len(set(flat_list)):
-                    meld_combos.append(combo)
-
-        # Start with the case of no melds, where deadwood is the whole hand
-        min_points = sum(self._get_card_value(c) for c in hand)
-        best_melds_combo = []
-
-        for combo in meld_combos:
-            melded_cards = {card for meld in combo for card in meld}
-
-            current_points = 0
-            for card in hand:
-                if card not in melded_cards:
-                    current_points += self._get_card_value(card)
+            self.event_log.push(Event.DRAW)
 
-            if current_points <= min_points:
-                min_points = current_points
-                best_melds_combo = list(combo)
+    def _get_unmatched_points(self, hand: list[Card] | Hand) -> int:
+        """Find the minimum deadwood points in a hand."""
+        return deadwood.deadwood(cards_mask(hand))
 
-        return best_melds_combo
+    def _get_optimal_meld_combination(self, hand: list[Card] | Hand) -> list[list[Card]]:
+        """Find the combination of melds that results in the minimum deadwood points."""
+        _, melds = deadwood.solve(cards_mask(hand))
+        return [deadwood.meld_cards(meld) for meld in melds]
 
     def _get_unmatched_cards(self, hand: list[Card]) -> list[Card]:
         """Find the specific cards that are unmatched when minimizing deadwood points."""
@@ -381,8 +354,8 @@ class GinRummy(DiscreteGame):
         best_melds = self._get_optimal_meld_combination(hand)
 
         # Get the cards that are not in the best meld combination
-        melded_cards = {card for meld in best_melds for card in meld}
-        unmatched = [card for card in hand if card not in melded_cards]
+        melded_mask = Hand(card for meld in best_melds for card in meld).mask
+        unmatched = [card for card in hand if not card.bit & melded_mask]
 
         return unmatched
 
@@ -390,7 +363,7 @@ class GinRummy(DiscreteGame):
         """Switch to the next player."""
         self.current_agent = (self.current_agent + 1) % self.num_agents
 
-    def get_agent_actions(self, agent_id: int) -> list[Action]:
+    def _get_agent_actions(self, agent_id: int) -> list[Action]:
         """Return list of valid actions for the given agent."""
         if agent_id != self.current_agent:
             return []
@@ -398,6 +371,9 @@ class GinRummy(DiscreteGame):
         actions = []
         hand = self.hands[agent_id]
 
+        if self.compound_turns and self.phase in ("upcard_draw", "draw"):
+            return self._get_turn_actions(hand)
+
         if self.phase == "upcard_draw":
             # Can take upcard or pass
             if len(self.discard) > 0:
@@ -405,30 +381,8 @@ class GinRummy(DiscreteGame):
             actions.append(Action(action_type=ActionType.PASS_UPCARD))
 
         elif self.phase == "upcard_discard" or self.phase == "discard":
-            # Can discard any card from hand
-            for card in hand:
-                actions.append(Action(action_type=ActionType.DISCARD, card=card))
-
-            # Can also knock or go gin if conditions are met
-            gin_discards = []
-            knock_discards = []
-
-            if len(hand) == 11:
-                for card_to_discard in hand:
-                    temp_hand = hand[:]
-                    temp_hand.remove(card_to_discard)
-                    points = self._get_unmatched_points(temp_hand)
-                    if points == 0:
-                        gin_discards.append(card_to_discard)
-                    elif 0 < points <= 10:
-                        knock_discards.append(card_to_discard)
-
-            if gin_discards:
-                for card in gin_discards:
-                    actions.append(Action(action_type=ActionType.GIN, card=card))
-            elif knock_discards:
-                for card in knock_discards:
-                    actions.append(Action(action_type=ActionType.KNOCK, card=card))
+            evaluation = self._evaluation(agent_id) if len(hand) == 11 else None
+            actions = self._discard_actions(hand, evaluation)
 
         elif self.phase == "draw":
             # Can draw from stock or discard pile
@@ -439,7 +393,54 @@ class GinRummy(DiscreteGame):
 
         return actions
 
-    def get_agent_state(self, agent_id: int) -> dict:
+    def _discard_actions(
+        self, hand: Hand, evaluation: deadwood.HandEvaluation | None
+    ) -> list[Action]:
+        """
+        Discards of any card in hand, then the gin (or else knock) discards of an 11-card hand.
+        """
+        # Can discard any card from hand
+        actions = [Action(action_type=ActionType.DISCARD, card=card) for card in hand]
+
+        # Can also knock or go gin if conditions are met
+        gin_discards = evaluation.gin_discards if evaluation is not None else []
+        knock_discards = evaluation.knock_discards if evaluation is not None else []
+        if gin_discards:
+            for card in gin_discards:
+                actions.append(Action(action_type=ActionType.GIN, card=card))
+        elif knock_discards:
+            for card in knock_discards:
+                actions.append(Action(action_type=ActionType.KNOCK, card=card))
+        return actions
+
+    def _get_turn_actions(self, hand: Hand) -> list[Action | TurnAction]:
+        """Compound turn actions for the upcard and draw phases."""
+        actions = []
+        if self.phase == "upcard_draw":
+            if len(self.discard) > 0:
+                # Knocking right after taking the upcard has no effect, so only discards are offered
+                take = Action(action_type=ActionType.TAKE_UPCARD)
+                upcard_hand = Hand.from_mask(hand.mask | self.discard[-1].bit)
+                for follow_up in self._discard_actions(upcard_hand, None):
+                    actions.append(TurnAction(take, follow_up))
+            actions.append(Action(action_type=ActionType.PASS_UPCARD))
+            return actions
+
+        if len(self.stock) > 2:
+            draw = Action(action_type=ActionType.DRAW_FROM_STOCK)
+            actions.append(TurnAction(draw))
+            actions.append(TurnAction(draw, Action(action_type=ActionType.DISCARD)))
+            for card in hand:
+                actions.append(TurnAction(draw, Action(action_type=ActionType.DISCARD, card=card)))
+        if len(self.discard) > 0:
+            draw = Action(action_type=ActionType.DRAW_FROM_DISCARD)
+            drawn_hand = Hand.from_mask(hand.mask | self.discard[-1].bit)
+            evaluation = deadwood.HandEvaluation(drawn_hand.mask)
+            for follow_up in self._discard_actions(drawn_hand, evaluation):
+                actions.append(TurnAction(draw, follow_up))
+        return actions
+
+    def _get_agent_state(self, agent_id: int) -> dict:
         """Return observable state for the given agent."""
         hand = self.hands[agent_id]
         return {
@@ -447,9 +448,81 @@ class GinRummy(DiscreteGame):
             "top_discard": self.discard[-1] if self.discard else None,
             "stock_size": len(self.stock),
             "phase": self.phase,
-            "best_melds": self._get_optimal_meld_combination(hand),
-            "unmatched_points": self._get_unmatched_points(hand),
+            "best_melds": LazyValue(
+                lambda: [deadwood.meld_cards(meld) for meld in self._evaluation(agent_id).melds]
+            ),
+            "unmatched_points": LazyValue(lambda: self._evaluation(agent_id).points),
+        }
+
+    def _clone_state(self, clone: "GinRummy"):
+        clone.stock = list(self.stock)
+        clone.discard = list(self.discard)
+        clone.upcard_passed_by = set(self.upcard_passed_by)
+        clone.public_cards = dict(self.public_cards)
+        clone.evaluations = {
+            agent_id: evaluation.copy() for agent_id, evaluation in self.evaluations.items()
+        }
+
+    def _save_undo(self) -> tuple:
+        return (
+            pile_top(self.stock),
+            pile_top(self.discard),
+            self.phase,
+            set(self.upcard_passed_by),
+            dict(self.public_cards),
+            {agent_id: evaluation.copy() for agent_id, evaluation in self.evaluations.items()},
+            hasattr(self, "winner"),
+        )
+
+    def _restore_undo(self, record: tuple):
+        stock, discard, self.phase, self.upcard_passed_by, self.public_cards = record[:5]
+        self.evaluations, had_winner = record[5:]
+        restore_pile(self.stock, stock)
+        restore_pile(self.discard, discard)
+        # A game only gets a winner on its final step, so there was none before it
+        if not had_winner and hasattr(self, "winner"):
+            del self.winner
+
+    def _snapshot_state(self) -> dict:
+        state = {
+            "stock": card_ids(self.stock),
+            "discard": card_ids(self.discard),
+            "phase": self.phase,
+            "upcard_passed_by": sorted(self.upcard_passed_by),
+            "public_cards": {str(agent_id): mask for agent_id, mask in self.public_cards.items()},
+        }
+        # No winner attribute means the game is undecided (or a draw once done)
+        if hasattr(self, "winner"):
+            state["winner"] = self.winner
+        return state
+
+    def _restore_state(self, state: dict):
+        self.stock = cards_from_ids(state["stock"])
+        self.discard = cards_from_ids(state["discard"])
+        self.phase = state["phase"]
+        self.upcard_passed_by = set(state["upcard_passed_by"])
+        self.public_cards = {
+            int(agent_id): mask for agent_id, mask in state.get("public_cards", {}).items()
         }
+        if "winner" in state:
+            self.winner = state["winner"]
+        elif hasattr(self, "winner"):
+            del self.winner
+        self.evaluations = {}
+
+    def _hidden_piles(self) -> list[list[Card]]:
+        return [self.stock]
+
+    def _known_cards(self, observer: int, agent_id: int, unseen: int, rng: random.Random) -> int:
+        return self.public_cards.get(agent_id, 0) & self.hands[agent_id].mask
+
+    @classmethod
+    def stats_counters(cls) -> dict[str, int]:
+        return deadwood.cache_counters()
+
+    @classmethod
+    def log_stats(cls, counters: dict[str, int] | None = None):
+        deadwood.log_cache_stats(counters)
 
     def get_agent_scores(self) -> dict[int, float]:
         """Return the game result."""
@@ -461,6 +534,22 @@ class GinRummy(DiscreteGame):
 
         return {0: 1.0, 1: 0.0} if self.winner == 0 else {0: 0.0, 1: 1.0}
 
-    def validate_action(self, agent_id: int, action: Action) -> bool:
-        """Check if action is valid for the given agent."""
-        return action in self.get_agent_actions(agent_id)
+
+class CompoundGinRummy(GinRummy):
+    """Gin Rummy with compound turns, to pass as the game of a tournament."""
+
+    def __init__(self, agent_ids: list[int], log_events: bool = False, seed: int | None = None):
+        super().__init__(agent_ids, log_events, seed, compound_turns=True)
+
+    def options(self) -> dict:
+        # Compound turns are built in rather than passed to the constructor
+        return {}
+
+
+def take_gin(game: GinRummy, agent_id: int, actions: list) -> Action | TurnAction | None:
+    """Move rule for the controller: going gin wins the game, so play it whenever it is legal."""
+    for action in actions:
+        final = action.follow_up if isinstance(action, TurnAction) else action
+        if final is not None and final.action_type == ActionType.GIN:
+            return action
+    return None
@@ -0,0 +1,219 @@
+import numpy as np
+
+from src.games.common import CARDS, RANK_MASKS, SUITS, DiscreteGame
+from src.games.gin_rummy import deadwood
+from src.games.gin_rummy.gin_rummy import Action, ActionType, GinRummy
+from src.games.vector import (
+    CARD_BITS,
+    MAX_TURNS,
+    N_CARDS,
+    VectorGame,
+    RANK_MASK_ARRAY,
+    mask_to_array,
+    pile_pop,
+    pile_push,
+    set_pile,
+)
+
+CARDS_PER_AGENT = 10
+PHASES = ["upcard_draw", "upcard_discard", "draw", "discard"]
+UPCARD_DRAW, UPCARD_DISCARD, DRAW, DISCARD = range(len(PHASES))
+# Actions: the four draws, then discard, knock and gin with card c (c added to the first index)
+DRAW_FROM_STOCK, DRAW_FROM_DISCARD, TAKE_UPCARD, PASS_UPCARD = range(4)
+DISCARD_CARD = 4
+KNOCK_CARD = DISCARD_CARD + N_CARDS
+GIN_CARD = KNOCK_CARD + N_CARDS
+NO_WINNER = -1
+MAX_KNOCK_POINTS = 10
+CARD_VALUES = np.array(deadwood.CARD_VALUES)
+ACES = np.uint64(RANK_MASKS["A"])
+DRAW_ACTIONS = {
+    DRAW_FROM_STOCK: ActionType.DRAW_FROM_STOCK,
+    DRAW_FROM_DISCARD: ActionType.DRAW_FROM_DISCARD,
+    TAKE_UPCARD: ActionType.TAKE_UPCARD,
+    PASS_UPCARD: ActionType.PASS_UPCARD,
+}
+CARD_ACTIONS = {
+    DISCARD_CARD: ActionType.DISCARD,
+    KNOCK_CARD: ActionType.KNOCK,
+    GIN_CARD: ActionType.GIN,
+}
+
+
+def meldable(hands: np.ndarray) -> np.ndarray:
+    """Masks of the cards of each hand that belong to at least one meld inside the hand."""
+    sets = np.bitwise_or.reduce(
+        np.where(
+            np.bitwise_count(hands[:, None] & RANK_MASK_ARRAY) >= 3,
+            hands[:, None] & RANK_MASK_ARRAY,
+            np.uint64(0),
+        ),
+        axis=1,
+    )
+    # Runs are Ace low: move the aces below the twos, so each suit steps by len(SUITS) bits
+    shift = np.uint64(len(SUITS))
+    ace_shift = np.uint64(len(CARDS) - len(SUITS))
+    low = ((hands & ~ACES) << shift) | ((hands & ACES) >> ace_shift)
+    starts = low & (low >> shift) & (low >> (shift * np.uint64(2)))
+    runs = starts | (starts << shift) | (starts << (shift * np.uint64(2)))
+    runs = (runs >> shift) | ((runs & np.uint64(0b1111)) << ace_shift)
+    return sets | runs
+
+
+def may_knock(hands: np.ndarray) -> np.ndarray:
+    """
+    False for 11-card hands that can't knock whatever they discard: cards outside every meld are
+    deadwood in any split, so their points (less the highest one, if discarded) bound the deadwood
+    from below.
+    """
+    loose = mask_to_array(hands & ~meldable(hands)) * CARD_VALUES
+    return loose.sum(axis=1) - loose.max(axis=1) <= MAX_KNOCK_POINTS
+
+
+class GinRummyVector(VectorGame):
+    """
+    Two-player Gin Rummy on NumPy arrays. Card moves are vectorized; deadwood is still solved hand
+    by hand, through the shared solver cache, for the games that need it on a step.
+    """
+
+    game_cls = GinRummy
+    num_actions = GIN_CARD + N_CARDS
+
+    def __init__(self, batch_size: int, seed: int | None = None, max_turns: int | None = MAX_TURNS):
+        self.stock = np.zeros((batch_size, N_CARDS), dtype=np.int8)
+        self.stock_size = np.zeros(batch_size, dtype=np.int64)
+        self.discard = np.zeros((batch_size, N_CARDS), dtype=np.int8)
+        self.discard_size = np.zeros(batch_size, dtype=np.int64)
+        self.phase = np.zeros(batch_size, dtype=np.int64)
+        self.upcard_passed_by = np.zeros(batch_size, dtype=np.int64)  # A bit per agent
+        self.winner = np.zeros(batch_size, dtype=np.int64)
+        super().__init__(batch_size, seed, max_turns)
+
+    def _deal(self, idx: np.ndarray, decks: np.ndarray):
+        bits = CARD_BITS[decks]
+        for agent_id in range(self.num_agents):
+            dealt = bits[:, agent_id * CARDS_PER_AGENT : (agent_id + 1) * CARDS_PER_AGENT]
+            self.hands[idx, agent_id] = np.bitwise_or.reduce(dealt, axis=1)
+        n_dealt = self.num_agents * CARDS_PER_AGENT
+        self.stock[idx] = 0
+        self.stock[idx, : N_CARDS - n_dealt] = decks[:, n_dealt:]
+        self.stock_size[idx] = N_CARDS - n_dealt
+        self.discard[idx] = 0
+        self.discard_size[idx] = 0
+        pile_push(self.discard, self.discard_size, idx, pile_pop(self.stock, self.stock_size, idx))
+        self.phase[idx] = UPCARD_DRAW
+        self.upcard_passed_by[idx] = 0
+        self.winner[idx] = NO_WINNER
+        self.current_agent[idx] = self.rng.integers(0, self.num_agents, len(idx))
+
+    def _legal_actions(self, legal: np.ndarray):
+        hands = self.hands[np.arange(self.batch_size), self.current_agent]
+
+        upcard = self.phase == UPCARD_DRAW
+        legal[upcard, TAKE_UPCARD] = self.discard_size[upcard] > 0
+        legal[upcard, PASS_UPCARD] = True
+
+        drawing = self.phase == DRAW
+        legal[drawing, DRAW_FROM_STOCK] = self.stock_size[drawing] > 2
+        legal[drawing, DRAW_FROM_DISCARD] = self.discard_size[drawing] > 0
+
+        discarding = np.flatnonzero((self.phase == UPCARD_DISCARD) | (self.phase == DISCARD))
+        legal[discarding, DISCARD_CARD:KNOCK_CARD] = mask_to_array(hands[discarding])
+        full = discarding[np.bitwise_count(hands[discarding]) == 11]
+        for game_idx in full[may_knock(hands[full])]:
+            discard_points = deadwood.leave_one_out(int(hands[game_idx]))
+            gin = [card.id for card, points in discard_points.items() if points == 0]
+            if gin:
+                legal[game_idx, [GIN_CARD + card_id for card_id in gin]] = True
+                continue
+            knock = [
+                card.id for card, points in discard_points.items() if 0 < points <= MAX_KNOCK_POINTS
+            ]
+            legal[game_idx, [KNOCK_CARD + card_id for card_id in knock]] = True
+
+    def observations(self) -> dict[str, np.ndarray]:
+        top = self.discard[np.arange(self.batch_size), np.maximum(self.discard_size - 1, 0)]
+        return {
+            "hand": mask_to_array(self.hands[np.arange(self.batch_size), self.current_agent]),
+            "top_discard": np.where(self.discard_size > 0, top, -1),
+            "stock_size": self.stock_size.copy(),
+            "phase": self.phase.copy(),
+        }
+
+    def _step(self, actions: np.ndarray) -> np.ndarray:
+        done = np.zeros(self.batch_size, dtype=bool)
+        agents = self.current_agent.copy()
+
+        # Draws
+        for action, pile, sizes, phase in (
+            (TAKE_UPCARD, self.discard, self.discard_size, UPCARD_DISCARD),
+            (DRAW_FROM_STOCK, self.stock, self.stock_size, DISCARD),
+            (DRAW_FROM_DISCARD, self.discard, self.discard_size, DISCARD),
+        ):
+            idx = np.flatnonzero(actions == action)
+            self.hands[idx, agents[idx]] |= CARD_BITS[pile_pop(pile, sizes, idx)]
+            self.phase[idx] = phase
+
+        passes = np.flatnonzero(actions == PASS_UPCARD)
+        self.upcard_passed_by[passes] |= 1 << agents[passes]
+        self.phase[passes[self.upcard_passed_by[passes] == 3]] = DRAW
+        self._switch_agent(passes)
+
+        # Discards. Knocking or going gin only ends the game from the discard phase; after taking
+        # the upcard it changes nothing, as in GinRummy.step().
+        card_actions = actions >= DISCARD_CARD
+        ending = card_actions & (actions >= KNOCK_CARD) & (self.phase == DISCARD)
+        discards = np.flatnonzero(card_actions & ((actions < KNOCK_CARD) | ending))
+        cards = (actions[discards] - DISCARD_CARD) % N_CARDS
+        self.hands[discards, agents[discards]] &= ~CARD_BITS[cards]
+        pile_push(self.discard, self.discard_size, discards, cards)
+
+        for game_idx in np.flatnonzero(ending):
+            agent_id = agents[game_idx]
+            if actions[game_idx] >= GIN_CARD:
+                self.winner[game_idx] = agent_id
+            else:
+                knocker, opponent = self._deadwood(game_idx)[[agent_id, 1 - agent_id]]
+                self.winner[game_idx] = agent_id if knocker < opponent else 1 - agent_id
+            done[game_idx] = True
+
+        # After a plain discard the game ends once the stock is down to two cards
+        plain = discards[actions[discards] < KNOCK_CARD]
+        for game_idx in plain[self.stock_size[plain] <= 2]:
+            points = self._deadwood(game_idx)
+            if points[0] != points[1]:
+                self.winner[game_idx] = points.argmin()
+            done[game_idx] = True
+        continuing = plain[~done[plain]]
+        self.phase[continuing] = DRAW
+        self._switch_agent(continuing)
+        return done
+
+    def _deadwood(self, game_idx: int) -> np.ndarray:
+        return np.array([deadwood.deadwood(int(hand)) for hand in self.hands[game_idx]])
+
+    def _scores(self, idx: np.ndarray) -> np.ndarray:
+        winners = self.winner[idx]
+        scores = np.full((len(idx), 2), 0.5)
+        scores[winners == 0] = (1.0, 0.0)
+        scores[winners == 1] = (0.0, 1.0)
+        return scores
+
+    def decode_action(self, action: int, agent_id: int) -> Action:
+        if action < DISCARD_CARD:
+            return Action(DRAW_ACTIONS[action])
+        first, card_id = divmod(action - DISCARD_CARD, N_CARDS)
+        return Action(list(CARD_ACTIONS.values())[first], CARDS[card_id])
+
+    def encode_action(self, action: Action) -> int:
+        for first, action_type in CARD_ACTIONS.items():
+            if action.action_type == action_type:
+                return first + action.card.id
+        return next(index for index, draw in DRAW_ACTIONS.items() if draw == action.action_type)
+
+    def _load(self, idx: int, game: DiscreteGame):
+        set_pile(self.stock, self.stock_size, idx, game.stock)
+        set_pile(self.discard, self.discard_size, idx, game.discard)
+        self.phase[idx] = PHASES.index(game.phase)
+        self.upcard_passed_by[idx] = sum(1 << agent_id for agent_id in game.upcard_passed_by)
+        self.winner[idx] = getattr(game, "winner", NO_WINNER)
@@ -1,13 +1,14 @@
 """..."""
 
 from dataclasses import dataclass
-from collections import Counter
 import random
+from enum import IntEnum, auto
 
-from src.games.common import Deck, DiscreteGame
+from src.games.common import Card, Deck, DiscreteGame, Hand, RANKS, RANK_MASKS, iter_mask
+from src.games.common import card_ids, cards_from_ids, pile_top, restore_pile
 
 
-@dataclass
+@dataclass(frozen=True)
 class Action:
     is_pass: bool = False
     rank: str | None = None
@@ -19,29 +20,66 @@ class Action:
         else:
             return f"Rank: {self.rank}, Target: {self.target_agent_id}"
 
+    def encode(self) -> tuple[int, int, int]:
+        """Integer form (is_pass, rank index or -1, target or -1) stored in event records."""
+        if self.is_pass:
+            return 1, -1, -1
+        return 0, RANKS.index(self.rank), self.target_agent_id
+
+    @classmethod
+    def decode(cls, is_pass: int, rank_idx: int, target_agent_id: int) -> "Action":
+        if is_pass:
+            return cls(is_pass=True)
+        return cls(rank=RANKS[rank_idx], target_agent_id=target_agent_id)
+
+
+class Event(IntEnum):
+    ACTION = auto()  # agent_id, *action.encode()
+    GONE_FISHING = auto()  # agent_id
+    CAUGHT = auto()  # agent_id, n_cards
+    BOOK = auto()  # agent_id, rank index
+
+
+EVENT_FORMATS = {
+    Event.ACTION: lambda agent_id, *action: f"[Agent {agent_id}] {Action.decode(*action)}",
+    Event.GONE_FISHING: lambda agent_id: f"[Agent {agent_id}] Gone fishing",
+    Event.CAUGHT: lambda agent_id, n_cards: f"[Agent {agent_id}] Caught {n_cards} cards",
+    Event.BOOK: lambda agent_id, rank_idx: f"[Agent {agent_id}] Made a book of {RANKS[rank_idx]}",
+}
+
 
 class GoFish(DiscreteGame):
 
-    def __init__(self, agent_ids: list[int], log_events: bool = False):
+    def __init__(self, agent_ids: list[int], log_events: bool = False, seed: int | None = None):
 
-        super().__init__(agent_ids=agent_ids, game_name="go_fish", log_events=log_events)
+        super().__init__(
+            agent_ids=agent_ids,
+            game_name="go_fish",
+            log_events=log_events,
+            event_formats=EVENT_FORMATS,
+            seed=seed,
+        )
         if self.num_agents != 2:
             raise NotImplementedError("Only 2-player Go Fish is supported")
 
     def init_game(self):
 
         # Init cards
-        deck = Deck()
+        deck = Deck(rng=self.rng)
         if self.num_agents in [2, 3]:
             cards_per_agent = 7
         elif self.num_agents in [4, 5]:
             cards_per_agent = 5
-        self.hands = {agent_id: deck.deal(cards_per_agent) for agent_id in self.agent_ids}
+        self.hands = {agent_id: Hand(deck.deal(cards_per_agent)) for agent_id in self.agent_ids}
         self.books: dict[int, list[str]] = {agent_id: [] for agent_id in self.agent_ids}  # Ranks
         self.stock = deck.deal(len(deck))  # Remaining cards
 
-        self.current_agent = random.choice(self.agent_ids)
+        self.current_agent = self.rng.choice(self.agent_ids)
         self.total_books = 0  # Game ends at 13
+        # What each player has revealed about their hand: cards caught from the opponent, and
+        # ranks asked for (a bit per rank index) that they must still hold
+        self.public_cards = {agent_id: 0 for agent_id in self.agent_ids}
+        self.asked_ranks = {agent_id: 0 for agent_id in self.agent_ids}
 
     def update_current_agent(self):
         self.current_agent = (self.current_agent + 1) % self.num_agents
@@ -50,42 +88,39 @@ class GoFish(DiscreteGame):
         """
         :return: current_agent
         """
+        self.version += 1
 
-        self.event_log.push(f"[Agent {self.current_agent}] {action}")
+        self.event_log.push(Event.ACTION, self.current_agent, *action.encode())
 
         if action.is_pass:
             self.update_current_agent()
             return self.current_agent
 
         # Does target have this rank?
-        target_ranks = set(card.rank for card in self.hands[action.target_agent_id])
-        if action.rank not in target_ranks:
-            self.event_log.push(f"[Agent {self.current_agent}] Gone fishing")
+        rank_bit = 1 << RANKS.index(action.rank)
+        self.asked_ranks[self.current_agent] |= rank_bit
+        hand = self.hands[self.current_agent]
+        target_hand = self.hands[action.target_agent_id]
+        if not target_hand.mask & RANK_MASKS[action.rank]:
+            self.event_log.push(Event.GONE_FISHING, self.current_agent)
             if len(self.stock) > 0:
                 card = self.stock.pop()
-                self.hands[self.current_agent].append(card)
+                hand.append(card)
         else:
-            stolen_cards = []
-            new_target_hand = []
-            for card in self.hands[action.target_agent_id]:
-                if card.rank == action.rank:
-                    stolen_cards.append(card)
-                else:
-                    new_target_hand.append(card)
-            self.hands[action.target_agent_id] = new_target_hand
-            self.hands[self.current_agent].extend(stolen_cards)
-            self.event_log.push(f"[Agent {self.current_agent}] Caught {len(stolen_cards)} cards")
+            stolen_cards = target_hand.extract(RANK_MASKS[action.rank])
+            hand.extend(stolen_cards)
+            self.public_cards[self.current_agent] |= stolen_cards.mask
+            self.asked_ranks[action.target_agent_id] &= ~rank_bit
+            self.event_log.push(Event.CAUGHT, self.current_agent, len(stolen_cards))
 
         # Check for new books
-        rank_counts = Counter(card.rank for card in self.hands[self.current_agent])
-        for rank, count in rank_counts.items():
-            if count == 4:
+        for rank_idx, rank in enumerate(RANKS):
+            if hand.mask & RANK_MASKS[rank] == RANK_MASKS[rank]:
                 self.books[self.current_agent].append(rank)
-                self.hands[self.current_agent] = [
-                    card for card in self.hands[self.current_agent] if card.rank != rank
-                ]
+                hand.extract(RANK_MASKS[rank])
+                self.asked_ranks[self.current_agent] &= ~(1 << rank_idx)
                 self.total_books += 1
-                self.event_log.push(f"[Agent {self.current_agent}] Made a book of {rank}")
+                self.event_log.push(Event.BOOK, self.current_agent, rank_idx)
 
         # Check if done
         if self.total_books == 13:
@@ -96,13 +131,12 @@ class GoFish(DiscreteGame):
         self.update_current_agent()
         return self.current_agent
 
-    def get_agent_actions(self, agent_id: int) -> list[Action]:
+    def _get_agent_actions(self, agent_id: int) -> list[Action]:
         """
         Returns a list of legal actions for the given agent.
         """
         actions = []
-        ranks = set(card.rank for card in self.hands[agent_id])
-        for rank in ranks:
+        for rank in self.hands[agent_id].ranks():
             for target_agent_id in self.agent_ids:
                 if target_agent_id == agent_id:
                     continue
@@ -111,7 +145,7 @@ class GoFish(DiscreteGame):
             actions.append(Action(is_pass=True))
         return actions
 
-    def get_agent_state(self, agent_id: int) -> dict:
+    def _get_agent_state(self, agent_id: int) -> dict:
         """
         :return: state
         """
@@ -120,6 +154,62 @@ class GoFish(DiscreteGame):
             "books": self.books[agent_id],
         }
 
+    def _clone_state(self, clone: "GoFish"):
+        clone.books = {agent_id: list(books) for agent_id, books in self.books.items()}
+        clone.stock = list(self.stock)
+        clone.public_cards = dict(self.public_cards)
+        clone.asked_ranks = dict(self.asked_ranks)
+
+    def _save_undo(self) -> tuple:
+        books = {agent_id: len(books) for agent_id, books in self.books.items()}
+        return (
+            pile_top(self.stock),
+            books,
+            self.total_books,
+            dict(self.public_cards),
+            dict(self.asked_ranks),
+        )
+
+    def _restore_undo(self, record: tuple):
+        stock, books, self.total_books, self.public_cards, self.asked_ranks = record
+        restore_pile(self.stock, stock)
+        for agent_id, n_books in books.items():
+            del self.books[agent_id][n_books:]
+
+    def _snapshot_state(self) -> dict:
+        return {
+            "books": {str(agent_id): list(books) for agent_id, books in self.books.items()},
+            "stock": card_ids(self.stock),
+            "total_books": self.total_books,
+            "public_cards": {str(agent_id): mask for agent_id, mask in self.public_cards.items()},
+            "asked_ranks": {str(agent_id): ranks for agent_id, ranks in self.asked_ranks.items()},
+        }
+
+    def _restore_state(self, state: dict):
+        self.books = {int(agent_id): list(books) for agent_id, books in state["books"].items()}
+        self.stock = cards_from_ids(state["stock"])
+        self.total_books = state["total_books"]
+        self.public_cards = {
+            int(agent_id): mask for agent_id, mask in state.get("public_cards", {}).items()
+        }
+        self.asked_ranks = {
+            int(agent_id): ranks for agent_id, ranks in state.get("asked_ranks", {}).items()
+        }
+
+    def _hidden_piles(self) -> list[list[Card]]:
+        return [self.stock]
+
+    def _known_cards(self, observer: int, agent_id: int, unseen: int, rng: random.Random) -> int:
+        """Caught cards still in hand, plus a sampled card of each rank asked for and still held."""
+        known = self.public_cards.get(agent_id, 0) & self.hands[agent_id].mask
+        asked_ranks = self.asked_ranks.get(agent_id, 0)
+        for rank_idx, rank in enumerate(RANKS):
+            if asked_ranks >> rank_idx & 1 and not known & RANK_MASKS[rank]:
+                candidates = list(iter_mask(unseen & RANK_MASKS[rank]))
+                if candidates:
+                    known |= rng.choice(candidates).bit
+        return known
+
     def get_agent_scores(self) -> dict[int, float]:
         """Player with the most books wins."""
         assert self.num_agents == 2, "Implementation for get_agent_scores only supports 2 players"
@@ -132,7 +222,3 @@ class GoFish(DiscreteGame):
             return {0: 0.0, 1: 1.0}
         else:  # Draw
             return {0: 0.5, 1: 0.5}
-
-    def validate_action(self, agent_id: int, action: Action) -> bool:
-        """..."""
-        return action in self.get_agent_actions(agent_id)
@@ -0,0 +1,99 @@
+import numpy as np
+
+from src.games.common import RANKS, DiscreteGame
+from src.games.go_fish.go_fish import Action, GoFish
+from src.games.vector import (
+    CARD_BITS,
+    MAX_TURNS,
+    N_CARDS,
+    RANK_MASK_ARRAY,
+    VectorGame,
+    mask_to_array,
+    pile_pop,
+    set_pile,
+)
+
+CARDS_PER_AGENT = 7
+PASS = len(RANKS)  # Actions 0-12 ask the opponent for a rank
+
+
+class GoFishVector(VectorGame):
+    """Two-player Go Fish on NumPy arrays. Action ``r`` asks the opponent for rank ``RANKS[r]``."""
+
+    game_cls = GoFish
+    num_actions = len(RANKS) + 1
+
+    def __init__(self, batch_size: int, seed: int | None = None, max_turns: int | None = MAX_TURNS):
+        self.stock = np.zeros((batch_size, N_CARDS), dtype=np.int8)
+        self.stock_size = np.zeros(batch_size, dtype=np.int64)
+        self.books = np.zeros((batch_size, 2), dtype=np.int64)
+        super().__init__(batch_size, seed, max_turns)
+
+    def _deal(self, idx: np.ndarray, decks: np.ndarray):
+        bits = CARD_BITS[decks]
+        for agent_id in range(self.num_agents):
+            dealt = bits[:, agent_id * CARDS_PER_AGENT : (agent_id + 1) * CARDS_PER_AGENT]
+            self.hands[idx, agent_id] = np.bitwise_or.reduce(dealt, axis=1)
+        n_dealt = self.num_agents * CARDS_PER_AGENT
+        self.stock[idx] = 0
+        self.stock[idx, : N_CARDS - n_dealt] = decks[:, n_dealt:]
+        self.stock_size[idx] = N_CARDS - n_dealt
+        self.books[idx] = 0
+        self.current_agent[idx] = self.rng.integers(0, self.num_agents, len(idx))
+
+    def _legal_actions(self, legal: np.ndarray):
+        hands = self.hands[np.arange(self.batch_size), self.current_agent]
+        legal[:, :PASS] = (hands[:, None] & RANK_MASK_ARRAY) != 0
+        legal[:, PASS] = hands == 0
+
+    def observations(self) -> dict[str, np.ndarray]:
+        rows = np.arange(self.batch_size)
+        return {
+            "hand": mask_to_array(self.hands[rows, self.current_agent]),
+            "books": self.books[rows, self.current_agent],
+        }
+
+    def _step(self, actions: np.ndarray) -> np.ndarray:
+        done = np.zeros(self.batch_size, dtype=bool)
+        asks = np.flatnonzero(actions != PASS)
+        agents = self.current_agent[asks]
+        targets = 1 - agents
+        hands = self.hands[asks, agents]
+        target_hands = self.hands[asks, targets]
+
+        # Catch every card of the rank, or go fishing
+        caught = target_hands & RANK_MASK_ARRAY[actions[asks]]
+        hands |= caught
+        target_hands &= ~caught
+        fishing = np.flatnonzero((caught == 0) & (self.stock_size[asks] > 0))
+        hands[fishing] |= CARD_BITS[pile_pop(self.stock, self.stock_size, asks[fishing])]
+
+        # Put down completed books
+        complete = (hands[:, None] & RANK_MASK_ARRAY) == RANK_MASK_ARRAY
+        hands &= ~np.bitwise_or.reduce(np.where(complete, RANK_MASK_ARRAY, np.uint64(0)), axis=1)
+        self.books[asks, agents] += complete.sum(axis=1)
+        self.hands[asks, agents] = hands
+        self.hands[asks, targets] = target_hands
+
+        done[asks] = self.books[asks].sum(axis=1) == len(RANKS)
+        self._switch_agent(np.flatnonzero(~done))
+        return done
+
+    def _scores(self, idx: np.ndarray) -> np.ndarray:
+        books = self.books[idx]
+        scores = np.full((len(idx), 2), 0.5)
+        scores[books[:, 0] > books[:, 1]] = (1.0, 0.0)
+        scores[books[:, 0] < books[:, 1]] = (0.0, 1.0)
+        return scores
+
+    def decode_action(self, action: int, agent_id: int) -> Action:
+        if action == PASS:
+            return Action(is_pass=True)
+        return Action(rank=RANKS[action], target_agent_id=1 - agent_id)
+
+    def encode_action(self, action: Action) -> int:
+        return PASS if action.is_pass else RANKS.index(action.rank)
+
+    def _load(self, idx: int, game: DiscreteGame):
+        set_pile(self.stock, self.stock_size, idx, game.stock)
+        self.books[idx] = [len(game.books[agent_id]) for agent_id in range(self.num_agents)]
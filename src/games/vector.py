@@ -0,0 +1,183 @@
+"""
+Lockstep vectorized games: B games of one engine held as NumPy arrays and stepped together.
+
+Hands are uint64 card masks (same bit layout as Hand), piles are card id arrays with a size per
+game (the top card is the last one, as with list.pop()). Actions are integers in
+``range(num_actions)``; decode_action() and encode_action() convert them to and from the engine's
+Action objects. Games that finish are scored and dealt again on the same step.
+"""
+
+from typing import Any
+
+import numpy as np
+
+from src.games.common import (
+    CARDS,
+    MAX_TURN_COUNT,
+    RANKS,
+    SUITS,
+    RANK_MASKS,
+    SUIT_MASKS,
+    DiscreteGame,
+)
+
+# Steps after which an unfinished game is scored as a draw. The controller counts a turn before
+# each step and calls the draw on reaching MAX_TURN_COUNT turns for each of the two agents, i.e.
+# after one step fewer than that.
+MAX_TURNS = MAX_TURN_COUNT * 2 - 1
+
+N_CARDS = len(CARDS)
+CARD_BITS = np.array([card.bit for card in CARDS], dtype=np.uint64)
+RANK_MASK_ARRAY = np.array([RANK_MASKS[rank] for rank in RANKS], dtype=np.uint64)
+SUIT_MASK_ARRAY = np.array([SUIT_MASKS[suit] for suit in SUITS], dtype=np.uint64)
+CARD_RANKS = np.array([card.id // len(SUITS) for card in CARDS], dtype=np.int8)
+CARD_SUITS = np.array([card.id % len(SUITS) for card in CARDS], dtype=np.int8)
+
+
+def popcount(masks: np.ndarray) -> np.ndarray:
+    return np.bitwise_count(masks).astype(np.int64)
+
+
+def mask_to_array(masks: np.ndarray) -> np.ndarray:
+    """(..., 52) booleans of the cards set in each mask."""
+    return (masks[..., None] & CARD_BITS) != 0
+
+
+class VectorGame:
+    """
+    B two-player games of one engine, stepped together.
+
+    Per game state lives in arrays indexed by game (``hands[b, agent_id]``, ``current_agent[b]``,
+    ...). Each engine implements _deal, _legal_actions, _step and _scores over a subset of games.
+
+    :param batch_size: number of games B
+    :param seed: seed of the NumPy generator dealing every game
+    :param max_turns: steps after which an unfinished game is a draw (None for no limit)
+    """
+
+    game_cls: type[DiscreteGame]
+    num_actions: int
+    num_agents = 2
+
+    def __init__(self, batch_size: int, seed: int | None = None, max_turns: int | None = MAX_TURNS):
+        self.batch_size = batch_size
+        self.max_turns = max_turns
+        self.rng = np.random.default_rng(seed)
+        self.hands = np.zeros((batch_size, self.num_agents), dtype=np.uint64)
+        self.current_agent = np.zeros(batch_size, dtype=np.int64)
+        self.turns = np.zeros(batch_size, dtype=np.int64)
+        self.games_completed = 0
+        self.total_scores = np.zeros(self.num_agents)
+        self._legal: np.ndarray | None = None
+        self.reset()
+
+    def reset(self, idx: np.ndarray | None = None):
+        """Deal new games in the slots ``idx`` (default: all of them)."""
+        if idx is None:
+            idx = np.arange(self.batch_size)
+        if len(idx):
+            self._deal(idx, self._shuffled_decks(len(idx)))
+            self.turns[idx] = 0
+        self._legal = None
+
+    def _shuffled_decks(self, n: int) -> np.ndarray:
+        """(n, 52) card ids, each row a random permutation of the deck."""
+        return self.rng.random((n, N_CARDS)).argsort(axis=1).astype(np.int8)
+
+    def _deal(self, idx: np.ndarray, decks: np.ndarray):
+        raise NotImplementedError
+
+    def legal_actions(self) -> np.ndarray:
+        """(B, num_actions) mask of the current agent's legal actions, cached until step()."""
+        if self._legal is None:
+            self._legal = np.zeros((self.batch_size, self.num_actions), dtype=bool)
+            self._legal_actions(self._legal)
+        return self._legal
+
+    def _legal_actions(self, legal: np.ndarray):
+        raise NotImplementedError
+
+    def observations(self) -> dict[str, np.ndarray]:
+        """The current agent's view of each game: the fields of the engine's agent state."""
+        raise NotImplementedError
+
+    def step(self, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Apply one action per game for its current agent.
+
+        :param actions: (B,) action indices
+        :return: (B,) mask of the games that finished on this step (they are dealt again), and
+            (B, num_agents) scores of those games (zero for the others)
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        if actions.shape != (self.batch_size,):
+            raise ValueError(f"Expected {self.batch_size} actions, got shape {actions.shape}")
+        rows = np.arange(self.batch_size)
+        illegal = ~self.legal_actions()[rows, actions]
+        if illegal.any():
+            raise ValueError(f"Illegal actions in games {np.flatnonzero(illegal)[:10].tolist()}")
+
+        self._legal = None
+        done = self._step(actions)
+        self.turns += 1
+        scores = np.zeros((self.batch_size, self.num_agents))
+        finished = np.flatnonzero(done)
+        if len(finished):
+            scores[finished] = self._scores(finished)
+        if self.max_turns is not None:
+            timed_out = np.flatnonzero(~done & (self.turns >= self.max_turns))
+            scores[timed_out] = 0.5
+            done[timed_out] = True
+            finished = np.flatnonzero(done)
+
+        self.games_completed += len(finished)
+        self.total_scores += scores[finished].sum(axis=0)
+        self.reset(finished)
+        return done, scores
+
+    def _step(self, actions: np.ndarray) -> np.ndarray:
+        """Apply the actions, return the (B,) mask of games that ended."""
+        raise NotImplementedError
+
+    def _scores(self, idx: np.ndarray) -> np.ndarray:
+        """(len(idx), num_agents) scores of the finished games ``idx``."""
+        raise NotImplementedError
+
+    def _switch_agent(self, idx: np.ndarray):
+        self.current_agent[idx] = 1 - self.current_agent[idx]
+
+    def decode_action(self, action: int, agent_id: int) -> Any:
+        """Engine Action for an action index chosen by ``agent_id``."""
+        raise NotImplementedError
+
+    def encode_action(self, action: Any) -> int:
+        raise NotImplementedError
+
+    def load(self, idx: int, game: DiscreteGame):
+        """Copy the state of a game in progress into slot ``idx`` (e.g. to check parity)."""
+        self.hands[idx] = [game.hands[agent_id].mask for agent_id in range(self.num_agents)]
+        self.current_agent[idx] = game.current_agent
+        self.turns[idx] = 0
+        self._load(idx, game)
+        self._legal = None
+
+    def _load(self, idx: int, game: DiscreteGame):
+        raise NotImplementedError
+
+
+def set_pile(piles: np.ndarray, sizes: np.ndarray, idx: int, cards: list):
+    """Load a list of cards (top card last) into pile ``idx``."""
+    piles[idx] = 0
+    piles[idx, : len(cards)] = [card.id for card in cards]
+    sizes[idx] = len(cards)
+
+
+def pile_pop(piles: np.ndarray, sizes: np.ndarray, idx: np.ndarray) -> np.ndarray:
+    """Take the top card of each pile ``idx``, return their ids."""
+    sizes[idx] -= 1
+    return piles[idx, sizes[idx]].astype(np.int64)
+
+
+def pile_push(piles: np.ndarray, sizes: np.ndarray, idx: np.ndarray, cards: np.ndarray):
+    piles[idx, sizes[idx]] = cards
+    sizes[idx] += 1
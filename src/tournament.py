@@ -2,19 +2,29 @@
 Interface to run a tournament of games.
 """
 
+import asyncio
 import datetime as dt
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import wait
+from contextlib import ExitStack
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
 from tqdm import tqdm
 
 from src.agents.common import DiscreteAgent
 from src.agents.random import RandomAgent
 from src.agents.llm.llm import LLMAgent
-from src.games.common import DiscreteGame
+from src.agents.llm import rate_limit, response_cache
+from src.agents.llm.rate_limit import ModelLimits
+from src.games.common import DiscreteGame, derive_seed
 from src.games.go_fish.go_fish import GoFish
 from src.games.gin_rummy.gin_rummy import GinRummy
 from src.games.crazy_eights.crazy_eights import CrazyEights
-from src.controller import run_and_save_discrete_game
+from src.controller import MoveRule, run_and_save_discrete_game, run_and_save_discrete_game_async
 
 logger = logging.getLogger(__name__)
 
@@ -32,59 +42,334 @@ MODEL_IDS = [
     "anthropic/claude-3.5-haiku-20241022",
 ]
 # agent_cls, agent_kwargs
+# ISMCTSAgent is left out: searching on the wall clock, its games depend on machine load and can't
+# be replayed from their seeds. Add it with a fixed budget, e.g.
+# (ISMCTSAgent, {"max_simulations": 1000, "time_per_move": 60}), and the "hybrid" executor.
 AGENTS: list[tuple[type[DiscreteAgent], dict]] = [(RandomAgent, {})] + [
     (LLMAgent, {"model_id": model_id}) for model_id in MODEL_IDS
 ]
 
 
+# Threads suit games waiting on LLM calls, processes suit CPU-bound agents, and "hybrid" sends
+# each game to processes only when both of its agents are CPU-bound. "asyncio" plays every game
+# as a task on a single event loop, awaiting the agents' async actions.
+EXECUTORS = ("threads", "processes", "hybrid", "asyncio")
+
+
+def _init_worker(game: type[DiscreteGame], cache_path: str | None, cache_mode: str):
+    """
+    Process pool initializer: set up the engine once per worker rather than per game. Request
+    budgets are not set up, since games with rate-limited agents never run in worker processes.
+    """
+    game([0, 1])
+    response_cache.configure_response_cache(cache_path, cache_mode)
+
+
+# Games held back by model budgets before the scheduler stops reading further ahead
+MAX_WAITING_GAMES = 1000
+# Seconds between retries when games wait on model slots held outside the tournament
+POLL_INTERVAL = 0.1
+
+
+@dataclass
+class _Job:
+    args: tuple  # run_and_save_discrete_game arguments
+    pool: str
+    model_ids: list[str]
+
+
+def tournament_game_id(tournament_id: str, game_idx: int) -> str:
+    """Id of the game in round-robin slot ``game_idx``; stable across reruns of a tournament."""
+    return f"{tournament_id}_{game_idx:06d}"
+
+
+def _count_completed_games(results_dir: str, tournament_id: str, n_total_games: int) -> int:
+    if not os.path.isdir(results_dir):
+        return 0
+    prefix = f"{tournament_id}_"
+    n_completed = 0
+    with os.scandir(results_dir) as entries:
+        for entry in entries:
+            name, ext = os.path.splitext(entry.name)
+            slot = name[len(prefix) :]
+            if (
+                ext == ".json"
+                and name.startswith(prefix)
+                and slot.isdigit()
+                and int(slot) < n_total_games
+            ):
+                n_completed += 1
+    return n_completed
+
+
+def _play_and_save(*args):
+    """Run and save one game without handing its result back to the scheduler."""
+    run_and_save_discrete_game(*args)
+
+
+def _play_and_save_in_worker(*args) -> dict[str, int]:
+    """
+    _play_and_save in a worker process, returning how much the game moved the engine's counters
+    (see DiscreteGame.stats_counters), which are otherwise lost with the worker.
+    """
+    game = args[0]
+    before = game.stats_counters()
+    run_and_save_discrete_game(*args)
+    return {key: value - before.get(key, 0) for key, value in game.stats_counters().items()}
+
+
+async def _play_and_save_async(*args):
+    await run_and_save_discrete_game_async(*args)
+
+
+class _Scheduler:
+    """
+    Starts games as they are read from a lazy iterator, keeping at most ``slots[pool]`` games in
+    flight per pool. Games whose models have no free slot wait (up to MAX_WAITING_GAMES) while
+    later games start, so games on throttled models don't hold a worker.
+    """
+
+    def __init__(self, jobs: Iterator[_Job], slots: dict[str, int]):
+        self._jobs = jobs
+        self._exhausted = False
+        self.waiting: list[_Job] = []
+        self.slots = slots
+        self.busy = {pool: 0 for pool in slots}
+
+    @property
+    def pending(self) -> bool:
+        return bool(self.waiting) or not self._exhausted
+
+    def _try_start(self, job: _Job) -> bool:
+        if self.busy[job.pool] >= self.slots[job.pool]:
+            return False
+        if not rate_limit.try_start_game(job.model_ids):
+            return False
+        self.busy[job.pool] += 1
+        return True
+
+    def start_ready(self) -> list[_Job]:
+        started, waiting = [], []
+        for job in self.waiting:
+            (started if self._try_start(job) else waiting).append(job)
+        self.waiting = waiting
+
+        # Read further ahead while some pool has a free worker
+        while (
+            not self._exhausted
+            and len(self.waiting) < MAX_WAITING_GAMES
+            and any(self.busy[pool] < self.slots[pool] for pool in self.slots)
+        ):
+            job = next(self._jobs, None)
+            if job is None:
+                self._exhausted = True
+            elif self._try_start(job):
+                started.append(job)
+            else:
+                self.waiting.append(job)
+        return started
+
+    def finish(self, job: _Job):
+        self.busy[job.pool] -= 1
+        rate_limit.finish_game(job.model_ids)
+
+
+async def _run_games_async(scheduler: _Scheduler, pbar: tqdm):
+    """Play games as tasks on the running event loop."""
+    running: dict[asyncio.Task, _Job] = {}
+    while scheduler.pending or running:
+        for job in scheduler.start_ready():
+            running[asyncio.create_task(_play_and_save_async(*job.args))] = job
+        if not running:
+            await asyncio.sleep(POLL_INTERVAL)
+            continue
+        done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            scheduler.finish(running.pop(task))
+            try:
+                task.result()
+            except Exception:
+                logger.exception("A game failed during tournament execution")
+            finally:
+                pbar.update(1)
+
+
 def run_tournament(
     agents: list[tuple[type[DiscreteAgent], dict]],
     game: type[DiscreteGame],
     n_total_games: int,
     tournament_id: str | None = None,
     max_workers: int = 20,
+    seed: int | None = None,
+    executor: str = "threads",
+    max_processes: int | None = None,
+    max_concurrency: int = 100,
+    rate_limits: dict[str, ModelLimits] | None = None,
+    move_timeout: float | None = None,
+    game_timeout: float | None = None,
+    checkpoint_every: int | None = None,
+    move_rules: Sequence[MoveRule] = (),
+    cache_path: str | None = None,
+    cache_mode: str = "read_through",
+    results_root: str = "./results",
 ) -> None:
     """
     Run a tournament of games.
+
+    Game ``i`` is seeded with ``derive_seed(seed, i)``, so a tournament replays identically
+    regardless of thread scheduling. Games are generated lazily and results are dropped once
+    saved, so memory stays flat however many games are played.
+
+    Game ``i`` is saved as ``tournament_game_id(tournament_id, i)``. Rerunning a tournament with
+    the same id only plays the games that have no saved result yet.
+
+    :param max_workers: number of threads for the "threads" and "hybrid" executors
+    :param executor: one of EXECUTORS
+    :param max_processes: number of worker processes (default: CPU count)
+    :param max_concurrency: number of games in flight for the "asyncio" executor
+    :param rate_limits: per-model request rate and in-flight limits; a game only starts once every
+        model it uses has a free slot
+    :param move_timeout: seconds an agent has per move before the move counts as an error
+    :param game_timeout: wall-clock seconds per game before it ends in a draw
+    :param checkpoint_every: checkpoint games in progress every this many turns, so a rerun
+        resumes them instead of starting over
+    :param move_rules: rules playing moves without calling the agent, e.g. ``(forced_move,)`` to
+        skip decisions with a single legal action; their moves are counted in
+        GameResult.elided_calls
+    :param cache_path: SQLite file caching LLM responses (see response_cache); with
+        ``cache_mode="replay"`` a recorded tournament is replayed without network access
+    :param cache_mode: one of response_cache.MODES
+    :param results_root: directory holding a ``{tournament_id}`` directory of results per tournament
     """
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor {executor!r}, expected one of {EXECUTORS}")
+    # Request budgets are per process, so worker processes would each get the full limits
+    if executor == "processes" and any(
+        agent_cls.rate_limit_key(agent_kwargs) is not None for agent_cls, agent_kwargs in agents
+    ):
+        raise ValueError(
+            "Rate-limited agents (e.g. LLMAgent) can't play in worker processes; "
+            "use the 'hybrid' executor to send only CPU-bound games there"
+        )
     if tournament_id is None:
         tournament_id = f"{game.__name__}_{dt.datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    logger.info(f"Running tournament {tournament_id} with {n_total_games} games...")
+    if seed is None:
+        seed = random.SystemRandom().randrange(2**32)
+    logger.info(f"Running tournament {tournament_id} with {n_total_games} games (seed {seed})...")
+    rate_limit.configure_rate_limits(rate_limits or {})
+    response_cache.configure_response_cache(cache_path, cache_mode)
 
-    # Generate pairs of agents in round-robin format until we have enough games
+    # Pairs of agents in round-robin format, repeated until we have enough games
     agent_pairs = []
     for i in range(len(agents)):
         for j in range(i + 1, len(agents)):
             agent_pairs.append((agents[i], agents[j]))
-    agent_pairs *= (n_total_games // len(agent_pairs)) + 1
-    agent_pairs = agent_pairs[:n_total_games]
+
+    def jobs() -> Iterator[_Job]:
+        for game_idx in range(n_total_games):
+            (agent_0_cls, agent_0_kwargs), (agent_1_cls, agent_1_kwargs) = agent_pairs[
+                game_idx % len(agent_pairs)
+            ]
+            model_ids = [
+                key
+                for key in (
+                    agent_0_cls.rate_limit_key(agent_0_kwargs),
+                    agent_1_cls.rate_limit_key(agent_1_kwargs),
+                )
+                if key is not None
+            ]
+            if executor == "hybrid":
+                # Games using request budgets stay in this process, where the budgets live
+                cpu_bound = agent_0_cls.cpu_bound and agent_1_cls.cpu_bound and not model_ids
+                pool = "processes" if cpu_bound else "threads"
+            else:
+                pool = executor
+            game_id = tournament_game_id(tournament_id, game_idx)
+            if os.path.exists(f"{results_dir}/{game_id}.json"):
+                continue
+            args = (
+                game,
+                agent_0_cls,
+                agent_1_cls,
+                agent_0_kwargs,
+                agent_1_kwargs,
+                False,
+                results_dir,
+                derive_seed(seed, game_idx),
+                move_timeout,
+                game_timeout,
+                game_id,
+                checkpoint_every,
+                move_rules,
+            )
+            yield _Job(args, pool, model_ids)
+
+    # Games already saved by an earlier run of this tournament are skipped
+    results_dir = f"{results_root}/{tournament_id}"
+    n_completed = _count_completed_games(results_dir, tournament_id, n_total_games)
+    if n_completed:
+        logger.info(f"Resuming tournament: {n_completed} games already completed")
+    slots = {}
+    if executor in ("threads", "hybrid"):
+        slots["threads"] = max_workers
+    if executor in ("processes", "hybrid"):
+        slots["processes"] = max_processes or os.cpu_count() or 1
+    if executor == "asyncio":
+        slots["asyncio"] = max_concurrency
+    scheduler = _Scheduler(jobs(), slots)
+    pbar = tqdm(total=n_total_games, initial=n_completed, desc="Games", unit="game")
+
+    # Run all the games concurrently on one event loop
+    if executor == "asyncio":
+        with pbar:
+            asyncio.run(_run_games_async(scheduler, pbar))
+        rate_limit.log_rate_limit_stats()
+        response_cache.log_cache_stats()
+        game.log_stats()
+        return
 
     # Run all the games in parallel
-    results_dir = f"./results/{tournament_id}"
-    futures = []
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        for (agent_0_cls, agent_0_kwargs), (agent_1_cls, agent_1_kwargs) in agent_pairs:
-            futures.append(
-                executor.submit(
-                    run_and_save_discrete_game,
-                    game,
-                    agent_0_cls,
-                    agent_1_cls,
-                    agent_0_kwargs,
-                    agent_1_kwargs,
-                    False,
-                    results_dir,
+    with ExitStack() as stack:
+        pools: dict[str, Executor] = {}
+        if executor in ("threads", "hybrid"):
+            pools["threads"] = stack.enter_context(ThreadPoolExecutor(max_workers=max_workers))
+        if executor in ("processes", "hybrid"):
+            pools["processes"] = stack.enter_context(
+                ProcessPoolExecutor(
+                    max_workers=max_processes,
+                    initializer=_init_worker,
+                    initargs=(game, cache_path, cache_mode),
                 )
             )
 
-        with tqdm(total=len(futures), desc="Games", unit="game") as pbar:
-            for future in as_completed(futures):
-                try:
-                    future.result()
-                except Exception:
-                    logger.exception("A game failed during tournament execution")
-                finally:
-                    pbar.update(1)
+        running = {}
+        worker_counters: dict[str, int] = {}
+        with pbar:
+            while scheduler.pending or running:
+                for job in scheduler.start_ready():
+                    play = _play_and_save_in_worker if job.pool == "processes" else _play_and_save
+                    future = pools[job.pool].submit(play, *job.args)
+                    running[future] = job
+                if not running:
+                    time.sleep(POLL_INTERVAL)
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    scheduler.finish(running.pop(future))
+                    try:
+                        for key, value in (future.result() or {}).items():
+                            worker_counters[key] = worker_counters.get(key, 0) + value
+                    except Exception:
+                        logger.exception("A game failed during tournament execution")
+                    finally:
+                        pbar.update(1)
+
+    rate_limit.log_rate_limit_stats()
+    response_cache.log_cache_stats()
+    if "threads" in slots:
+        game.log_stats()
+    if "processes" in slots:
+        game.log_stats(worker_counters)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,161 @@
+import pickle
+import random
+
+import pytest
+
+from src.games.common import (
+    CARDS,
+    RANK_MASKS,
+    SUIT_MASKS,
+    Card,
+    Deck,
+    EventLog,
+    Hand,
+    LazyState,
+    LazyValue,
+)
+from src.games.crazy_eights.crazy_eights import CrazyEights
+from src.games.gin_rummy.gin_rummy import GinRummy
+from src.games.go_fish.go_fish import GoFish
+
+
+def test_cards_are_interned():
+    assert Card("7", "H") is Card("7", "H")
+    with pytest.raises(ValueError):
+        Card("10", "hearts")
+    assert pickle.loads(pickle.dumps(Card("Q", "S"))) is Card("Q", "S")
+    assert len(CARDS) == 52
+    assert all(card.id == i for i, card in enumerate(CARDS))
+
+
+def test_card_is_immutable():
+    with pytest.raises(AttributeError):
+        Card("2", "C").rank = "3"
+
+
+def test_invalid_card():
+    with pytest.raises(ValueError):
+        Card("1", "C")
+
+
+def test_hand_list_api():
+    hand = Hand([Card("K", "S"), Card("2", "C"), Card("7", "D")])
+    assert len(hand) == 3
+    assert list(hand) == [Card("2", "C"), Card("7", "D"), Card("K", "S")]
+    assert hand[0] == Card("2", "C")
+    assert hand.index(Card("K", "S")) == 2
+    assert Card("7", "D") in hand
+    assert Card("7", "H") not in hand
+
+    hand.append(Card("7", "H"))
+    assert hand.count_rank("7") == 2
+    hand.remove(Card("7", "D"))
+    assert Card("7", "D") not in hand
+    assert hand.pop() == Card("K", "S")
+    assert hand == [Card("2", "C"), Card("7", "H")]
+    assert repr(hand) == "['2C', '7H']"
+
+    with pytest.raises(ValueError):
+        hand.remove(Card("A", "S"))
+    with pytest.raises(ValueError):
+        hand.append(Card("2", "C"))
+
+
+def test_hand_masks():
+    hand = Hand(Deck(shuffle=False).cards)
+    sevens = hand.extract(RANK_MASKS["7"])
+    assert len(sevens) == 4 and len(hand) == 48
+    assert "7" not in hand.ranks() and len(hand.ranks()) == 12
+    assert len(hand.cards_of_suit("H")) == 12
+    assert Hand.from_mask(SUIT_MASKS["S"]).cards_of_rank("A") == [Card("A", "S")]
+
+
+def test_lazy_state():
+    calls = []
+
+    def expensive():
+        calls.append(1)
+        return 42
+
+    state = LazyState({"hand": Hand([Card("2", "C")]), "points": LazyValue(expensive)})
+    assert state["hand"] == [Card("2", "C")]
+    assert calls == []
+    assert state["points"] == 42
+    assert state["points"] == 42
+    assert calls == [1]
+    assert repr(state) == "{'hand': ['2C'], 'points': 42}"
+    assert state == {"hand": [Card("2", "C")], "points": 42}
+
+
+def test_event_log_cursors():
+    rendered = []
+
+    def play(agent_id, card_id):
+        rendered.append(card_id)
+        return f"[Agent {agent_id}] plays {CARDS[card_id]}"
+
+    log = EventLog(log_events=False, formats={0: play})
+    cursor = log.cursor()
+    log.push(0, 0, Card("2", "C").id)
+    log.push(0, 1, Card("A", "S").id)
+    assert rendered == []  # Nothing rendered until read
+
+    events = cursor.advance()
+    assert len(events) == 2
+    assert list(events) == ["[Agent 0] plays 2C", "[Agent 1] plays AS"]
+    assert events[-1] == "[Agent 1] plays AS"
+    assert len(cursor.advance()) == 0
+
+    log.push(0, 0, Card("3", "D").id)
+    assert list(cursor.advance()) == ["[Agent 0] plays 3D"]
+    assert log.events == ["[Agent 0] plays 2C", "[Agent 1] plays AS", "[Agent 0] plays 3D"]
+
+
+@pytest.mark.parametrize("game_cls", [GoFish, CrazyEights, GinRummy])
+def test_clone_is_independent(game_cls):
+    game = game_cls([0, 1], seed=3)
+    game.init_game()
+    before = game.snapshot()
+    clone = game.clone()
+    assert clone.rules is game.rules
+    assert clone.snapshot() == before
+    rng = random.Random(0)
+    while not clone.done:
+        clone.step(rng.choice(clone.get_agent_actions(clone.current_agent)))
+    assert game.snapshot() == before
+
+
+@pytest.mark.parametrize("game_cls", [GoFish, CrazyEights, GinRummy])
+def test_apply_undo_restores_state(game_cls):
+    rng = random.Random(1)
+    for seed in range(20):
+        game = game_cls([0, 1], seed=seed)
+        game.init_game()
+        snapshots = []
+        while not game.done and len(snapshots) < 100:
+            snapshots.append(game.snapshot())
+            game.apply(rng.choice(game.get_agent_actions(game.current_agent)))
+        while snapshots:
+            game.undo()
+            assert game.snapshot() == snapshots.pop()
+            # Caches must not serve actions from the undone position
+            assert game.get_agent_actions(game.current_agent) == game._get_agent_actions(
+                game.current_agent
+            )
+
+
+@pytest.mark.parametrize("game_cls", [GoFish, CrazyEights, GinRummy])
+def test_determinize_keeps_observer_view(game_cls):
+    rng = random.Random(2)
+    game = game_cls([0, 1], seed=5)
+    game.init_game()
+    for _ in range(10):
+        game.step(rng.choice(game.get_agent_actions(game.current_agent)))
+    before = game.snapshot()
+    sample = game.determinize(0, rng)
+    assert game.snapshot() == before
+    assert sample.hands[0] == game.hands[0]
+    assert len(sample.hands[1]) == len(game.hands[1])
+    assert len(sample.stock) == len(game.stock)
+    hidden = game.hands[1].mask | Hand(game.stock).mask
+    assert sample.hands[1].mask | Hand(sample.stock).mask == hidden
@@ -1,13 +1,24 @@
+import asyncio
+import json
+import os
 import random
+import time
 
 import pytest
 
-from src.controller import run_discrete_game
+from src.controller import (
+    MAX_ERROR_COUNT,
+    Checkpoint,
+    forced_move,
+    run_and_save_discrete_game,
+    run_discrete_game,
+    run_discrete_game_async,
+)
 from src.games.go_fish.go_fish import GoFish
 from src.games.crazy_eights.crazy_eights import CrazyEights
-from src.games.gin_rummy.gin_rummy import GinRummy
+from src.games.gin_rummy.gin_rummy import Action, ActionType, GinRummy, TurnAction, take_gin
 from src.agents.random import RandomAgent
-from src.games.common import GameResult
+from src.games.common import CARDS, GameResult
 
 
 @pytest.fixture(autouse=True)
@@ -27,4 +38,192 @@ def test_run_game_random_agents(game_cls):
     assert isinstance(result.agent_1_name, str)
     assert isinstance(result.agent_0_score, (int, float))
     assert isinstance(result.agent_1_score, (int, float))
-    assert isinstance(result.event_log, list)
\ No newline at end of file
+    assert isinstance(result.event_log, list)
+
+
+@pytest.mark.parametrize(
+    "game_cls",
+    [GoFish, CrazyEights, GinRummy],
+)
+def test_seeded_games_are_reproducible(game_cls):
+    """The same seed replays the same game, independently of the global random state."""
+    result_a = run_discrete_game(game_cls, RandomAgent, RandomAgent, seed=123)
+    random.seed(99)
+    result_b = run_discrete_game(game_cls, RandomAgent, RandomAgent, seed=123)
+    assert result_a.seed == result_b.seed == 123
+    assert result_a.event_log == result_b.event_log
+    assert result_a.agent_0_score == result_b.agent_0_score
+
+
+@pytest.mark.parametrize(
+    "game_cls",
+    [GoFish, CrazyEights, GinRummy],
+)
+def test_async_game_matches_sync(game_cls):
+    """The async controller plays the same game as the sync one for a given seed."""
+    sync_result = run_discrete_game(game_cls, RandomAgent, RandomAgent, seed=7)
+    async_result = asyncio.run(run_discrete_game_async(game_cls, RandomAgent, RandomAgent, seed=7))
+    assert async_result == sync_result
+
+
+class SlowAgent(RandomAgent):
+    """Takes too long on every move."""
+
+    def get_action(self, new_events, state, actions):
+        time.sleep(0.05)
+        return super().get_action(new_events, state, actions)
+
+    async def get_action_async(self, new_events, state, actions):
+        await asyncio.sleep(0.05)
+        return super().get_action(new_events, state, actions)
+
+
+def test_move_timeout_counts_as_error():
+    result = run_discrete_game(GoFish, SlowAgent, RandomAgent, seed=1, move_timeout=(0.01, None))
+    assert result.agent_0_score == 0
+    assert result.timeouts == [MAX_ERROR_COUNT + 1, 0]
+    assert "max error count" in result.details
+
+
+def test_async_move_timeout_counts_as_error():
+    result = asyncio.run(
+        run_discrete_game_async(GoFish, SlowAgent, RandomAgent, seed=1, move_timeout=(0.01, None))
+    )
+    assert result.agent_0_score == 0
+    assert result.timeouts == [MAX_ERROR_COUNT + 1, 0]
+
+
+def test_game_timeout_ends_in_draw():
+    result = run_discrete_game(GinRummy, SlowAgent, SlowAgent, seed=1, game_timeout=0.12)
+    assert result.agent_0_score == result.agent_1_score == 0.5
+    assert "time budget" in result.details
+    assert result.timeouts == [0, 0]
+
+
+def test_save_with_game_id(tmp_path):
+    result = run_and_save_discrete_game(
+        GoFish, RandomAgent, RandomAgent, results_dir=str(tmp_path), seed=5, game_id="t_000003"
+    )
+    assert os.listdir(tmp_path) == ["t_000003.json"]
+    with open(tmp_path / "t_000003.json") as f:
+        assert json.load(f) == result.__dict__
+
+
+@pytest.mark.parametrize(
+    "game_cls",
+    [GoFish, CrazyEights, GinRummy],
+)
+def test_snapshot_round_trip(game_cls):
+    """A restored snapshot continues the game exactly like the original."""
+    game = game_cls([0, 1], seed=11)
+    game.init_game()
+    for _ in range(6):
+        game.step(game.rng.choice(game.get_agent_actions(game.current_agent)))
+    snapshot = json.loads(json.dumps(game.snapshot()))
+
+    restored = game_cls([0, 1])
+    restored.restore(snapshot)
+    assert restored.snapshot() == game.snapshot()
+    while not game.done:
+        actions = game.get_agent_actions(game.current_agent)
+        assert restored.get_agent_actions(restored.current_agent) == actions
+        action = game.rng.choice(actions)
+        assert restored.rng.choice(actions) == action
+        game.step(action)
+        restored.step(action)
+    assert restored.event_log.events == game.event_log.events
+    assert restored.get_agent_scores() == game.get_agent_scores()
+
+
+class Crash(BaseException):
+    pass
+
+
+class CrashingAgent(RandomAgent):
+    """Plays like RandomAgent, then takes the process down on its 5th move."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.moves = 0
+
+    def get_action(self, new_events, state, actions):
+        self.moves += 1
+        if self.moves == 5:
+            raise Crash()
+        return super().get_action(new_events, state, actions)
+
+
+@pytest.mark.parametrize(
+    "game_cls",
+    [GoFish, CrazyEights, GinRummy],
+)
+def test_resume_from_checkpoint(game_cls, tmp_path):
+    expected = run_discrete_game(game_cls, RandomAgent, RandomAgent, seed=21)
+
+    checkpoint = Checkpoint(str(tmp_path / "game.ckpt"), every=1)
+    with pytest.raises(Crash):
+        run_discrete_game(game_cls, CrashingAgent, RandomAgent, seed=21, checkpoint=checkpoint)
+    assert os.path.exists(checkpoint.path)
+
+    result = run_discrete_game(game_cls, RandomAgent, RandomAgent, seed=21, checkpoint=checkpoint)
+    assert result == expected
+    assert not os.path.exists(checkpoint.path)
+
+
+class RecordingAgent(RandomAgent):
+    """RandomAgent that keeps the events and actions of every call."""
+
+    calls = []
+
+    def get_action(self, new_events, state, actions):
+        self.calls.append((self.agent_id, list(new_events), list(actions)))
+        return super().get_action(new_events, state, actions)
+
+
+@pytest.mark.parametrize(
+    "game_cls",
+    [GoFish, CrazyEights, GinRummy],
+)
+def test_forced_moves_are_elided(game_cls):
+    RecordingAgent.calls = []
+    result = run_discrete_game(
+        game_cls, RecordingAgent, RecordingAgent, seed=3, log_events=True, move_rules=[forced_move]
+    )
+    assert all(len(actions) > 1 for _, _, actions in RecordingAgent.calls)
+    assert result.elided_calls is not None
+
+    # Every agent still sees every event, in order
+    for agent_id in (0, 1):
+        calls = [events for caller, events, _ in RecordingAgent.calls if caller == agent_id]
+        seen = [event for events in calls for event in events]
+        assert seen == result.event_log[:len(seen)]
+
+
+def test_no_elision_by_default():
+    result = run_discrete_game(GoFish, RandomAgent, RandomAgent, seed=3)
+    assert result.elided_calls == [0, 0]
+
+
+def test_elided_calls_kept_when_an_agent_errors_out():
+    def agent_1_moves(game, agent_id, actions):
+        return actions[0] if agent_id == 1 else None
+
+    result = run_discrete_game(
+        GoFish, SlowAgent, RandomAgent, seed=1, move_timeout=(0.01, None),
+        move_rules=[agent_1_moves],
+    )
+    assert "max error count" in result.details
+    assert result.elided_calls[0] == 0
+    assert result.elided_calls[1] > 0
+
+
+def test_take_gin():
+    game = GinRummy(agent_ids=[0, 1])
+    card = CARDS[0]
+    gin = Action(ActionType.GIN, card)
+    discard = Action(ActionType.DISCARD, card)
+    assert take_gin(game, 0, [discard, gin]) == gin
+    assert take_gin(game, 0, [discard]) is None
+    turn = TurnAction(Action(ActionType.DRAW_FROM_DISCARD), gin)
+    assert take_gin(game, 0, [TurnAction(Action(ActionType.DRAW_FROM_STOCK)), turn]) == turn
+
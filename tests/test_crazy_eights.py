@@ -107,4 +107,29 @@ def test_stalemate_draw_when_equal_cards():
     assert game.done
     result = game.get_agent_scores()
     assert isinstance(result, dict)
-    assert result[0] == result[1]
\ No newline at end of file
+    assert result[0] == result[1]
+
+
+def test_action_cache_invalidated_by_step():
+    """Legal actions are computed once per turn and recomputed after a step."""
+    game = _setup_game()
+    agent = game.current_agent
+    actions = game.get_agent_actions(agent)
+    assert game.get_agent_actions(agent) is actions
+    assert not game.validate_action(agent, Action(is_pass=True))
+
+    game.step(actions[0])
+    if not game.done:
+        assert game.get_agent_actions(game.current_agent) is not actions
+
+
+def test_action_cache_invalidated_by_new_hands():
+    """Setting up a position after the actions were listed doesn't leave them stale."""
+    game = _setup_game()
+    agent = game.current_agent
+    game.get_agent_actions(agent)
+    eight = Card("8", "S")
+    game.hands = {agent: [eight], 1 - agent: list(game.hands[1 - agent])}
+    actions = game.get_agent_actions(agent)
+    assert {action.play_card for action in actions} <= {eight, None}
+    assert actions == game._get_agent_actions(agent)
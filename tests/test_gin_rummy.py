@@ -1,17 +1,20 @@
+import random
+
 import pytest
-from src.games.common import Card
-from src.games.gin_rummy.gin_rummy import GinRummy, Action, ActionType
+from src.games.common import Card, Deck, Hand
+from src.games.gin_rummy.gin_rummy import CompoundGinRummy, GinRummy, Action, ActionType, TurnAction
+from src.games.gin_rummy import deadwood
 
 # Helper to create cards from strings like "5H", "KS", "AC"
 def C(card_str: str) -> Card:
-    rank_map = {'A': 'A', 'K': 'K', 'Q': 'Q', 'J': 'J', 'T': '10'}
+    rank_map = {'A': 'A', 'K': 'K', 'Q': 'Q', 'J': 'J', 'T': 'T'}
     
     rank_char = card_str[:-1]
     suit_char = card_str[-1]
     
     rank = rank_map.get(rank_char, rank_char)
     
-    suit_map = {'S': 'spades', 'H': 'hearts', 'D': 'diamonds', 'C': 'clubs'}
+    suit_map = {'S': 'S', 'H': 'H', 'D': 'D', 'C': 'C'}
     suit = suit_map[suit_char.upper()]
     
     return Card(rank, suit)
@@ -122,6 +125,62 @@ class TestGinRummyScoring:
         hand.append(C("5C"))
         assert game._get_unmatched_points(hand) == 5
 
+class TestDeadwoodSolver:
+
+    def test_meld_catalogue(self):
+        # 13 ranks * (1 four-card set + 4 three-card sets) + 4 suits * 66 runs
+        assert len(deadwood.MELD_CARDS) == 13 * 5 + 4 * 66
+        assert Hand([C("QS"), C("KS"), C("AS")]).mask not in deadwood.MELD_CARDS
+        assert deadwood.meld_cards(Hand([C("3S"), C("AS"), C("2S")]).mask) == [
+            C("AS"), C("2S"), C("3S")
+        ]
+
+    def test_meld_split_matches_points(self):
+        hand = Hand([C("7S"), C("7H"), C("7D"), C("7C"), C("8C"), C("9C"), C("2D")])
+        points, melds = deadwood.solve(hand.mask)
+        assert points == 2
+        melded = 0
+        for meld in melds:
+            assert not melded & meld
+            melded |= meld
+        assert deadwood.mask_points(hand.mask ^ melded) == points
+
+    def test_optimal_meld_combination(self, game):
+        # Four 7s plus overlapping runs in clubs and hearts
+        hand = [
+            C("7S"), C("7H"), C("7D"), C("7C"), C("8C"), C("9C"),
+            C("5H"), C("6H"), C("8H"), C("KD"), C("2S"),
+        ]
+        best_melds = game._get_optimal_meld_combination(hand)
+        # Both runs beat any split of the 7s: deadwood 7S, 7D, KD, 2S
+        assert sorted(best_melds, key=len) == [
+            [C("7C"), C("8C"), C("9C")],
+            [C("5H"), C("6H"), C("7H"), C("8H")],
+        ]
+        assert set(game._get_unmatched_cards(hand)) == {C("7S"), C("7D"), C("KD"), C("2S")}
+
+    def test_leave_one_out_matches_individual_solves(self):
+        rng = random.Random(7)
+        for _ in range(20):
+            hand = Hand(rng.sample(Deck(shuffle=False).cards, 11))
+            results = deadwood.leave_one_out(hand.mask)
+            assert set(results) == set(hand)
+            for card, points in results.items():
+                assert points == deadwood.deadwood(hand.mask ^ card.bit)
+
+    def test_hand_cache_lru(self):
+        cache = deadwood.HandCache(maxsize=2)
+        cache.put(1, (1, ()))
+        cache.put(2, (2, ()))
+        assert cache.get(1) == (1, ())  # 1 is now most recently used
+        cache.put(3, (3, ()))
+        assert cache.get(2) is None
+        assert cache.get(3) == (3, ())
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1)
+        assert stats["size"] == 2
+
+
 class TestGinRummyGameFlow:
 
     def test_initial_deal(self, game):
@@ -213,4 +272,77 @@ class TestGinRummyGameFlow:
         assert len(game.hands[0]) == 10
         assert card_to_discard in game.discard
         assert game.phase == "draw"
-        assert game.current_agent == 1
\ No newline at end of file
+        assert game.current_agent == 1
+
+    def test_incremental_evaluation_matches_full_solve(self, game):
+        """Deadwood state kept across steps matches a fresh solve of each hand."""
+        rng = random.Random(3)
+        for _ in range(5):
+            game = GinRummy(agent_ids=[0, 1])
+            game.init_game()
+            while not game.done:
+                game.step(rng.choice(game.get_agent_actions(game.current_agent)))
+                for agent_id in game.agent_ids:
+                    hand = game.hands[agent_id]
+                    if agent_id in game.evaluations:
+                        # Kept in sync by step, never rebuilt
+                        assert game.evaluations[agent_id].mask == hand.mask
+                    evaluation = game._evaluation(agent_id)
+                    assert evaluation.points == game._get_unmatched_points(list(hand))
+                    if len(hand) == 11 and not game.done:
+                        assert evaluation.discard_points == deadwood.leave_one_out(hand.mask)
+
+
+class TestCompoundTurns:
+
+    def test_turn_actions_match_two_step_turns(self):
+        """A compound turn offers the same follow-ups and reaches the same state as two steps."""
+        rng = random.Random(5)
+        for seed in range(10):
+            game = CompoundGinRummy(agent_ids=[0, 1], seed=seed)
+            game.init_game()
+            while not game.done:
+                agent_id = game.current_agent
+                actions = game.get_agent_actions(agent_id)
+                plain = game.clone()
+                plain.compound_turns = False
+                if game.phase == "draw" and game.discard:
+                    plain.step(Action(ActionType.DRAW_FROM_DISCARD))
+                    follow_ups = {
+                        action.follow_up
+                        for action in actions
+                        if action.draw.action_type == ActionType.DRAW_FROM_DISCARD
+                    }
+                    assert follow_ups == set(plain.get_agent_actions(agent_id))
+                    plain = game.clone()
+                    plain.compound_turns = False
+
+                action = rng.choice(actions)
+                if isinstance(action, TurnAction):
+                    drawn = (game.stock if action.draw.action_type == ActionType.DRAW_FROM_STOCK else game.discard)[-1]
+                    plain.step(action.draw)
+                    if action.follow_up is not None:
+                        follow_up = Action(action.follow_up.action_type, action.follow_up.card or drawn)
+                        assert plain.validate_action(agent_id, follow_up)
+                        plain.step(follow_up)
+                else:
+                    plain.step(action)
+                game.step(action)
+                assert game.snapshot() == plain.snapshot()
+
+    def test_turn_actions_undo(self):
+        rng = random.Random(6)
+        game = CompoundGinRummy(agent_ids=[0, 1], seed=1)
+        game.init_game()
+        snapshots = []
+        while not game.done:
+            snapshots.append(game.snapshot())
+            game.apply(rng.choice(game.get_agent_actions(game.current_agent)))
+        while snapshots:
+            game.undo()
+            assert game.snapshot() == snapshots.pop()
+
+    def test_compound_rules_mention_turn_actions(self):
+        assert "Compound Turns" in CompoundGinRummy(agent_ids=[0, 1]).rules
+        assert "Compound Turns" not in GinRummy(agent_ids=[0, 1]).rules
+
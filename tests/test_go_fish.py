@@ -94,4 +94,23 @@ def test_game_completion_and_result():
     assert game.done
     result = game.get_agent_scores()
     assert isinstance(result, dict)
-    assert result[0] > result[1]
\ No newline at end of file
+    assert result[0] > result[1]
+
+
+def test_determinize_keeps_revealed_cards():
+    game = _setup_game()
+    game.current_agent = 0
+    game.hands = {
+        0: [Card("7", "C"), Card("2", "D")],
+        1: [Card("7", "D"), Card("9", "C"), Card("K", "H")],
+    }
+    game.stock = [Card("9", "D"), Card("5", "S"), Card("J", "C")]
+    game.step(Action(rank="7", target_agent_id=1))  # Caught 7D
+    game.step(Action(rank="9", target_agent_id=0))  # Agent 1 still holds a nine
+
+    rng = random.Random(0)
+    for _ in range(20):
+        sample = game.determinize(1, rng)
+        assert Card("7", "D") in sample.hands[0]
+        sample = game.determinize(0, rng)
+        assert sample.hands[1].count_rank("9") >= 1
@@ -0,0 +1,70 @@
+import json
+import time
+
+import pytest
+
+from src.agents.ismcts import ISMCTSAgent, _search_worker
+from src.agents.random import RandomAgent
+from src.controller import run_discrete_game
+from src.games.crazy_eights.crazy_eights import CrazyEights
+from src.games.gin_rummy.gin_rummy import GinRummy
+from src.games.go_fish.go_fish import GoFish
+
+
+@pytest.mark.parametrize("game_cls", [GoFish, CrazyEights, GinRummy])
+def test_ismcts_plays_full_game(game_cls):
+    # Seeded agents search deterministically when bounded by simulations rather than time
+    kwargs = {"max_simulations": 3, "time_per_move": 5}
+    result = run_discrete_game(game_cls, ISMCTSAgent, RandomAgent, kwargs, seed=7, log_events=True)
+    assert "max error count" not in result.details
+    again = run_discrete_game(game_cls, ISMCTSAgent, RandomAgent, kwargs, seed=7, log_events=True)
+    assert again.event_log == result.event_log
+
+
+def test_ismcts_reports_search_stats():
+    game = CrazyEights([0, 1], seed=1)
+    game.init_game()
+    agent = ISMCTSAgent(game.current_agent, game.game_name, game.rules, max_simulations=50)
+    agent.set_game(game)
+    actions = game.get_agent_actions(game.current_agent)
+    action = agent.get_action([], game.get_agent_state(game.current_agent), actions)
+    assert action in actions
+    assert agent.last_search.simulations == 50
+    assert agent.last_search.simulations_per_second > 0
+    assert 0 < agent.last_search.visit_share <= 1
+
+
+def test_ismcts_beats_random_at_crazy_eights():
+    kwargs = {"max_simulations": 30, "time_per_move": 5}
+    score = sum(
+        run_discrete_game(CrazyEights, ISMCTSAgent, RandomAgent, kwargs, seed=seed).agent_0_score
+        for seed in range(10)
+    )
+    assert score >= 6
+
+
+def test_ismcts_keeps_no_stats_after_its_deadline():
+    game = CrazyEights([0, 1], seed=1)
+    game.init_game()
+    agent = ISMCTSAgent(game.current_agent, game.game_name, game.rules, max_simulations=20)
+    agent.set_game(game)
+    snapshot = game.snapshot()
+    agent.move_deadline = time.monotonic() - 1
+    actions = game.get_agent_actions(game.current_agent)
+    with pytest.raises(TimeoutError):
+        agent.get_action([], game.get_agent_state(game.current_agent), actions)
+    assert agent.last_search is None
+    assert agent.total_simulations == 0
+    assert game.snapshot() == snapshot
+
+
+def test_search_workers_rebuild_the_game_with_its_options():
+    game = GinRummy([0, 1], seed=3, compound_turns=True)
+    game.init_game()
+    snapshot = json.loads(json.dumps(game.snapshot()))
+    visits, _ = _search_worker(GinRummy, [0, 1], snapshot, game.current_agent, 1, 5, 20, 1.4)
+    assert set(visits) <= set(game.get_agent_actions(game.current_agent))
+
+    # A snapshot doesn't restore into a game built with other options
+    with pytest.raises(ValueError):
+        GinRummy([0, 1]).restore(snapshot)
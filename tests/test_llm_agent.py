@@ -0,0 +1,360 @@
+import asyncio
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+from openai import APIConnectionError, InternalServerError, RateLimitError
+from openai.types.chat import ChatCompletion
+
+# The LLM module builds its clients on import; no request leaves the tests
+os.environ.setdefault("OPENROUTER_API_KEY", "test")
+
+from src.agents.llm import llm, rate_limit
+from src.agents.llm.llm import ContextPolicy, LLMAgent
+from src.agents.random import RandomAgent
+from src.controller import MoveTimeoutError, _MoveRunner, run_discrete_game
+from src.games.go_fish.go_fish import GoFish
+
+
+class FakeCompletions:
+    """Answers every request with action 0, reporting one prompt token per message."""
+
+    def __init__(self):
+        self.requests = []
+        self.cached_tokens = 0
+
+    def create(self, **request):
+        self.requests.append({**request, "messages": list(request["messages"])})
+        return self.answer(request)
+
+    def answer(self, request):
+        return ChatCompletion.model_validate({
+            "id": "test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": request["model"],
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {
+                    "role": "assistant",
+                    "content": json.dumps({"thoughts": "long reasoning", "action_index": 0}),
+                },
+            }],
+            "usage": {
+                "prompt_tokens": len(request["messages"]),
+                "completion_tokens": 1,
+                "total_tokens": len(request["messages"]) + 1,
+                "prompt_tokens_details": {"cached_tokens": self.cached_tokens},
+            },
+        })
+
+
+class ScriptedCompletions(FakeCompletions):
+    """
+    Plays one step of a script per request: raise an error, wait some seconds then answer, or wait
+    some seconds then raise an error (a (seconds, error) pair).
+    """
+
+    def __init__(self, script):
+        super().__init__()
+        self.script = list(script)
+
+    def _next_step(self, request):
+        self.requests.append({**request, "messages": list(request["messages"])})
+        return self.script.pop(0) if self.script else None
+
+    def create(self, **request):
+        step = self._next_step(request)
+        if isinstance(step, tuple):
+            seconds, step = step
+            time.sleep(seconds)
+        if isinstance(step, Exception):
+            raise step
+        if step is not None:
+            time.sleep(step)
+        return self.answer(request)
+
+
+class AsyncScriptedCompletions(ScriptedCompletions):
+
+    async def create(self, **request):
+        step = self._next_step(request)
+        if isinstance(step, tuple):
+            seconds, step = step
+            await asyncio.sleep(seconds)
+        if isinstance(step, Exception):
+            raise step
+        if step is not None:
+            await asyncio.sleep(step)
+        return self.answer(request)
+
+
+def api_error(cls, retry_after=None):
+    """An openai error built without its HTTP request and response objects."""
+    error = cls.__new__(cls)
+    Exception.__init__(error, cls.__name__)
+    headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+    error.response = SimpleNamespace(headers=headers)
+    return error
+
+
+def connection_error():
+    return api_error(APIConnectionError)
+
+
+def server_error():
+    return api_error(InternalServerError)
+
+
+def rate_limited(retry_after=None):
+    return api_error(RateLimitError, retry_after)
+
+
+@pytest.fixture(autouse=True)
+def fresh_budgets(monkeypatch):
+    rate_limit.configure_rate_limits({})
+    monkeypatch.setattr(llm, "BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(rate_limit, "DEFAULT_THROTTLE", 0.001)
+    yield
+    rate_limit.configure_rate_limits({})
+
+
+@pytest.fixture(params=["sync", "async"])
+def scripted(request, monkeypatch):
+    """Installs a script on the client of the parametrized path; returns (install, get_action)."""
+    is_async = request.param == "async"
+
+    def install(script):
+        completions = (AsyncScriptedCompletions if is_async else ScriptedCompletions)(script)
+        client = llm.ASYNC_CLIENT if is_async else llm.CLIENT
+        monkeypatch.setattr(client.chat, "completions", completions)
+        return completions
+
+    def get_action(agent):
+        if is_async:
+            return asyncio.run(agent.get_action_async([], {}, ["a", "b"]))
+        return agent.get_action([], {}, ["a", "b"])
+
+    return install, get_action
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    fake = FakeCompletions()
+    monkeypatch.setattr(llm.CLIENT.chat, "completions", fake)
+    return fake
+
+
+def test_full_context_by_default(fake):
+    result = run_discrete_game(GoFish, LLMAgent, RandomAgent, seed=2)
+    n_calls = len(fake.requests)
+    assert len(fake.requests[-1]["messages"]) == 2 * n_calls + 1
+    assert "long reasoning" in fake.requests[-1]["messages"][3]["content"]
+    stats = result.agent_stats[0]
+    assert stats["calls"] == n_calls
+    assert stats["max_prompt_tokens"] == 2 * n_calls + 1
+
+
+def test_sliding_window(fake):
+    policy = ContextPolicy(max_turns=2, keep_thoughts=False, summary_events=5)
+    run_discrete_game(GoFish, LLMAgent, RandomAgent, seed=2, agent_0_kwargs={"context": policy})
+    assert len(fake.requests) > 4
+    for request in fake.requests[3:]:
+        messages = request["messages"]
+        # Rules, seat, digest, then two past turns and the current prompt
+        assert [message["role"] for message in messages] == [
+            "system", "system", "user", "user", "assistant", "user", "assistant", "user"
+        ]
+        assert messages[2]["content"].startswith("**Events of earlier turns**")
+        assert len(messages[2]["content"].splitlines()) <= 6
+        assert "thoughts" not in messages[4]["content"]
+        assert json.loads(messages[4]["content"]) == {"action_index": 0}
+
+
+def test_window_slides_in_blocks(fake):
+    policy = ContextPolicy(max_turns=4, summary_events=5, slide_turns=3)
+    run_discrete_game(GoFish, LLMAgent, RandomAgent, seed=2, agent_0_kwargs={"context": policy})
+    assert len(fake.requests) > 6
+    n_slides = 0
+    for previous, request in zip(fake.requests, fake.requests[1:]):
+        messages = request["messages"]
+        n_past = sum(message["role"] == "assistant" for message in messages)
+        assert n_past <= 4
+        if messages[:len(previous["messages"])] == previous["messages"]:
+            continue
+        # Three turns moved to the digest together, then the prompt extends itself again
+        n_slides += 1
+        assert n_past == 2
+        assert messages[2]["content"].startswith("**Events of earlier turns**")
+    assert 0 < n_slides <= len(fake.requests) // 3
+
+
+def test_context_survives_snapshot(fake):
+    agent = LLMAgent(0, "go_fish", "rules", context=ContextPolicy(max_turns=0, summary_events=3))
+    for turn in range(3):
+        agent.get_action([f"event {turn}"], {}, ["a", "b"])
+    restored = LLMAgent(0, "go_fish", "rules", context=ContextPolicy(max_turns=0, summary_events=3))
+    restored.restore(json.loads(json.dumps(agent.snapshot())))
+    assert restored._request() == agent._request()
+    assert list(restored.summary) == ["event 0", "event 1"]
+    assert restored.stats() == agent.stats()
+
+
+def test_prompt_prefix_is_shared_by_both_agents(fake):
+    run_discrete_game(GoFish, LLMAgent, LLMAgent, seed=2)
+    by_agent = {}
+    for request in fake.requests:
+        seat = request["messages"][1]["content"]
+        by_agent.setdefault(seat, []).append(request["messages"])
+    assert len(by_agent) == 2
+    agent_0, agent_1 = by_agent.values()
+    assert agent_0[0][0] == agent_1[0][0]
+    # Each request extends the previous one of the same agent
+    for conversation in by_agent.values():
+        for previous, current in zip(conversation, conversation[1:]):
+            assert current[:len(previous)] == previous
+
+
+def test_cache_control_and_cached_tokens(fake):
+    agent = LLMAgent(0, "go_fish", "rules", model_id="anthropic/claude-3.5-haiku")
+    assert agent._request()["messages"][0]["content"][0]["cache_control"] == {"type": "ephemeral"}
+    assert isinstance(LLMAgent(0, "go_fish", "rules")._request()["messages"][0]["content"], str)
+
+    fake.cached_tokens = 5
+    agent.get_action([], {"hand": []}, ["a", "b"])
+    assert agent.stats()["cached_tokens"] == 5
+
+
+def test_transient_errors_are_retried(scripted):
+    install, get_action = scripted
+    completions = install([connection_error(), connection_error(), rate_limited(), server_error()])
+    agent = LLMAgent(0, "go_fish", "rules")
+    assert get_action(agent) == "a"
+    assert len(completions.requests) == 5
+    # Retries resend the same conversation rather than growing it
+    first = completions.requests[0]["messages"]
+    assert all(request["messages"] == first for request in completions.requests)
+    assert [message["role"] for message in agent.messages] == ["system", "user", "assistant"]
+
+
+def test_rate_limits_and_other_errors_have_separate_caps(scripted):
+    install, get_action = scripted
+    install([connection_error()] * llm.MAX_RETRIES + [rate_limited()] * llm.MAX_RATE_LIMIT_RETRIES)
+    assert get_action(LLMAgent(0, "go_fish", "rules", model_id="caps-ok")) == "a"
+
+    install([connection_error()] * (llm.MAX_RETRIES + 1))
+    with pytest.raises(APIConnectionError):
+        get_action(LLMAgent(0, "go_fish", "rules", model_id="too-many-errors"))
+
+    install([rate_limited()] * (llm.MAX_RATE_LIMIT_RETRIES + 1))
+    with pytest.raises(RateLimitError):
+        get_action(LLMAgent(0, "go_fish", "rules", model_id="too-many-429s"))
+
+
+def test_retry_after_throttles_the_model(scripted):
+    install, get_action = scripted
+    install([rate_limited(retry_after=0.05)])
+    agent = LLMAgent(0, "go_fish", "rules", model_id="throttled")
+    start = time.monotonic()
+    assert get_action(agent) == "a"
+    assert time.monotonic() - start >= 0.05
+    assert rate_limit.get_budget("throttled").throttled == 1
+
+
+def test_no_retry_past_the_move_deadline(scripted):
+    install, get_action = scripted
+    completions = install([rate_limited(retry_after=5)])
+    agent = LLMAgent(0, "go_fish", "rules", model_id="deadline")
+    agent.move_deadline = time.monotonic() + 1
+    start = time.monotonic()
+    with pytest.raises(RateLimitError):
+        get_action(agent)
+    assert time.monotonic() - start < 1
+    assert len(completions.requests) == 1
+
+
+def test_no_wait_on_the_budget_past_the_move_deadline(scripted):
+    install, get_action = scripted
+    completions = install([])
+    rate_limit.get_budget("blocked").throttle(retry_after=5)
+    agent = LLMAgent(0, "go_fish", "rules", model_id="blocked")
+    agent.move_deadline = time.monotonic() + 0.1
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        get_action(agent)
+    assert time.monotonic() - start < 1
+    assert completions.requests == []
+
+
+def test_hedge_wins_and_releases_both_slots(scripted):
+    install, get_action = scripted
+    # The first request is slow, the hedge answers straight away
+    completions = install([0.3])
+    budget = rate_limit.get_budget("hedged")
+    for _ in range(rate_limit.MIN_LATENCY_SAMPLES):
+        budget.record_latency(0.01)
+    agent = LLMAgent(0, "go_fish", "rules", model_id="hedged", hedge_percentile=0.5)
+    assert get_action(agent) == "a"
+    assert len(completions.requests) == 2
+    assert (budget.hedged, budget.hedge_wins) == (1, 1)
+    assert [message["role"] for message in agent.messages] == ["system", "user", "assistant"]
+
+    # The slower request still frees its slot, whether it is cancelled or runs to the end
+    deadline = time.monotonic() + 1
+    while budget.in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert budget.in_flight == 0
+
+
+def test_late_answer_leaves_the_agent_unchanged(monkeypatch):
+    monkeypatch.setattr(llm.CLIENT.chat, "completions", ScriptedCompletions([0.3]))
+    agent = LLMAgent(0, "go_fish", "rules")
+    runner = _MoveRunner()
+    agent.move_deadline = time.monotonic() + 0.05
+    with pytest.raises(MoveTimeoutError):
+        runner.run(agent, (["event"], {}, ["a", "b"]), 0.05)
+    # Let the abandoned call finish: its answer must not land in the conversation
+    time.sleep(0.4)
+    assert [message["role"] for message in agent.messages] == ["system"]
+    assert agent.turn_events == []
+    assert agent.stats()["calls"] == 0
+
+    agent.move_deadline = None
+    assert agent.get_action([], {}, ["a", "b"]) == "a"
+    assert [message["role"] for message in agent.messages] == ["system", "user", "assistant"]
+
+
+def test_abandoned_call_keeps_its_move_deadline(monkeypatch):
+    completions = ScriptedCompletions([(0.2, rate_limited(retry_after=0.2))])
+    monkeypatch.setattr(llm.CLIENT.chat, "completions", completions)
+    agent = LLMAgent(0, "go_fish", "rules", model_id="abandoned")
+    agent.move_deadline = time.monotonic() + 0.05
+    with pytest.raises(MoveTimeoutError):
+        _MoveRunner().run(agent, ([], {}, ["a", "b"]), 0.05)
+    # The controller moves on and gives the agent its next move's deadline
+    agent.move_deadline = time.monotonic() + 10
+    time.sleep(0.6)
+    # The 429 came after the timed-out move's deadline, so the call gave up instead of retrying
+    assert len(completions.requests) == 1
+    assert completions.requests[0]["timeout"] <= 0.05
+    assert agent.stats()["calls"] == 0
+
+
+def test_abandoned_call_sends_no_hedge_after_its_deadline(monkeypatch):
+    completions = ScriptedCompletions([0.3])
+    monkeypatch.setattr(llm.CLIENT.chat, "completions", completions)
+    budget = rate_limit.get_budget("abandoned-hedge")
+    for _ in range(rate_limit.MIN_LATENCY_SAMPLES):
+        budget.record_latency(0.1)
+    agent = LLMAgent(0, "go_fish", "rules", model_id="abandoned-hedge", hedge_percentile=0.5)
+    agent.move_deadline = time.monotonic() + 0.05
+    with pytest.raises(MoveTimeoutError):
+        _MoveRunner().run(agent, ([], {}, ["a", "b"]), 0.05)
+    agent.move_deadline = time.monotonic() + 10
+    time.sleep(0.4)
+    # The hedge would have been due after the move timed out
+    assert len(completions.requests) == 1
+    assert budget.hedged == 0
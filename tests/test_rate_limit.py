@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+import pytest
+
+from src.agents.llm import rate_limit
+from src.agents.llm.rate_limit import ModelBudget, ModelLimits
+
+
+@pytest.fixture(autouse=True)
+def reset_limits():
+    rate_limit.configure_rate_limits({})
+    yield
+    rate_limit.configure_rate_limits({})
+
+
+def test_token_bucket_allows_burst_then_waits():
+    budget = ModelBudget(ModelLimits(requests_per_minute=60, burst=2))
+    assert budget._reserve() == 0
+    budget.release()
+    assert budget._reserve() == 0
+    budget.release()
+    assert 0 < budget._reserve() <= 1
+
+
+def test_in_flight_limit():
+    budget = ModelBudget(ModelLimits(max_in_flight=1))
+    budget.acquire()
+    assert budget._reserve() > 0
+    budget.release()
+    assert budget._reserve() == 0
+
+
+def test_acquire_gives_up_at_the_deadline():
+    budget = ModelBudget(ModelLimits(max_in_flight=1))
+    budget.acquire()
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        budget.acquire(deadline=start + 0.05)
+    with pytest.raises(TimeoutError):
+        asyncio.run(budget.acquire_async(deadline=start + 0.1))
+    assert 0.1 <= time.monotonic() - start < 1
+    assert budget.in_flight == 1
+
+
+def test_throttle_blocks_requests():
+    budget = ModelBudget(ModelLimits())
+    budget.throttle(retry_after=0.05)
+    assert budget._reserve() > 0
+    time.sleep(0.06)
+    assert budget._reserve() == 0
+
+
+def test_game_slots_require_every_model():
+    rate_limit.configure_rate_limits({"a": ModelLimits(max_in_flight=1)})
+    assert rate_limit.try_start_game(["a", "b"])
+    assert not rate_limit.try_start_game(["b", "a"])
+    assert rate_limit.get_budget("b").games_in_flight == 1
+    rate_limit.finish_game(["a", "b"])
+    assert rate_limit.try_start_game(["a", "a"])
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        ModelLimits(max_in_flight=0)
@@ -0,0 +1,95 @@
+import json
+import os
+
+import pytest
+from openai.types.chat import ChatCompletion
+
+# The LLM module builds its clients on import; no request leaves the tests
+os.environ.setdefault("OPENROUTER_API_KEY", "test")
+
+from src.agents.llm import llm, response_cache
+from src.agents.llm.llm import LLMAgent
+from src.agents.llm.response_cache import CacheMissError, ResponseCache, request_key
+from src.agents.random import RandomAgent
+from src.controller import run_discrete_game
+from src.games.go_fish.go_fish import GoFish
+
+
+def completion(content):
+    return ChatCompletion.model_validate({
+        "id": "test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "test-model",
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": content},
+        }],
+    })
+
+
+REQUEST = {"model": "test-model", "messages": [{"role": "user", "content": "hi"}]}
+
+
+@pytest.fixture(autouse=True)
+def no_cache():
+    response_cache.configure_response_cache(None)
+    yield
+    response_cache.configure_response_cache(None)
+
+
+def test_request_key_ignores_key_order():
+    reordered = {"messages": REQUEST["messages"], "model": "test-model"}
+    assert request_key(reordered) == request_key(REQUEST)
+    assert request_key({**REQUEST, "model": "other"}) != request_key(REQUEST)
+
+
+def test_modes(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    recorder = ResponseCache(path, "record")
+    assert recorder.lookup(REQUEST) is None
+    recorder.store(REQUEST, completion("hello"))
+
+    replay = ResponseCache(path, "replay")
+    assert replay.lookup(REQUEST).choices[0].message.content == "hello"
+    with pytest.raises(CacheMissError):
+        replay.lookup({**REQUEST, "model": "other"})
+
+    read_through = ResponseCache(path, "read_through")
+    assert read_through.lookup({**REQUEST, "model": "other"}) is None
+    assert read_through.lookup(REQUEST) is not None
+    assert (read_through.hits, read_through.misses) == (1, 1)
+
+    with pytest.raises(ValueError):
+        ResponseCache(path, "write_only")
+
+
+class FakeCompletions:
+
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **request):
+        self.calls += 1
+        return completion(json.dumps({"thoughts": "", "action_index": 0}))
+
+
+def test_llm_agent_replays_recorded_game(tmp_path, monkeypatch):
+    fake = FakeCompletions()
+    monkeypatch.setattr(llm.CLIENT.chat, "completions", fake)
+    path = str(tmp_path / "cache.sqlite")
+
+    response_cache.configure_response_cache(path, "record")
+    recorded = run_discrete_game(GoFish, LLMAgent, RandomAgent, seed=4)
+    assert fake.calls > 0
+
+    calls = fake.calls
+    response_cache.configure_response_cache(path, "replay")
+    replayed = run_discrete_game(GoFish, LLMAgent, RandomAgent, seed=4)
+    assert fake.calls == calls
+    assert replayed == recorded
+
+    # A miss stops the game rather than counting as an agent error
+    with pytest.raises(CacheMissError):
+        run_discrete_game(GoFish, LLMAgent, RandomAgent, seed=5)
@@ -0,0 +1,171 @@
+import json
+import logging
+import os
+import re
+
+import pytest
+
+# The LLM module builds its clients on import; no request leaves the tests
+os.environ.setdefault("OPENROUTER_API_KEY", "test")
+
+from src import tournament
+from src.agents.llm import rate_limit
+from src.agents.llm.llm import LLMAgent
+from src.agents.llm.rate_limit import ModelLimits
+from src.agents.random import RandomAgent
+from src.games.gin_rummy.gin_rummy import GinRummy
+from src.games.go_fish.go_fish import GoFish
+from src.tournament import EXECUTORS, _Job, _Scheduler, run_tournament, tournament_game_id
+
+
+class OneSlotAgent(RandomAgent):
+    """RandomAgent drawing from the budget of a model, noting how many games use it at once."""
+
+    max_games_in_flight = 0
+
+    @classmethod
+    def rate_limit_key(cls, agent_kwargs):
+        return "one-slot"
+
+    def get_action(self, new_events, state, actions):
+        games_in_flight = rate_limit.get_budget("one-slot").games_in_flight
+        OneSlotAgent.max_games_in_flight = max(OneSlotAgent.max_games_in_flight, games_in_flight)
+        return super().get_action(new_events, state, actions)
+
+
+@pytest.fixture(autouse=True)
+def fresh_budgets():
+    rate_limit.configure_rate_limits({})
+    yield
+    rate_limit.configure_rate_limits({})
+
+
+AGENTS = [(RandomAgent, {}), (RandomAgent, {})]
+
+
+def load_results(results_root, tournament_id, n_games):
+    results = []
+    for game_idx in range(n_games):
+        game_id = tournament_game_id(tournament_id, game_idx)
+        with open(f"{results_root}/{tournament_id}/{game_id}.json") as f:
+            results.append(json.load(f))
+    return results
+
+
+@pytest.mark.parametrize("executor", EXECUTORS)
+def test_executors_play_the_same_games(executor, tmp_path):
+    run_tournament(
+        AGENTS,
+        GoFish,
+        6,
+        tournament_id="reference",
+        seed=3,
+        max_workers=2,
+        results_root=str(tmp_path),
+    )
+    run_tournament(
+        AGENTS,
+        GoFish,
+        6,
+        tournament_id=executor,
+        seed=3,
+        executor=executor,
+        max_workers=2,
+        max_processes=2,
+        results_root=str(tmp_path),
+    )
+    assert load_results(tmp_path, executor, 6) == load_results(tmp_path, "reference", 6)
+
+
+def test_rate_limited_agents_stay_out_of_worker_processes(tmp_path):
+    with pytest.raises(ValueError):
+        run_tournament(
+            [(RandomAgent, {}), (LLMAgent, {})],
+            GoFish,
+            2,
+            executor="processes",
+            results_root=str(tmp_path),
+        )
+
+
+@pytest.mark.parametrize("executor", ["threads", "asyncio"])
+def test_games_queue_for_a_model_with_one_slot(executor, tmp_path):
+    OneSlotAgent.max_games_in_flight = 0
+    agents = [(RandomAgent, {}), (OneSlotAgent, {}), (RandomAgent, {})]
+    run_tournament(
+        agents,
+        GoFish,
+        12,
+        tournament_id=executor,
+        seed=3,
+        executor=executor,
+        max_workers=4,
+        max_concurrency=4,
+        rate_limits={"one-slot": ModelLimits(max_in_flight=1)},
+        results_root=str(tmp_path),
+    )
+    assert len(load_results(tmp_path, executor, 12)) == 12
+    assert OneSlotAgent.max_games_in_flight == 1
+
+
+def test_scheduler_starts_games_around_throttled_ones(monkeypatch):
+    rate_limit.configure_rate_limits({"one-slot": ModelLimits(max_in_flight=1)})
+    monkeypatch.setattr(tournament, "MAX_WAITING_GAMES", 20)
+    jobs = [_Job((i,), "threads", ["one-slot"] if i < 10 else []) for i in range(20)]
+    scheduler = _Scheduler(iter(jobs), {"threads": 2})
+
+    # Games waiting on the model don't take the second worker
+    assert scheduler.start_ready() == [jobs[0], jobs[10]]
+    assert scheduler.waiting == jobs[1:10]
+    assert scheduler.start_ready() == []
+
+    scheduler.finish(jobs[0])
+    assert scheduler.start_ready() == [jobs[1]]
+    assert scheduler.waiting == jobs[2:10]
+
+
+def test_scheduler_reads_ahead_at_most_max_waiting_games(monkeypatch):
+    rate_limit.configure_rate_limits({"one-slot": ModelLimits(max_in_flight=1)})
+    monkeypatch.setattr(tournament, "MAX_WAITING_GAMES", 3)
+    jobs = iter([_Job((i,), "threads", ["one-slot"]) for i in range(1000)])
+    scheduler = _Scheduler(jobs, {"threads": 4})
+    assert len(scheduler.start_ready()) == 1
+    assert len(scheduler.waiting) == 3
+    # The rest of the games haven't been generated yet
+    assert next(jobs).args == (4,)
+
+
+def test_rerun_plays_only_the_missing_games(tmp_path):
+    run_tournament(AGENTS, GoFish, 6, tournament_id="reference", seed=3, results_root=str(tmp_path))
+    results_dir = tmp_path / "resumed"
+    results_dir.mkdir()
+    for game_idx in (0, 2, 3):
+        game_id = tournament_game_id("resumed", game_idx)
+        (results_dir / f"{game_id}.json").write_text(json.dumps({"saved": game_idx}))
+
+    run_tournament(AGENTS, GoFish, 6, tournament_id="resumed", seed=3, results_root=str(tmp_path))
+    resumed = load_results(tmp_path, "resumed", 6)
+    reference = load_results(tmp_path, "reference", 6)
+    # Saved games are left alone and the rest play as in a full run
+    for game_idx in (0, 2, 3):
+        assert resumed[game_idx] == {"saved": game_idx}
+    for game_idx in (1, 4, 5):
+        assert resumed[game_idx] == reference[game_idx]
+
+
+def test_worker_processes_report_engine_stats(tmp_path, caplog):
+    caplog.set_level(logging.INFO, logger="src.games.gin_rummy.deadwood")
+    run_tournament(
+        [(RandomAgent, {}), (RandomAgent, {})],
+        GinRummy,
+        4,
+        seed=1,
+        executor="processes",
+        max_processes=2,
+        results_root=str(tmp_path),
+    )
+    (message,) = [
+        record.message for record in caplog.records if "worker processes" in record.message
+    ]
+    hits, misses = map(int, re.search(r"(\d+) hits, (\d+) misses", message).groups())
+    assert hits + misses > 0
@@ -0,0 +1,130 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.games.common import CARDS, MAX_TURN_COUNT, RANKS
+from src.games.crazy_eights.crazy_eights import CrazyEights
+from src.games.crazy_eights.vector import CrazyEightsVector
+from src.games.gin_rummy.gin_rummy import GinRummy
+from src.games.gin_rummy.vector import GinRummyVector
+from src.games.go_fish.go_fish import GoFish
+from src.games.go_fish.vector import GoFishVector
+from src.games.vector import N_CARDS, mask_to_array
+
+VECTOR_GAMES = [
+    (GoFish, GoFishVector),
+    (CrazyEights, CrazyEightsVector),
+    (GinRummy, GinRummyVector),
+]
+
+
+# Piles of a freshly dealt game, the upcard (or top of the stock) last
+ENGINE_PILES = {
+    GoFish: lambda game: [game.stock],
+    CrazyEights: lambda game: [game.stock, game.discard],
+    GinRummy: lambda game: [game.stock, game.discard],
+}
+VECTOR_PILES = {
+    GoFishVector: lambda games, b: [games.stock[b, : games.stock_size[b]]],
+    CrazyEightsVector: lambda games, b: [
+        games.stock[b, : games.stock_size[b]], games.top_discard[b : b + 1]
+    ],
+    GinRummyVector: lambda games, b: [
+        games.stock[b, : games.stock_size[b]], games.discard[b, : games.discard_size[b]]
+    ],
+}
+
+
+@pytest.mark.parametrize("game_cls,vector_cls", VECTOR_GAMES)
+def test_vector_deal_matches_engine(game_cls, vector_cls):
+    """Vector deals have the engine's hand and pile sizes, and deal every card exactly once."""
+    game = game_cls([0, 1], seed=0)
+    game.init_game()
+    hand_sizes = [len(game.hands[agent_id]) for agent_id in (0, 1)]
+    pile_sizes = [len(pile) for pile in ENGINE_PILES[game_cls](game)]
+
+    games = vector_cls(500, seed=0)
+    upcards = []
+    for b in range(games.batch_size):
+        hands = [np.flatnonzero(mask_to_array(games.hands[b, agent_id])) for agent_id in (0, 1)]
+        piles = VECTOR_PILES[vector_cls](games, b)
+        assert [len(hand) for hand in hands] == hand_sizes
+        assert [len(pile) for pile in piles] == pile_sizes
+        assert sorted(np.concatenate(hands + piles).tolist()) == list(range(N_CARDS))
+        upcards.append(CARDS[int(piles[-1][-1])])
+
+    # Crazy Eights never starts on an eight; otherwise any rank turns up
+    expected_ranks = set(RANKS) - ({"8"} if game_cls is CrazyEights else set())
+    assert {card.rank for card in upcards} == expected_ranks
+    assert 0.4 < games.current_agent.mean() < 0.6
+
+
+@pytest.mark.parametrize("game_cls,vector_cls", VECTOR_GAMES)
+def test_vector_game_matches_engine(game_cls, vector_cls):
+    """Games loaded into a vector slot have the same legal actions and results as the engine."""
+    rng = random.Random(0)
+    games = vector_cls(1, seed=0, max_turns=None)
+    # Draws long games where the controller would
+    capped = vector_cls(1, seed=0)
+    n_drawn = 0
+    for seed in range(30):
+        game = game_cls([0, 1], seed=seed)
+        game.init_game()
+        games.load(0, game)
+        capped.load(0, game)
+        capped_drawn = False
+        for turn_count in range(1, 201):
+            # The controller ends the game in a draw before this turn
+            controller_drawn = turn_count >= MAX_TURN_COUNT * game.num_agents
+            assert capped_drawn == controller_drawn
+            n_drawn += turn_count == MAX_TURN_COUNT * game.num_agents
+            agent_id = game.current_agent
+            assert games.current_agent[0] == agent_id
+            legal = np.flatnonzero(games.legal_actions()[0])
+            actions = game.get_agent_actions(agent_id)
+            assert {games.decode_action(a, agent_id) for a in legal} == set(actions)
+            action = rng.choice(actions)
+            assert games.decode_action(games.encode_action(action), agent_id) == action
+            game.step(action)
+            done, scores = games.step(np.array([games.encode_action(action)]))
+            if not capped_drawn:
+                capped_done, capped_scores = capped.step(np.array([games.encode_action(action)]))
+                capped_drawn = capped_done[0] and not game.done
+                if capped_drawn:
+                    assert tuple(capped_scores[0]) == (0.5, 0.5)
+            assert done[0] == game.done
+            if game.done:
+                assert tuple(scores[0]) == tuple(game.get_agent_scores().values())
+                break
+            assert games.hands[0].tolist() == [game.hands[0].mask, game.hands[1].mask]
+    # Only Gin Rummy runs long enough under random play to reach the limit
+    if game_cls is GinRummy:
+        assert n_drawn > 0
+
+
+@pytest.mark.parametrize("game_cls,vector_cls", VECTOR_GAMES)
+def test_vector_game_auto_reset(game_cls, vector_cls):
+    games = vector_cls(64, seed=1, max_turns=30)
+    rng = np.random.default_rng(1)
+    n_finished = 0
+    for _ in range(60):
+        legal = games.legal_actions()
+        assert legal.any(axis=1).all()
+        done, scores = games.step((rng.random(legal.shape) * legal).argmax(axis=1))
+        assert (scores[done].sum(axis=1) == 1).all()
+        assert (scores[~done] == 0).all()
+        assert (games.turns[done] == 0).all()
+        n_finished += done.sum()
+    assert n_finished >= 64
+    assert games.games_completed == n_finished
+    assert games.total_scores.sum() == n_finished
+    assert all(len(field) == 64 for field in games.observations().values())
+
+
+def test_vector_game_rejects_illegal_actions():
+    games = GoFishVector(4, seed=0)
+    with pytest.raises(ValueError):
+        games.step(np.full(4, games.num_actions - 1))  # Pass with cards in hand
+    with pytest.raises(ValueError):
+        games.step(np.zeros(3, dtype=int))